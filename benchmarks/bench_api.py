@@ -0,0 +1,194 @@
+"""
+API Benchmark
+=============
+
+Measures ``/predict`` and ``/batch_predict`` latency percentiles and
+throughput across batch sizes and concurrency levels, plus startup time
+and resident memory. The app is driven either in-process through an ASGI
+transport (no network, isolates the application cost) or over HTTP
+against a uvicorn server started by the script.
+
+Usage:
+    python benchmarks/bench_api.py [--mode inprocess|uvicorn|both]
+        [--requests 200] [--batch-requests 20]
+        [--batch-sizes 1 10 100 1000] [--concurrency 1 8 32]
+        [--omit-exogenous] [--output results.json]
+
+Results are written as JSON to benchmarks/results/ (see compare.py).
+"""
+
+import argparse
+import asyncio
+import resource
+import socket
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import httpx
+import numpy as np
+
+from common import PROJECT_ROOT, summarize_latencies, rss_mb, write_results
+
+SRC_DIR = PROJECT_ROOT / "src"
+
+def make_payload(rng: np.random.Generator, omit_exogenous: bool) -> Dict:
+    """Random prediction request in the shape the frontend sends."""
+    day = np.datetime64('2012-01-06') + 7 * int(rng.integers(0, 80))
+    payload = {
+        'store_id': int(rng.integers(1, 46)),
+        'dept_id': int(rng.integers(1, 100)),
+        'date': str(day)
+    }
+    if not omit_exogenous:
+        payload.update({
+            'temperature': float(rng.uniform(20, 95)),
+            'fuel_price': float(rng.uniform(2.5, 4.5)),
+            'cpi': float(rng.uniform(126, 230)),
+            'unemployment': float(rng.uniform(4, 14)),
+            'markdowns': [float(x) for x in rng.uniform(0, 5000, 5)]
+        })
+    return payload
+
+async def run_load(client: httpx.AsyncClient, path: str, bodies: List, concurrency: int) -> Dict:
+    """
+    Send pre-built request bodies with a fixed number of concurrent workers.
+
+    Returns:
+        Latency summary with error count
+    """
+    latencies = []
+    errors = 0
+    queue = list(reversed(bodies))
+
+    async def worker():
+        nonlocal errors
+        while queue:
+            body = queue.pop()
+            start = time.perf_counter()
+            response = await client.post(path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize_latencies(latencies, time.perf_counter() - start)
+    summary['errors'] = errors
+    return summary
+
+async def bench_endpoints(client: httpx.AsyncClient, args, make: Callable[[], Dict]) -> Dict:
+    """Run the /predict and /batch_predict load matrix."""
+    # Warm up caches and lazy imports before measuring
+    await client.post('/predict', json=make())
+
+    results = {}
+    for concurrency in args.concurrency:
+        bodies = [make() for _ in range(args.requests)]
+        results[f"predict/c{concurrency}"] = await run_load(client, '/predict', bodies, concurrency)
+
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            bodies = [[make() for _ in range(batch_size)] for _ in range(args.batch_requests)]
+            summary = await run_load(client, '/batch_predict', bodies, concurrency)
+            summary['rows_per_s'] = summary.get('requests_per_s', 0.0) * batch_size
+            results[f"batch_predict/b{batch_size}/c{concurrency}"] = summary
+    return results
+
+async def bench_inprocess(args, make: Callable[[], Dict]) -> Dict:
+    """Benchmark the app through an in-process ASGI transport."""
+    sys.path.insert(0, str(SRC_DIR))
+    start = time.perf_counter()
+    import api_server
+    await api_server.load_models()
+    startup = time.perf_counter() - start
+    rss_startup = rss_mb()
+
+    transport = httpx.ASGITransport(app=api_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        endpoints = await bench_endpoints(client, args, make)
+
+    return {
+        'startup_s': startup,
+        'rss_mb_after_startup': rss_startup,
+        'rss_mb_after_load': rss_mb(),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'endpoints': endpoints
+    }
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+async def bench_uvicorn(args, make: Callable[[], Dict]) -> Dict:
+    """Benchmark the app over HTTP against a freshly started uvicorn server."""
+    port = _free_port()
+    cmd = [
+        sys.executable, "-m", "uvicorn", "api_server:app",
+        "--app-dir", str(SRC_DIR), "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(args.workers), "--log-level", "warning"
+    ]
+    start = time.perf_counter()
+    process = subprocess.Popen(cmd, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60.0) as client:
+            startup = None
+            while time.perf_counter() - start < args.startup_timeout:
+                if process.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {process.returncode}")
+                try:
+                    if (await client.get('/health')).status_code == 200:
+                        startup = time.perf_counter() - start
+                        break
+                except httpx.TransportError:
+                    pass
+                await asyncio.sleep(0.05)
+            if startup is None:
+                raise RuntimeError("uvicorn did not become healthy in time")
+
+            rss_startup = rss_mb(process.pid)
+            endpoints = await bench_endpoints(client, args, make)
+            return {
+                'startup_s': startup,
+                'rss_mb_after_startup': rss_startup,
+                'rss_mb_after_load': rss_mb(process.pid),
+                'endpoints': endpoints
+            }
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API latency, throughput and memory")
+    parser.add_argument("--mode", choices=["inprocess", "uvicorn", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per /predict setting")
+    parser.add_argument("--batch-requests", type=int, default=20, help="Requests per /batch_predict setting")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--omit-exogenous", action="store_true",
+                        help="Send only store/dept/date so the server fills exogenous fields")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    make = lambda: make_payload(rng, args.omit_exogenous)
+
+    results = {}
+    # uvicorn first: the in-process run imports the app into this interpreter
+    if args.mode in ("uvicorn", "both"):
+        results['uvicorn'] = asyncio.run(bench_uvicorn(args, make))
+    if args.mode in ("inprocess", "both"):
+        results['inprocess'] = asyncio.run(bench_inprocess(args, make))
+
+    path = write_results('api', results, vars(args), args.output)
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
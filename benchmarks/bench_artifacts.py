@@ -0,0 +1,153 @@
+"""
+Artifact Load Benchmark
+=======================
+
+Compares API startup loading of the pickled artifacts
+(``advanced_models.pkl`` + ``label_encoders.pkl`` + ``categorical_maps.npz``)
+against the native-format export (boosters in XGBoost/LightGBM formats,
+``manifest.json`` and memory-mapped encoder arrays). Every load runs in a
+fresh interpreter, so timings include module imports and reflect a cold
+process start (the OS page cache stays warm across runs).
+
+With ``--synthetic`` both formats are generated from boosters trained on
+random data, so the benchmark runs without the real artifacts.
+
+Usage:
+    python benchmarks/bench_artifacts.py [--repeat 5] [--output FILE]
+    python benchmarks/bench_artifacts.py --synthetic [--trees 500]
+"""
+
+import argparse
+import json
+import pickle
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from common import PROJECT_ROOT, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from features.encoders import LabelLookup, CategoricalEncoders, FrequencyTargetLookup, save_category_maps
+from serving.artifacts import export_artifacts
+from utils.config import ADVANCED_MODELS_FILE, ARTIFACTS_DIR, CATEGORY_MAPS_FILE, LABEL_ENCODERS_FILE
+
+LOADERS = {
+    'pickle': """
+import joblib
+from features.encoders import CategoricalEncoders
+with open(paths['models'], 'rb') as f:
+    models = joblib.load(f)
+encoders = CategoricalEncoders.load(paths['encoders'], paths['maps'])
+""",
+    'native': """
+from serving.artifacts import load_artifacts
+artifacts = load_artifacts(paths['artifacts'])
+"""
+}
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {src!r})
+sys.path.insert(0, {benchmarks!r})
+from common import rss_mb
+paths = json.loads({paths!r})
+before = rss_mb()
+start = time.perf_counter()
+{loader}
+elapsed = time.perf_counter() - start
+after = rss_mb()
+print(json.dumps({{'seconds': elapsed, 'rss_mb': after - before if after is not None else None}}))
+"""
+
+def synthetic_artifacts(directory: Path, trees: int, features: int = 89) -> dict:
+    """Train small boosters on random data and write both artifact formats."""
+    try:
+        import lightgbm as lgb
+        import xgboost as xgb
+        from sklearn.preprocessing import LabelEncoder
+    except ImportError as e:
+        raise SystemExit(f"--synthetic needs xgboost and lightgbm: {e}")
+
+    rng = np.random.default_rng(42)
+    X = rng.normal(size=(20000, features))
+    y = X[:, :5].sum(axis=1) * 1000 + rng.normal(size=len(X))
+    artifacts = {
+        'xgb_model': xgb.XGBRegressor(n_estimators=trees, max_depth=8).fit(X, y),
+        'lgb_model': lgb.LGBMRegressor(n_estimators=trees, num_leaves=63, verbose=-1).fit(X, y),
+        'ensemble_weights': {'xgb': 0.5, 'lgb': 0.5}
+    }
+    paths = {
+        'models': str(directory / "advanced_models.pkl"),
+        'encoders': str(directory / "label_encoders.pkl"),
+        'maps': str(directory / "categorical_maps.npz"),
+        'artifacts': str(directory / "artifacts")
+    }
+    with open(paths['models'], 'wb') as f:
+        pickle.dump(artifacts, f)
+
+    label_encoders = {'Type': LabelEncoder().fit(['A', 'B', 'C'])}
+    with open(paths['encoders'], 'wb') as f:
+        pickle.dump(label_encoders, f)
+    index = np.arange(46 * 100, dtype=np.int32).reshape(46, 100)
+    nominal = {'Store_Dept_ID': FrequencyTargetLookup(index, rng.random(index.size + 1), rng.random(index.size + 1))}
+    save_category_maps(nominal, np.array([0.0, 1e5, 2e5, 3e5]), paths['maps'])
+
+    encoders = CategoricalEncoders({name: LabelLookup.from_sklearn(enc) for name, enc in label_encoders.items()},
+                                   nominal, np.array([0.0, 1e5, 2e5, 3e5]))
+    export_artifacts(artifacts, [f"f{i}" for i in range(features)], encoders, paths['artifacts'])
+    return paths
+
+def measure(fmt: str, paths: dict, repeat: int) -> dict:
+    code = CHILD.format(src=str(PROJECT_ROOT / "src"), benchmarks=str(PROJECT_ROOT / "benchmarks"),
+                        paths=json.dumps(paths), loader=LOADERS[fmt])
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        if completed.returncode != 0:
+            return {'error': completed.stderr.strip().splitlines()[-1] if completed.stderr else 'failed'}
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    seconds = np.array([run['seconds'] for run in runs]) * 1000
+    return {
+        'load_ms_min': float(seconds.min()),
+        'load_ms_median': float(np.median(seconds)),
+        'rss_mb': float(np.median([run['rss_mb'] or 0.0 for run in runs]))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pickle vs native artifact loading")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--synthetic", action="store_true", help="Generate artifacts from random data")
+    parser.add_argument("--trees", type=int, default=500, help="Boosting rounds of the synthetic models")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.synthetic:
+            paths = synthetic_artifacts(Path(tmp), args.trees)
+        else:
+            paths = {
+                'models': str(ADVANCED_MODELS_FILE),
+                'encoders': str(LABEL_ENCODERS_FILE),
+                'maps': str(CATEGORY_MAPS_FILE),
+                'artifacts': str(ARTIFACTS_DIR)
+            }
+            if not (ARTIFACTS_DIR / "manifest.json").exists():
+                raise SystemExit("No native artifacts found. Run python src/serving/artifacts.py first "
+                                 "or pass --synthetic.")
+        results = {fmt: measure(fmt, paths, args.repeat) for fmt in LOADERS}
+
+    if 'load_ms_min' in results['pickle'] and 'load_ms_min' in results['native']:
+        results['speedup'] = results['pickle']['load_ms_min'] / results['native']['load_ms_min']
+    for fmt in LOADERS:
+        print(f"{fmt:>7}: {results[fmt]}")
+    if 'speedup' in results:
+        print(f"native loads {results['speedup']:.2f}x faster")
+
+    write_results("artifacts", results, vars(args), args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Bulk Scoring Format Benchmark
+=============================
+
+Compares the JSON ``/batch_predict`` path against the columnar
+``/batch_predict/columnar`` endpoint (NumPy ``.npz``, and Arrow IPC when
+``pyarrow`` is installed) for large batches. Each measurement covers the
+client-side encode, the request through an in-process ASGI transport and
+the response decode, so it reflects what a bulk client actually pays.
+
+Usage:
+    python benchmarks/bench_bulk.py [--rows 10000 100000] [--repeat 3] [--output FILE]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Callable, Dict, Tuple
+
+import httpx
+import numpy as np
+
+from common import PROJECT_ROOT, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from serving import columnar
+
+def make_columns(rows: int, rng: np.random.Generator) -> Dict[str, np.ndarray]:
+    """Random request columns in the columnar payload layout."""
+    return {
+        'store_id': rng.integers(1, 46, rows),
+        'dept_id': rng.integers(1, 100, rows),
+        'date': np.datetime64('2012-01-06') + 7 * rng.integers(0, 80, rows),
+        'temperature': rng.uniform(20, 95, rows),
+        'fuel_price': rng.uniform(2.5, 4.5, rows),
+        'cpi': rng.uniform(126, 230, rows),
+        'unemployment': rng.uniform(4, 14, rows),
+        **{f"markdown{i}": rng.uniform(0, 5000, rows) for i in range(1, 6)}
+    }
+
+def to_json_rows(columns: Dict[str, np.ndarray]):
+    """The same batch as a list of PredictionRequest dicts."""
+    dates = columns['date'].astype(str)
+    markdowns = np.column_stack([columns[f"markdown{i}"] for i in range(1, 6)]).tolist()
+    return [
+        {
+            'store_id': int(columns['store_id'][i]),
+            'dept_id': int(columns['dept_id'][i]),
+            'date': dates[i],
+            'temperature': float(columns['temperature'][i]),
+            'fuel_price': float(columns['fuel_price'][i]),
+            'cpi': float(columns['cpi'][i]),
+            'unemployment': float(columns['unemployment'][i]),
+            'markdowns': markdowns[i]
+        }
+        for i in range(len(dates))
+    ]
+
+async def timed(call: Callable, repeat: int) -> Tuple[float, Tuple[int, int]]:
+    """Best wall time of ``call`` and the (request, response) byte sizes it reports."""
+    best, sizes = float('inf'), (0, 0)
+    for _ in range(repeat):
+        start = time.perf_counter()
+        sizes = await call()
+        best = min(best, time.perf_counter() - start)
+    return best, sizes
+
+async def run(args) -> Dict:
+    import api_server
+    await api_server.load_models()
+    if not api_server.models:
+        raise SystemExit("No models loaded; the bulk benchmark needs trained models in results/models")
+
+    rng = np.random.default_rng(args.seed)
+    transport = httpx.ASGITransport(app=api_server.app)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=600.0) as client:
+        for rows in args.rows:
+            columns = make_columns(rows, rng)
+            json_rows = to_json_rows(columns)
+
+            async def json_call():
+                response = await client.post('/batch_predict', json=json_rows)
+                response.raise_for_status()
+                predictions = response.json()['predictions']
+                np.array([p['predicted_sales'] for p in predictions])
+                return len(response.request.content), len(response.content)
+
+            def columnar_call(content_type: str, write, read):
+                async def call():
+                    body = write(columns)
+                    response = await client.post('/batch_predict/columnar', content=body,
+                                                 headers={'Content-Type': content_type})
+                    response.raise_for_status()
+                    read(response.content)['predicted_sales']
+                    return len(body), len(response.content)
+                return call
+
+            calls = {'json': json_call, 'npz': columnar_call(columnar.NPZ, columnar.write_npz, columnar.read_npz)}
+            if columnar.arrow_available():
+                calls['arrow'] = columnar_call(columnar.ARROW_STREAM, columnar.write_arrow, columnar.read_arrow)
+
+            for name, call in calls.items():
+                await call()  # warm up
+                elapsed, (request_bytes, response_bytes) = await timed(call, args.repeat)
+                results[f"{name}/r{rows}"] = {
+                    'latency_ms': elapsed * 1000,
+                    'rows_per_s': rows / elapsed,
+                    'request_bytes': request_bytes,
+                    'response_bytes': response_bytes
+                }
+            for name in calls:
+                if name != 'json':
+                    results[f"{name}/r{rows}"]['speedup_vs_json'] = (
+                        results[f"json/r{rows}"]['latency_ms'] / results[f"{name}/r{rows}"]['latency_ms']
+                    )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON vs columnar bulk scoring")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    path = write_results('bulk', results, vars(args), args.output)
+    print(f"Results written to {path}")
+    for key, row in results.items():
+        print(f"{key:<14} {row['latency_ms']:10.1f}ms  {row['rows_per_s']:12.0f} rows/s  "
+              f"{row['request_bytes'] / 1e6:8.2f}MB in  {row['response_bytes'] / 1e6:8.2f}MB out")
+
+if __name__ == "__main__":
+    main()
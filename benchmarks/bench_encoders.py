@@ -0,0 +1,65 @@
+"""
+Encoder Microbenchmark
+======================
+
+Compares the sklearn ``LabelEncoder.transform`` path (row by row and
+whole batch) against the compiled ``LabelLookup`` arrays used at serving
+time, for the four ordinal features in ``label_encoders.pkl``.
+
+Usage:
+    python benchmarks/bench_encoders.py [--rows 10000] [--repeat 5] [--output FILE]
+"""
+
+import argparse
+import sys
+
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from common import PROJECT_ROOT, best_of, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from features.calendar import HOLIDAY_TYPES
+from features.encoders import LabelLookup, TEMP_BINS, UNEMPLOYMENT_BINS
+
+CLASSES = {
+    'Type': ['A', 'B', 'C'],
+    'Holiday_Type': HOLIDAY_TYPES,
+    'Temp_Category': TEMP_BINS[1] + ['nan'],
+    'Unemployment_Category': UNEMPLOYMENT_BINS[1] + ['nan']
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark categorical encoding paths")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    results = {}
+
+    for feature, classes in CLASSES.items():
+        encoder = LabelEncoder().fit(classes)
+        lookup = LabelLookup.from_sklearn(encoder)
+        values = rng.choice(classes, size=args.rows)
+
+        row_by_row = best_of(lambda: [encoder.transform([v])[0] for v in values], 1)
+        sklearn_batch = best_of(lambda: encoder.transform(values), args.repeat)
+        compiled = best_of(lambda: lookup.encode(values), args.repeat)
+        assert np.array_equal(encoder.transform(values), lookup.encode(values))
+
+        results[feature] = {
+            'sklearn_row_by_row_ms': row_by_row * 1000,
+            'sklearn_batch_ms': sklearn_batch * 1000,
+            'compiled_batch_ms': compiled * 1000,
+            'speedup_vs_row_by_row': row_by_row / compiled,
+            'speedup_vs_sklearn_batch': sklearn_batch / compiled
+        }
+
+    path = write_results('encoders', results, vars(args), args.output)
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Logging Overhead Benchmark
+==========================
+
+Measures the caller-side cost per request of the two per-prediction log
+lines in ``/predict`` (request received, prediction successful) under:
+
+- ``sync_fstring``: the previous setup, file handler written in the
+  request thread with pre-formatted f-strings
+- ``sync_lazy``: same handler with ``%``-style arguments
+- ``async``: ``QueueHandler``/``QueueListener`` with deferred formatting
+- ``async_sampled``: async plus the per-prediction ``SamplingFilter``
+
+For the async modes ``drain_us_per_request`` also includes the time the
+listener thread needs to write everything out.
+
+Usage:
+    python benchmarks/bench_logging.py [--requests 20000] [--json] [--output FILE]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import PROJECT_ROOT, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from utils.logger import SamplingFilter, setup_logger, shutdown_logging
+
+def run(logger, n: int, lazy: bool) -> float:
+    """Emit the /predict log lines for n requests; returns seconds spent."""
+    start = time.perf_counter()
+    for i in range(n):
+        store, dept, prediction = i % 45 + 1, i % 99 + 1, 1234.5678 + i
+        if lazy:
+            logger.info("Prediction request: Store %d, Dept %d, Date %s", store, dept, "2012-11-23")
+            logger.info("Prediction successful: %.2f", prediction)
+        else:
+            logger.info(f"Prediction request: Store {store}, Dept {dept}, Date 2012-11-23")
+            logger.info(f"Prediction successful: {prediction:.2f}")
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request logging overhead")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--json", action="store_true", help="Use the JSON formatter")
+    parser.add_argument("--sample-rate", type=float, default=0.1)
+    parser.add_argument("--max-per-second", type=float, default=50)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    scenarios = {
+        'sync_fstring': dict(async_mode=False, lazy=False, sampled=False),
+        'sync_lazy': dict(async_mode=False, lazy=True, sampled=False),
+        'async': dict(async_mode=True, lazy=True, sampled=False),
+        'async_sampled': dict(async_mode=True, lazy=True, sampled=True)
+    }
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, scenario in scenarios.items():
+            log_file = Path(tmp) / f"{name}.log"
+            logger = setup_logger(
+                f"bench.{name}", log_file=str(log_file), console_output=False,
+                async_mode=scenario['async_mode'], json_format=args.json,
+                queue_size=args.requests * 2 + 1
+            )
+            if scenario['sampled']:
+                logger.addFilter(SamplingFilter(args.sample_rate, args.max_per_second))
+
+            start = time.perf_counter()
+            elapsed = run(logger, args.requests, scenario['lazy'])
+            shutdown_logging()
+            drained = time.perf_counter() - start
+            for handler in logger.handlers:
+                handler.close()
+
+            with open(log_file) as f:
+                lines = sum(1 for _ in f)
+            results[name] = {
+                'overhead_us_per_request': elapsed / args.requests * 1e6,
+                'drain_us_per_request': drained / args.requests * 1e6,
+                'lines_written': lines
+            }
+
+    base = results['sync_fstring']['overhead_us_per_request']
+    for name in scenarios:
+        results[name]['speedup'] = base / results[name]['overhead_us_per_request']
+
+    path = write_results('logging', results, vars(args), args.output)
+    print(f"Results written to {path}")
+    for name, row in results.items():
+        print(f"{name:<14} {row['overhead_us_per_request']:8.2f}us/request  "
+              f"{row['lines_written']:7d} lines  x{row['speedup']:.1f}")
+
+if __name__ == "__main__":
+    main()
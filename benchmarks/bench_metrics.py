@@ -0,0 +1,66 @@
+"""
+Metrics Overhead Microbenchmark
+===============================
+
+Measures the cost of one stage timer (``registry.timer``) and one counter
+increment against an empty loop, with the registry enabled and disabled,
+so the instrumentation added to the serving hot path stays negligible
+relative to the per-request latency reported by ``bench_api.py``.
+
+Usage:
+    python benchmarks/bench_metrics.py [--iterations 100000] [--repeat 5] [--output FILE]
+"""
+
+import argparse
+import sys
+
+from common import PROJECT_ROOT, best_of, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from monitoring.metrics import MetricsRegistry
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark metric recording overhead")
+    parser.add_argument("--iterations", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    n = args.iterations
+    registry = MetricsRegistry()
+
+    def empty():
+        for _ in range(n):
+            pass
+
+    def timers():
+        for _ in range(n):
+            with registry.timer("stage_duration_seconds", stage="features", endpoint="predict"):
+                pass
+
+    def counters():
+        for _ in range(n):
+            registry.increment("predictions_total", model="weighted_ensemble")
+
+    baseline = best_of(empty, args.repeat)
+    results = {}
+    for enabled in (True, False):
+        registry.enabled = enabled
+        key = 'enabled' if enabled else 'disabled'
+        results[key] = {
+            'timer_overhead_us': (best_of(timers, args.repeat) - baseline) / n * 1e6,
+            'counter_overhead_us': (best_of(counters, args.repeat) - baseline) / n * 1e6
+        }
+
+    registry.enabled = True
+    results['render_prometheus_ms'] = best_of(registry.render_prometheus, args.repeat) * 1000
+
+    path = write_results('metrics', results, vars(args), args.output)
+    print(f"Results written to {path}")
+    for key in ('enabled', 'disabled'):
+        print(f"{key}: timer {results[key]['timer_overhead_us']:.2f}us, "
+              f"counter {results[key]['counter_overhead_us']:.2f}us")
+
+if __name__ == "__main__":
+    main()
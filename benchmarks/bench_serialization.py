@@ -0,0 +1,104 @@
+"""
+Batch Response Serialization Benchmark
+======================================
+
+Measures serialization CPU and bytes on the wire of a ``/batch_predict``
+response: the previous path (one pydantic ``PredictionResponse`` per row
+through FastAPI's ``jsonable_encoder`` and ``json.dumps``), the orjson row
+shape and the compact column shape, each uncompressed and gzipped at a
+few levels (and brotli when installed).
+
+Usage:
+    python benchmarks/bench_serialization.py [--rows 10000] [--repeat 5] [--output FILE]
+"""
+
+import argparse
+import gzip
+import sys
+from datetime import datetime
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from common import PROJECT_ROOT, best_of, write_results
+
+sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+from api_server import PredictionResponse
+from serving.responses import ORJSONResponse, batch_columns, batch_rows, orjson_available
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVELS = (1, 5, 9)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch response serialization and compression")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    n = args.rows
+    store_ids = rng.integers(1, 46, n).tolist()
+    dept_ids = rng.integers(1, 100, n).tolist()
+    dates = [str(day) for day in np.datetime64('2012-11-02') + 7 * rng.integers(0, 4, n)]
+    values = rng.gamma(2.0, 8000.0, n)
+    lower, upper = values * 0.9, values * 1.1
+    model_names = np.full(n, 'weighted_ensemble', dtype=object)
+    model_names[rng.random(n) < 0.3] = 'materialized_weighted_ensemble'
+    timestamp = datetime.now().isoformat()
+
+    def pydantic_json():
+        predictions = [
+            PredictionResponse(
+                store_id=store_ids[i], dept_id=dept_ids[i], date=dates[i], predicted_sales=float(values[i]),
+                confidence_interval=[float(lower[i]), float(upper[i])], model_used=model_names[i],
+                prediction_timestamp=timestamp
+            )
+            for i in range(n)
+        ]
+        content = {"predictions": predictions, "batch_size": n, "timestamp": timestamp}
+        return JSONResponse(jsonable_encoder(content)).body
+
+    def orjson_rows():
+        content = {"predictions": batch_rows(store_ids, dept_ids, dates, values, lower, upper, model_names,
+                                             timestamp),
+                   "batch_size": n, "timestamp": timestamp}
+        return ORJSONResponse(content).body
+
+    def orjson_columns():
+        content = {"batch_size": n, "timestamp": timestamp,
+                   **batch_columns(store_ids, dept_ids, dates, values, lower, upper, model_names)}
+        return ORJSONResponse(content).body
+
+    results = {}
+    for name, func in (('pydantic_rows', pydantic_json), ('orjson_rows', orjson_rows),
+                       ('orjson_columns', orjson_columns)):
+        body = func()
+        result = {
+            'serialize_ms': best_of(func, args.repeat) * 1000,
+            'bytes': len(body),
+            'bytes_per_row': len(body) / n
+        }
+        for level in GZIP_LEVELS:
+            result[f'gzip{level}_bytes'] = len(gzip.compress(body, level))
+            result[f'gzip{level}_ms'] = best_of(lambda: gzip.compress(body, level), args.repeat) * 1000
+        if brotli is not None:
+            result['brotli4_bytes'] = len(brotli.compress(body, quality=4))
+            result['brotli4_ms'] = best_of(lambda: brotli.compress(body, quality=4), args.repeat) * 1000
+        results[name] = result
+        print(f"{name:15s} {result['serialize_ms']:8.1f} ms {result['bytes']:>10,} B "
+              f"gzip{GZIP_LEVELS[1]} {result[f'gzip{GZIP_LEVELS[1]}_bytes']:>9,} B "
+              f"in {result[f'gzip{GZIP_LEVELS[1]}_ms']:.1f} ms")
+
+    params = {**vars(args), 'orjson': orjson_available(), 'brotli': brotli is not None}
+    path = write_results('serialization', results, params, args.output)
+    print(f"Results written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Every benchmark writes a JSON document with the same envelope (run
+metadata plus a ``results`` mapping) so that ``compare.py`` can diff any
+two runs.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).parent.parent
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+def best_of(func: Callable, repeat: int) -> float:
+    """Return the fastest wall time of ``repeat`` runs in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def summarize_latencies(latencies: Iterable[float], wall_time: float) -> Dict[str, float]:
+    """
+    Summarize per-request latencies (seconds) into milliseconds and throughput.
+
+    Args:
+        latencies: Latency of each request
+        wall_time: Total elapsed time for the whole run
+
+    Returns:
+        Dictionary with count, mean, p50/p95/p99, max and requests_per_s
+    """
+    values = np.asarray(list(latencies), dtype=np.float64) * 1000
+    if len(values) == 0:
+        return {'count': 0}
+    return {
+        'count': int(len(values)),
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+        'max_ms': float(values.max()),
+        'requests_per_s': float(len(values) / wall_time) if wall_time > 0 else 0.0
+    }
+
+def rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Current resident set size of a process in MB (Linux ``/proc`` only)."""
+    status = Path(f"/proc/{pid or os.getpid()}/status")
+    if not status.exists():
+        return None
+    for line in status.read_text().splitlines():
+        if line.startswith("VmRSS:"):
+            return int(line.split()[1]) / 1024
+    return None
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def write_results(name: str, results: Dict, params: Dict, output: Optional[Path] = None) -> Path:
+    """
+    Write a benchmark run to JSON.
+
+    Args:
+        name: Benchmark name, used in the default file name
+        results: Measurements
+        params: Parameters the run was invoked with
+        output: Explicit output path (defaults to benchmarks/results/)
+
+    Returns:
+        Path of the written file
+    """
+    timestamp = datetime.now()
+    document = {
+        'benchmark': name,
+        'timestamp': timestamp.isoformat(),
+        'git_revision': git_revision(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'params': params,
+        'results': results
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"{name}_{timestamp.strftime('%Y%m%d_%H%M%S')}.json"
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(document, f, indent=2)
+    return output
@@ -0,0 +1,77 @@
+"""
+Benchmark Comparison
+====================
+
+Compares two benchmark JSON files and flags regressions. Latency, memory
+and startup metrics regress when they grow; throughput metrics regress
+when they shrink. Exits with status 1 if any metric regressed by more
+than the threshold, so it can gate a deployment.
+
+Usage:
+    python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Tuple
+
+HIGHER_IS_BETTER = ('requests_per_s', 'rows_per_s', 'speedup')
+LOWER_IS_BETTER = ('_ms', 'rss_mb', 'startup_s', '_bytes', 'overhead')
+
+def flatten(node, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield (dotted_path, value) for every numeric leaf."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+def direction(metric: str) -> int:
+    """+1 if higher is better, -1 if lower is better, 0 if not compared."""
+    name = metric.rsplit('.', 1)[-1]
+    if any(token in name for token in HIGHER_IS_BETTER):
+        return 1
+    if any(token in name for token in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+def compare(baseline: Dict, candidate: Dict, threshold: float):
+    """Return rows of (metric, baseline, candidate, relative_change, regressed)."""
+    base = dict(flatten(baseline.get('results', {})))
+    cand = dict(flatten(candidate.get('results', {})))
+    rows = []
+    for metric in sorted(base.keys() & cand.keys()):
+        sign = direction(metric)
+        if sign == 0 or base[metric] == 0:
+            continue
+        change = (cand[metric] - base[metric]) / abs(base[metric])
+        rows.append((metric, base[metric], cand[metric], change, sign * change < -threshold))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark runs")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate, args.threshold)
+    width = max((len(row[0]) for row in rows), default=10)
+    for metric, base, cand, change, regressed in rows:
+        flag = "REGRESSION" if regressed else ""
+        print(f"{metric:<{width}}  {base:>12.3f}  {cand:>12.3f}  {change:>+8.1%}  {flag}")
+
+    regressions = [row for row in rows if row[4]]
+    print(f"\n{len(rows)} metrics compared, {len(regressions)} regressions "
+          f"(threshold {args.threshold:.0%})")
+    sys.exit(1 if regressions else 0)
+
+if __name__ == "__main__":
+    main()
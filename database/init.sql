@@ -1,9 +1,10 @@
 -- Initialize Walmart Forecasting Database
 -- This script creates the necessary tables for the application
 
--- Create predictions table
+-- Create predictions table, range partitioned by month of created_at
+-- (partitions are maintained by src/training/maintain_predictions.py)
 CREATE TABLE IF NOT EXISTS predictions (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     store_id INTEGER NOT NULL,
     dept_id INTEGER NOT NULL,
     prediction_date DATE NOT NULL,
@@ -12,8 +13,42 @@ CREATE TABLE IF NOT EXISTS predictions (
     confidence_upper DECIMAL(12, 2),
     model_used VARCHAR(100),
     input_features JSONB,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+    PRIMARY KEY (id, created_at),
     UNIQUE(store_id, dept_id, prediction_date, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Rows outside the prepared months
+CREATE TABLE IF NOT EXISTS predictions_default PARTITION OF predictions DEFAULT;
+
+-- Partitions for the current and next two months
+DO $$
+DECLARE
+    month DATE;
+BEGIN
+    FOR i IN 0..2 LOOP
+        month := (date_trunc('month', LOCALTIMESTAMP) + make_interval(months => i))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF predictions FOR VALUES FROM (%L) TO (%L)',
+            'predictions_p' || to_char(month, 'YYYY_MM'), month, (month + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+END $$;
+
+-- Create prediction rollups table (aggregates of expired partitions)
+CREATE TABLE IF NOT EXISTS prediction_rollups (
+    month DATE NOT NULL,
+    store_id INTEGER NOT NULL,
+    dept_id INTEGER NOT NULL,
+    prediction_date DATE NOT NULL,
+    model_used VARCHAR(100) NOT NULL,
+    predictions INTEGER NOT NULL,
+    mean_predicted_sales DECIMAL(12, 2) NOT NULL,
+    min_predicted_sales DECIMAL(12, 2),
+    max_predicted_sales DECIMAL(12, 2),
+    mean_confidence_lower DECIMAL(12, 2),
+    mean_confidence_upper DECIMAL(12, 2),
+    PRIMARY KEY (month, store_id, dept_id, prediction_date, model_used)
 );
 
 -- Create user sessions table (for future authentication)
@@ -52,6 +87,7 @@ CREATE TABLE IF NOT EXISTS batch_jobs (
 -- Create indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_predictions_store_dept_date ON predictions(store_id, dept_id, prediction_date);
 CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions(created_at);
+CREATE INDEX IF NOT EXISTS idx_prediction_rollups_store_dept ON prediction_rollups(store_id, dept_id, month);
 CREATE INDEX IF NOT EXISTS idx_user_sessions_session_id ON user_sessions(session_id);
 CREATE INDEX IF NOT EXISTS idx_system_metrics_name_time ON system_metrics(metric_name, recorded_at);
 CREATE INDEX IF NOT EXISTS idx_batch_jobs_status ON batch_jobs(status);
@@ -62,16 +98,17 @@ INSERT INTO system_metrics (metric_name, metric_value, metric_data) VALUES
 ('models_loaded', 6, '{"model_types": ["weighted_ensemble", "xgboost", "lightgbm", "random_forest", "linear_regression", "prophet"]}'),
 ('features_available', 89, '{"feature_engineering": "complete", "preprocessing": "ready"}');
 
--- Create a view for recent predictions
+-- Create a view for recent predictions (LOCALTIMESTAMP matches created_at's type, so older partitions are pruned)
 CREATE OR REPLACE VIEW recent_predictions AS
 SELECT 
     p.*,
-    EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - p.created_at))/3600 as hours_ago
+    EXTRACT(EPOCH FROM (LOCALTIMESTAMP - p.created_at))/3600 as hours_ago
 FROM predictions p
-WHERE p.created_at >= CURRENT_TIMESTAMP - INTERVAL '7 days'
+WHERE p.created_at >= LOCALTIMESTAMP - INTERVAL '7 days'
 ORDER BY p.created_at DESC;
 
 COMMENT ON TABLE predictions IS 'Stores all sales predictions made by the system';
+COMMENT ON TABLE prediction_rollups IS 'Monthly aggregates of predictions past the retention window';
 COMMENT ON TABLE user_sessions IS 'Manages user sessions and authentication data';
 COMMENT ON TABLE system_metrics IS 'Tracks system performance and health metrics';
 COMMENT ON TABLE batch_jobs IS 'Manages batch prediction jobs and their status';
\ No newline at end of file
@@ -3,25 +3,61 @@ Production API server for Walmart Sales Forecasting.
 FastAPI-based REST API for serving predictions.
 """
 
+import asyncio
+import math
 import sys
+import time
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import pandas as pd
 import joblib
 import numpy as np
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 import json
 
-from utils.config import PROJECT_ROOT, MODELS_DIR, PROCESSED_DATA_DIR
-from utils.logger import get_project_logger
+from utils.config import (
+    PROJECT_ROOT, MODELS_DIR, PROCESSED_DATA_DIR, PREDICTION_INTERVALS_FILE, CATEGORY_MAPS_FILE,
+    FEATURES_FILE, STORES_FILE, MONITORING_CONFIG, PROFILING_CONFIG, ADMIN_TOKEN, STREAMING_CONFIG,
+    HIERARCHY_FILE, SCENARIO_CONFIG, DRIFT_CONFIG, DRIFT_REFERENCE_FILE, PROCESSED_TRAIN_FILE,
+    CANDIDATE_MODELS_FILE, SHADOW_CONFIG, ARTIFACTS_DIR, BASELINE_FILE, TRAIN_FILE, LATENCY_CONFIG,
+    FORECASTS_DIR, MATERIALIZE_CONFIG, RATE_LIMIT_CONFIG, ADMISSION_CONFIG, COMPRESSION_CONFIG, SERVING_MODEL
+)
+from utils.logger import get_project_logger, get_sampled_logger
+from features.builder import FeatureBuilder
+from features.exogenous import ExogenousIndex, MARKDOWN_COLUMNS
+from features.calendar import CalendarTable, week_numbers
+from features.encoders import CategoricalEncoders
+from serving.intervals import IntervalTable, holdout_scales
+from serving.baseline import BaselineTable
+from serving.materialized import ForecastStore
+from serving.hierarchy import Hierarchy, HierarchyModel, METHODS as RECONCILIATION_METHODS
+from serving.scenarios import Perturbation, Scenario, ScenarioEngine
+from serving.shadow import ShadowEvaluator
+from serving.artifacts import load_artifacts, pickled_models, MANIFEST as ARTIFACT_MANIFEST
+from serving.budget import DeadlineMiddleware, LatencyEstimator, request_deadline, remaining_seconds
+from serving.admission import (
+    AdmissionController, AdmissionRejected, RateLimitMiddleware, RedisTokenBucketLimiter, TokenBucketLimiter,
+    redis_available
+)
+from serving.responses import ORJSONResponse, batch_columns, batch_rows
+from serving import columnar, streaming
+from monitoring.metrics import registry as metrics, TimingMiddleware
+from monitoring.snapshots import MetricsFlusher
+from monitoring.profiling import RequestProfiler, profiled_in_thread
+from monitoring.drift import DriftMonitor, DriftReference, DRIFT_FEATURES, PSI_THRESHOLDS
 
 # Initialize logger
 logger = get_project_logger("api_server")
+# Per-prediction records are sampled and rate limited
+prediction_logger = get_sampled_logger("predictions")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -39,10 +75,81 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress responses above the size threshold for clients sending Accept-Encoding: gzip
+if COMPRESSION_CONFIG["enabled"]:
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_CONFIG["minimum_size"],
+                       compresslevel=COMPRESSION_CONFIG["level"])
+
+# Hot-path timing metrics, exposed on /metrics
+metrics.enabled = MONITORING_CONFIG["enabled"]
+metrics.describe("request_duration_seconds", "End-to-end request latency per route")
+metrics.describe("stage_duration_seconds", "Latency of each request processing stage")
+metrics.describe("predictions_total", "Rows scored per model")
+metrics.describe("model_failures_total", "Batches answered by the seasonal baseline after a model error")
+metrics.describe("degraded_requests_total", "Batches served by a cheaper model to meet the latency budget")
+metrics.describe("rate_limited_total", "Requests rejected by the per-client rate limits")
+metrics.describe("admission_rejected_total", "Requests rejected by admission control")
+
+# Per-client rate limits, inside the timing middleware so 429s show up in the latency metrics
+if RATE_LIMIT_CONFIG["enabled"]:
+    if RATE_LIMIT_CONFIG["backend"] == "redis" and redis_available():
+        rate_limiter = RedisTokenBucketLimiter(RATE_LIMIT_CONFIG["redis_url"])
+    else:
+        if RATE_LIMIT_CONFIG["backend"] == "redis":
+            logger.warning("redis package not installed, rate limiting per worker")
+        rate_limiter = TokenBucketLimiter()
+    app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, limits=RATE_LIMIT_CONFIG["limits"],
+                       client_header=RATE_LIMIT_CONFIG["client_header"], registry=metrics)
+app.add_middleware(TimingMiddleware, registry=metrics)
+metrics_flusher = MetricsFlusher(metrics, MONITORING_CONFIG["flush_interval_s"])
+
+# Latency budgets (X-Deadline-Ms or LATENCY_BUDGET_MS), starting the clock before any queueing in the app
+app.add_middleware(DeadlineMiddleware, default_ms=LATENCY_CONFIG["budget_ms"],
+                   max_ms=LATENCY_CONFIG["max_budget_ms"])
+latency_estimator = LatencyEstimator(LATENCY_CONFIG["decay"], LATENCY_CONFIG["safety_margin"])
+
+# Cost-based admission with interactive-first queuing
+admission = AdmissionController(
+    ADMISSION_CONFIG["capacity"], ADMISSION_CONFIG["interactive_cost"], ADMISSION_CONFIG["batch_share"],
+    ADMISSION_CONFIG["max_queue"], ADMISSION_CONFIG["max_wait_s"]
+)
+
+# Opt-in cProfile sampling of prediction handlers, see /admin/profiling
+profiler = RequestProfiler(**PROFILING_CONFIG)
+
 # Global variables for loaded models
 models = {}
 feature_list = []
-label_encoders = {}
+label_encoders = CategoricalEncoders({})
+calendar_table = CalendarTable()
+feature_builder = FeatureBuilder([], calendar=calendar_table)
+scenario_engine = ScenarioEngine(feature_builder)
+exogenous_index = None
+interval_table = None
+interval_scales = {}
+baseline_table = None
+forecast_store = None
+hierarchy_model = None
+drift_monitor = None
+candidate_models = {}
+shadow_evaluator = None
+
+# Reported as model_used when the seasonal baseline answers
+BASELINE_MODEL = "seasonal_baseline"
+
+# Response layouts of /batch_predict
+BATCH_SHAPES = ("rows", "columns")
+
+def drift_snapshot():
+    """Drift scores for the system_metrics snapshots (decays the live histograms)."""
+    return drift_monitor.snapshot() if drift_monitor is not None else []
+
+def shadow_snapshot():
+    """Candidate disagreement for the system_metrics snapshots."""
+    return shadow_evaluator.snapshot() if shadow_evaluator is not None else []
+
+metrics_flusher.add_source(drift_snapshot)
+metrics_flusher.add_source(shadow_snapshot)
 
 class PredictionRequest(BaseModel):
     """Request model for sales prediction."""
@@ -62,6 +169,70 @@ class PredictionResponse(BaseModel):
     date: str
     predicted_sales: float
     confidence_interval: List[float]
+    interval_calibrated: bool  # False when the interval table was not calibrated on model_used
+    model_used: str
+    prediction_timestamp: str
+
+class HierarchyRequest(BaseModel):
+    """Request model for a reconciled store/department hierarchy forecast."""
+    date: str  # YYYY-MM-DD format
+    method: str = "bottom_up"  # bottom_up or mint_shrink
+    stores: Optional[List[int]] = None  # restrict the returned stores
+    include_departments: bool = True
+
+class DepartmentForecast(BaseModel):
+    dept_id: int
+    predicted_sales: float
+
+class StoreForecast(BaseModel):
+    store_id: int
+    predicted_sales: float
+    departments: Optional[List[DepartmentForecast]] = None
+
+class HierarchyResponse(BaseModel):
+    """Coherent chain, store and department forecasts for one week."""
+    date: str
+    method: str
+    total: float
+    stores: List[StoreForecast]
+    model_used: str
+    prediction_timestamp: str
+
+class PerturbationSpec(BaseModel):
+    column: str  # Temperature, Fuel_Price, CPI, Unemployment, MarkDown1-5 or MarkDowns
+    op: str = "set"  # set, add or scale
+    value: float
+
+class ScenarioSpec(BaseModel):
+    name: str
+    perturbations: List[PerturbationSpec]
+    stores: Optional[List[int]] = None  # apply only to these stores
+
+class ScenarioRequest(BaseModel):
+    """Request model for what-if scenarios over one week."""
+    date: str  # YYYY-MM-DD format
+    scenarios: List[ScenarioSpec]
+    stores: Optional[List[int]] = None  # restrict the forecast to these stores
+    include_stores: bool = False
+
+class StoreDelta(BaseModel):
+    store_id: int
+    predicted_sales: float
+    delta: float
+
+class ScenarioResult(BaseModel):
+    name: str
+    total: float
+    delta: float
+    delta_pct: float
+    stores: Optional[List[StoreDelta]] = None
+
+class ScenarioResponse(BaseModel):
+    """Base and per-scenario totals for one week."""
+    date: str
+    series: int
+    base_total: float
+    scenarios: List[ScenarioResult]
     model_used: str
     prediction_timestamp: str
 
@@ -74,48 +245,224 @@ async def load_models():
         # Load best model
         global models, feature_list, label_encoders
         
+        # Native-format artifacts (python src/serving/artifacts.py) take precedence over the pickles
+        artifacts = None
+        if (ARTIFACTS_DIR / ARTIFACT_MANIFEST).exists():
+            try:
+                artifacts = load_artifacts(ARTIFACTS_DIR)
+                models, feature_list, label_encoders = artifacts.models, artifacts.feature_list, artifacts.encoders
+                logger.info(f"Loaded {len(models)} models, {len(feature_list)} features and "
+                            f"{len(label_encoders)} label encoders from {ARTIFACTS_DIR}")
+            except Exception as e:
+                logger.warning(f"Could not load native artifacts, trying the pickles: {e}")
+                artifacts = None
+        
         models_path = MODELS_DIR / "advanced_models.pkl"
-        if models_path.exists():
+        if artifacts is None and models_path.exists():
             try:
                 with open(models_path, 'rb') as f:
-                    models = joblib.load(f)
-                logger.info(f"Loaded {len(models)} models")
+                    models = pickled_models(joblib.load(f))
+                logger.info(f"Loaded {len(models)} models: {', '.join(models)}")
             except Exception as e:
                 logger.warning(f"Could not load models due to compatibility issue: {e}")
-                logger.info("Using fallback prediction algorithm")
+                logger.warning("Export native artifacts with python src/serving/artifacts.py to avoid "
+                               "pickle incompatibilities; serving the seasonal baseline")
                 models = None
         
         # Load feature list
         feature_list_path = PROCESSED_DATA_DIR / "feature_list.txt"
-        if feature_list_path.exists():
+        if artifacts is None and feature_list_path.exists():
             with open(feature_list_path, 'r') as f:
                 feature_list = [line.strip() for line in f.readlines()]
             logger.info(f"Loaded {len(feature_list)} features")
-        else:
+        elif artifacts is None:
             # Fallback feature list
             feature_list = ['Store', 'Dept', 'Temperature', 'Fuel_Price', 'CPI', 'Unemployment', 'IsHoliday']
             logger.info("Using fallback feature list")
         
-        # Load label encoders
+        # Load label encoders and compile them into array lookups
         encoders_path = PROCESSED_DATA_DIR / "label_encoders.pkl"
-        if encoders_path.exists():
+        if artifacts is None:
             try:
-                with open(encoders_path, 'rb') as f:
-                    label_encoders = joblib.load(f)
-                logger.info("Loaded label encoders")
+                label_encoders = CategoricalEncoders.load(encoders_path, CATEGORY_MAPS_FILE)
+                logger.info(f"Compiled {len(label_encoders)} label encoders, "
+                            f"{len(label_encoders.nominal)} interaction maps")
             except Exception as e:
                 logger.warning(f"Could not load label encoders due to compatibility issue: {e}")
                 logger.info("Using fallback encoders")
-                label_encoders = {}
+                label_encoders = CategoricalEncoders({})
+        
+        # Index features.csv/stores.csv for filling omitted exogenous fields
+        global exogenous_index
+        if FEATURES_FILE.exists() and STORES_FILE.exists():
+            try:
+                exogenous_index = ExogenousIndex.from_csv(FEATURES_FILE, STORES_FILE)
+                logger.info(f"Indexed exogenous features: {exogenous_index.max_store} stores x "
+                            f"{exogenous_index.n_weeks} weeks")
+            except Exception as e:
+                logger.warning(f"Could not index exogenous features: {e}")
+                exogenous_index = None
+        
+        global feature_builder, scenario_engine
+        try:
+            feature_builder = FeatureBuilder(feature_list, label_encoders, exogenous_index, calendar_table)
+        except ValueError as e:
+            # The models would see NaN for their interaction encodings
+            logger.error(f"Cannot build model features: {e}. Serving the seasonal baseline instead of the models")
+            models = {}
+            feature_builder = FeatureBuilder([], label_encoders, exogenous_index, calendar_table)
+        scenario_engine = ScenarioEngine(feature_builder)
+        
+        # Seed the per-model latency estimates used for budget planning
+        if models:
+            calibrate_latency()
+        
+        # Load calibrated prediction intervals
+        global interval_table, interval_scales
+        if PREDICTION_INTERVALS_FILE.exists():
+            try:
+                interval_table = IntervalTable.load(PREDICTION_INTERVALS_FILE)
+                logger.info(f"Loaded prediction intervals ({interval_table.coverage:.0%} coverage, "
+                            f"calibrated on {interval_table.model})")
+                if artifacts is not None:
+                    interval_scales = holdout_scales(artifacts.manifest['models'], interval_table.model)
+            except Exception as e:
+                logger.warning(f"Could not load prediction intervals: {e}")
+                interval_table = None
         else:
-            label_encoders = {}
+            logger.info("No calibrated intervals found, using fixed +/-10% bands")
+        
+        # Seasonal baseline served when the models are unavailable
+        global baseline_table
+        try:
+            if BASELINE_FILE.exists():
+                try:
+                    baseline_table = BaselineTable.load(BASELINE_FILE)
+                except ValueError as e:
+                    logger.warning(f"{e}; averaging {TRAIN_FILE.name} instead")
+            if baseline_table is None and TRAIN_FILE.exists():
+                train_df = pd.read_csv(TRAIN_FILE, usecols=['Store', 'Dept', 'Date', 'Weekly_Sales'])
+                baseline_table = BaselineTable.from_history(
+                    train_df['Store'], train_df['Dept'], train_df['Date'].to_numpy(dtype='datetime64[D]'),
+                    train_df['Weekly_Sales']
+                )
+            if baseline_table is not None:
+                logger.info(f"Loaded seasonal baseline for {baseline_table.max_store} stores x "
+                            f"{baseline_table.max_dept} departments")
+        except Exception as e:
+            logger.warning(f"Could not load seasonal baseline: {e}")
+            baseline_table = None
+        
+        # Materialized weekly forecasts, picked up again whenever the job writes a new run
+        global forecast_store
+        if MATERIALIZE_CONFIG["enabled"]:
+            try:
+                forecast_store = ForecastStore(FORECASTS_DIR, MATERIALIZE_CONFIG["reload_interval_s"])
+                if forecast_store.n_weeks:
+                    first_week = forecast_store.manifest['first_week_ending']
+                    logger.info(f"Serving materialized {forecast_store.model} forecasts for "
+                                f"{forecast_store.n_weeks} weeks from {first_week}")
+            except Exception as e:
+                logger.warning(f"Could not load materialized forecasts: {e}")
+                forecast_store = None
+        
+        # Store/department hierarchy for reconciled totals
+        global hierarchy_model
+        try:
+            if HIERARCHY_FILE.exists():
+                hierarchy_model = HierarchyModel.load(HIERARCHY_FILE)
+            elif 'Store_Dept_ID' in label_encoders.nominal:
+                hierarchy_model = HierarchyModel(
+                    Hierarchy.from_index(label_encoders.nominal['Store_Dept_ID'].index)
+                )
+            if hierarchy_model is not None:
+                logger.info(f"Loaded hierarchy: {hierarchy_model.hierarchy.n_bottom} store/dept series"
+                            f"{', MinT-shrink available' if hierarchy_model.supports_mint else ''}")
+        except Exception as e:
+            logger.warning(f"Could not load hierarchy: {e}")
+            hierarchy_model = None
+        
+        # Candidate models for shadow and canary evaluation
+        global candidate_models, shadow_evaluator
+        if CANDIDATE_MODELS_FILE.exists():
+            try:
+                with open(CANDIDATE_MODELS_FILE, 'rb') as f:
+                    candidate_models = pickled_models(joblib.load(f))
+                logger.info(f"Loaded {len(candidate_models)} candidate models: {', '.join(candidate_models)}")
+            except Exception as e:
+                logger.warning(f"Could not load candidate models: {e}")
+                candidate_models = {}
+        if SHADOW_CONFIG["model"] in candidate_models:
+            shadow_evaluator = ShadowEvaluator(
+                SHADOW_CONFIG["model"], candidate_models[SHADOW_CONFIG["model"]],
+                SHADOW_CONFIG["sample_rate"], SHADOW_CONFIG["canary_percent"],
+                SHADOW_CONFIG["max_pending"], SHADOW_CONFIG["workers"]
+            )
+            logger.info(f"Shadowing candidate '{shadow_evaluator.name}' on {shadow_evaluator.sample_rate:.0%} "
+                        f"of batches, canary {shadow_evaluator.canary_percent:g}%")
+        
+        # Reference distributions for input drift monitoring
+        global drift_monitor
+        if DRIFT_CONFIG["enabled"]:
+            try:
+                reference = None
+                if DRIFT_REFERENCE_FILE.exists():
+                    reference = DriftReference.load(DRIFT_REFERENCE_FILE)
+                elif PROCESSED_TRAIN_FILE.exists():
+                    train_df = pd.read_csv(PROCESSED_TRAIN_FILE, usecols=lambda c: c in DRIFT_FEATURES)
+                    reference = DriftReference.from_frame(train_df, DRIFT_FEATURES, DRIFT_CONFIG["bins"])
+                if reference is not None and reference.features:
+                    drift_monitor = DriftMonitor(
+                        reference, DRIFT_CONFIG["decay"], DRIFT_CONFIG["decay_interval_s"],
+                        DRIFT_CONFIG["min_observations"]
+                    )
+                    logger.info(f"Monitoring drift of {len(drift_monitor.features)} features "
+                                f"against {reference.rows} training rows")
+            except Exception as e:
+                logger.warning(f"Could not load drift reference: {e}")
+                drift_monitor = None
         
         logger.info("Model loading completed successfully")
         
     except Exception as e:
         logger.error(f"Error loading models: {e}")
         # Don't raise the exception, just log it and continue with fallback
-        logger.info("Continuing with fallback prediction mode")
+        logger.info("Continuing with the seasonal baseline")
+
+def calibrate_latency(sizes=(1, 256)):
+    """Time every loaded model on dummy batches so budget planning starts with estimates."""
+    for name, model in models.items():
+        if not hasattr(model, 'predict'):
+            continue
+        try:
+            model.predict(np.zeros((1, len(feature_list))))  # warm-up
+            for rows in sizes:
+                X = np.zeros((rows, len(feature_list)))
+                start = time.perf_counter()
+                model.predict(X)
+                latency_estimator.observe(name, rows, time.perf_counter() - start)
+        except Exception as e:
+            logger.warning(f"Could not time model {name}: {e}")
+
+@app.on_event("startup")
+async def start_metrics_flusher():
+    """Start periodic metric snapshots into system_metrics."""
+    metrics_flusher.start()
+
+@app.on_event("shutdown")
+async def stop_metrics_flusher():
+    """Write a final metric snapshot on shutdown."""
+    await metrics_flusher.stop()
+
+@app.on_event("shutdown")
+async def stop_shadow_evaluator():
+    """Stop background candidate scoring, dropping queued shadow batches."""
+    if shadow_evaluator is not None:
+        shadow_evaluator.shutdown()
+
+def stage_timer(stage: str, endpoint: str, **labels):
+    """Time one processing stage of a request."""
+    return metrics.timer("stage_duration_seconds", stage=stage, endpoint=endpoint, **labels)
 
 @app.get("/")
 async def root():
@@ -136,65 +483,321 @@ async def health_check():
         "models": {
             "total_loaded": len(models) if models else 0,
             "available_models": list(models.keys()) if models else [],
-            "fallback_mode": models is None
+            "fallback_mode": not models,
+            "baseline_loaded": baseline_table is not None,
+            "latency_estimates_ms_per_1000_rows": latency_estimator.snapshot()
         },
         "features": {
             "total_features": len(feature_list),
-            "encoders_loaded": len(label_encoders)
+            "encoders_loaded": len(label_encoders),
+            "exogenous_index_loaded": exogenous_index is not None
+        },
+        "intervals": {
+            "calibrated": interval_table is not None,
+            "coverage": interval_table.coverage if interval_table is not None else None,
+            "calibrated_model": interval_table.model if interval_table is not None else None,
+            "widened_models": interval_scales
+        },
+        "materialized": forecast_store.status() if forecast_store is not None else None,
+        "hierarchy": {
+            "series": hierarchy_model.hierarchy.n_bottom if hierarchy_model is not None else 0,
+            "mint_shrink": hierarchy_model is not None and hierarchy_model.supports_mint
+        },
+        "admission": admission.status(),
+        "drift": {
+            "monitored_features": len(drift_monitor.features) if drift_monitor is not None else 0
         }
     }
 
-def fallback_prediction(request):
-    """Simple fallback prediction when models can't be loaded"""
-    # Simple prediction algorithm for testing
-    base_sales = 1000
-    
-    # Adjust based on features
-    if request.is_holiday:
-        base_sales *= 1.5
-    
-    # Temperature effect
-    if 60 <= request.temperature <= 80:
-        base_sales *= 1.2
-    elif request.temperature < 32 or request.temperature > 90:
-        base_sales *= 0.8
-    
-    # Economic factors
-    if request.unemployment > 8:
-        base_sales *= 0.9
-    
-    if request.fuel_price > 3.0:
-        base_sales *= 0.95
-    
-    # Store/Department effect
-    base_sales *= (1 + (request.store_id % 10) * 0.05)
-    base_sales *= (1 + (request.dept_id % 5) * 0.03)
-    
-    # Add some randomness for realism
-    import random
-    prediction = base_sales * (0.9 + random.random() * 0.2)
+def baseline_predict(batch: Dict[str, np.ndarray], endpoint: str) -> np.ndarray:
+    """Score a column batch with the seasonal baseline when no model can answer."""
+    if baseline_table is None:
+        raise HTTPException(status_code=503, detail="Models not loaded and no seasonal baseline available")
+    with stage_timer("model_predict", endpoint, model=BASELINE_MODEL):
+        values = baseline_table.predict(batch['Store'], batch['Dept'], batch['Date'])
+    metrics.increment("predictions_total", len(values), model=BASELINE_MODEL)
+    return values
+
+def model_predict(model_name: str, model, X: np.ndarray, batch: Dict[str, np.ndarray], endpoint: str):
+    """
+    Score a feature matrix, answering from the seasonal baseline if the model fails.
+
+    Returns:
+        (model_name, predictions) of whichever model produced the predictions
+    """
+    try:
+        start = time.perf_counter()
+        with stage_timer("model_predict", endpoint, model=model_name):
+            values = np.asarray(model.predict(X), dtype=np.float64)
+        latency_estimator.observe(model_name, len(X), time.perf_counter() - start)
+    except Exception as e:
+        if baseline_table is None:
+            raise
+        logger.warning("Model %s failed, serving the seasonal baseline: %s", model_name, e)
+        metrics.increment("model_failures_total", model=model_name)
+        return BASELINE_MODEL, baseline_predict(batch, endpoint)
+    metrics.increment("predictions_total", len(values), model=model_name)
+    return model_name, values
+
+def interval_calibration(model_name: Optional[str]):
+    """
+    Offset scale for the intervals of ``model_name`` and whether the table was calibrated on it.
+
+    Materialized forecasts count as the model that produced them. Models
+    with a measured holdout error (distilled students) are widened by it;
+    the table is still not calibrated on them. Any other model gets the
+    table as is and is reported as uncalibrated.
+
+    Returns:
+        (scale, calibrated)
+    """
+    if interval_table is None or model_name is None:
+        return 1.0, False
+    if model_name.startswith("materialized_"):
+        model_name = model_name[len("materialized_"):]
+    if model_name == interval_table.model:
+        return 1.0, True
+    return interval_scales.get(model_name, 1.0), False
+
+def intervals_calibrated(model_names) -> np.ndarray:
+    """Per-row ``interval_calibrated`` flags for the model names of a batch."""
+    calibrated = {name: interval_calibration(name)[1] for name in set(model_names)}
+    return np.array([calibrated[name] for name in model_names], dtype=bool)
+
+def compute_confidence_interval(prediction: float, store_id: int, dept_id: int,
+                                prediction_date: datetime, model_name: Optional[str]) -> List[float]:
+    """Look up the calibrated interval, or fall back to a fixed +/-10% band."""
+    if interval_table is None:
+        return [float(prediction * 0.9), float(prediction * 1.1)]
+    is_holiday = calendar_table.holiday_flags([np.datetime64(prediction_date.date())])[0]
+    scale, _ = interval_calibration(model_name)
+    return interval_table.interval(prediction, store_id, dept_id, is_holiday, scale)
+
+def requests_to_batch(requests: List[PredictionRequest]) -> Dict[str, np.ndarray]:
+    """Collect request fields into the column arrays consumed by the feature builder."""
+    n = len(requests)
+    dates = []
+    markdowns = np.full((n, len(MARKDOWN_COLUMNS)), np.nan)
+    for i, request in enumerate(requests):
+        try:
+            dates.append(datetime.strptime(request.date, "%Y-%m-%d"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        if request.markdowns:
+            values = request.markdowns[:len(MARKDOWN_COLUMNS)]
+            markdowns[i, :len(values)] = values
     
-    return round(prediction, 2)
+    batch = {
+        'Store': np.array([r.store_id for r in requests], dtype=np.int64),
+        'Dept': np.array([r.dept_id for r in requests], dtype=np.int64),
+        'Date': np.array(dates, dtype='datetime64[D]'),
+        'Temperature': np.array([r.temperature for r in requests], dtype=np.float64),
+        'Fuel_Price': np.array([r.fuel_price for r in requests], dtype=np.float64),
+        'CPI': np.array([r.cpi for r in requests], dtype=np.float64),
+        'Unemployment': np.array([r.unemployment for r in requests], dtype=np.float64)
+    }
+    for i, name in enumerate(MARKDOWN_COLUMNS):
+        batch[name] = markdowns[:, i]
+    return batch
+
+def has_overrides(request: PredictionRequest) -> bool:
+    """Whether a request supplies its own exogenous inputs."""
+    return any(value is not None for value in (
+        request.temperature, request.fuel_price, request.cpi, request.unemployment, request.markdowns
+    ))
+
+def read_materialized(batch: Dict[str, np.ndarray], eligible: np.ndarray, endpoint: str):
+    """
+    Materialized forecasts for the eligible rows of a batch.
+
+    Returns:
+        (model_name, forecasts, hit_mask); nothing hits without a forecast store
+    """
+    n = len(batch['Store'])
+    if forecast_store is None or not eligible.any():
+        return None, np.full(n, np.nan), np.zeros(n, dtype=bool)
+    with stage_timer("materialized", endpoint):
+        values, hits = forecast_store.lookup(batch['Store'], batch['Dept'], batch['Date'])
+    hits &= eligible
+    model_name = f"materialized_{forecast_store.model}"
+    if hits.any():
+        metrics.increment("predictions_total", int(hits.sum()), model=model_name)
+    return model_name, values, hits
+
+def select_model(requested: Optional[str] = None):
+    """Return the (name, model) pair used for serving."""
+    # The requested model, then SERVING_MODEL, then the best model (Weighted Ensemble), then any model
+    for model_name in (requested, SERVING_MODEL, "weighted_ensemble"):
+        if model_name in models:
+            return model_name, models[model_name]
+    model_name = list(models.keys())[0]
+    return model_name, models[model_name]
+
+def requested_model(model: Optional[str]) -> Optional[str]:
+    """
+    Validate the ``model`` query parameter of the prediction endpoints.
+
+    Raises:
+        HTTPException: 400 for a name that is not a loaded model
+    """
+    if model is None or not models:
+        return None
+    if not hasattr(models.get(model), 'predict'):
+        available = [name for name, candidate in models.items() if hasattr(candidate, 'predict')]
+        raise HTTPException(status_code=400, detail=f"Unknown model '{model}'. Available: {', '.join(available)}")
+    return model
+
+def materialized_for(model: Optional[str]) -> bool:
+    """Whether the materialized forecasts may answer a request for ``model`` (None = default)."""
+    return model is None or (forecast_store is not None and model == forecast_store.model)
+
+def route_model(requested: Optional[str] = None):
+    """
+    Model serving this request: the requested model, the candidate for canary traffic, otherwise the primary.
+
+    Returns:
+        (model_name, model, is_canary)
+    """
+    if requested is None and shadow_evaluator is not None and shadow_evaluator.route():
+        return shadow_evaluator.label, shadow_evaluator.model, True
+    model_name, model = select_model(requested)
+    return model_name, model, False
+
+def plan_model(rows: int, deadline: Optional[float], requested: Optional[str] = None):
+    """
+    Model that can serve ``rows`` rows before ``deadline``.
+
+    The routed model is kept when its recent latency fits the remaining
+    budget; otherwise the most expensive other model that fits is used,
+    then the seasonal baseline.
+
+    Returns:
+        (model_name, model, is_canary), with ``model`` None for the baseline
+    """
+    routed_name, model, canary = route_model(requested)
+    remaining = remaining_seconds(deadline)
+    if remaining is None:
+        return routed_name, model, canary
+
+    def cost(name):
+        estimate = latency_estimator.estimate(name, rows)
+        return float('inf') if estimate is None else estimate
+
+    # Cheaper fallbacks, most expensive (most complete) first, unmeasured ones last
+    fallbacks = [name for name, candidate in models.items()
+                 if name != routed_name and hasattr(candidate, 'predict')]
+    fallbacks.sort(key=lambda name: (cost(name) == float('inf'), -cost(name)))
+    ladder = [routed_name] + fallbacks
+    chosen = latency_estimator.choose(ladder, rows, remaining, latency_estimator.estimate("features", rows) or 0.0)
+    if chosen is None and baseline_table is None:
+        chosen = min(ladder, key=cost)
+    if chosen == routed_name:
+        return routed_name, model, canary
+
+    metrics.increment("degraded_requests_total", requested=routed_name, served=chosen or BASELINE_MODEL)
+    if chosen is None:
+        return BASELINE_MODEL, None, False
+    return chosen, models[chosen], False
+
+def model_units() -> int:
+    """Models evaluated per row by the primary model (the members of an ensemble)."""
+    if not models:
+        return 1
+    return max(len(getattr(select_model()[1], 'members', ())), 1)
+
+@asynccontextmanager
+async def admitted(rows: int, endpoint: str):
+    """
+    Hold admission capacity for scoring ``rows`` rows.
+
+    Raises:
+        HTTPException: 503 with Retry-After when the request cannot be admitted
+    """
+    if not ADMISSION_CONFIG["enabled"]:
+        yield
+        return
+    try:
+        async with admission.admit(rows * model_units()):
+            yield
+    except AdmissionRejected as e:
+        metrics.increment("admission_rejected_total", endpoint=endpoint)
+        raise HTTPException(status_code=503, detail=e.detail,
+                            headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+def check_batch_rows(rows: int) -> None:
+    if ADMISSION_CONFIG["enabled"] and rows > ADMISSION_CONFIG["max_batch_rows"]:
+        raise HTTPException(status_code=413,
+                            detail=f"At most {ADMISSION_CONFIG['max_batch_rows']} rows per request")
+
+async def offload(rows: int, func, *args):
+    """Run batch-sized scoring in a worker thread so the event loop keeps serving small requests."""
+    if admission.queue_for(rows * model_units()) == 'batch':
+        return await asyncio.to_thread(profiled_in_thread(func), *args)
+    return func(*args)
+
+def compute_confidence_intervals(predictions: np.ndarray, batch: Dict[str, np.ndarray],
+                                 model_name: Optional[str]):
+    """Batch variant of ``compute_confidence_interval`` returning (lower, upper) arrays."""
+    if interval_table is None:
+        return predictions * 0.9, predictions * 1.1
+    scale, _ = interval_calibration(model_name)
+    return interval_table.bounds(
+        predictions, batch['Store'], batch['Dept'], calendar_table.holiday_flags(batch['Date']), scale
+    )
+
+def build_features(batch: Dict[str, np.ndarray], endpoint: str) -> np.ndarray:
+    """Feed the client-supplied inputs to the drift monitor and build the model matrix for a batch."""
+    if drift_monitor is not None:
+        with stage_timer("drift", endpoint):
+            drift_monitor.observe(batch)
+    start = time.perf_counter()
+    with stage_timer("features", endpoint):
+        X = feature_builder.build(batch)
+    latency_estimator.observe("features", len(X), time.perf_counter() - start)
+    return X
+
+def score_batch(batch: Dict[str, np.ndarray], endpoint: str, deadline: Optional[float] = None,
+                requested: Optional[str] = None):
+    """
+    Build features for a column batch and score it in one model call.
+
+    Without loaded models the batch is answered by the seasonal baseline.
+    With a ``deadline`` the model is picked by ``plan_model``, starting
+    from the ``requested`` model when one is named.
+
+    Returns:
+        (model_name, predictions, lower, upper)
+    """
+    if models:
+        routed_name, model, canary = plan_model(len(batch['Store']), deadline, requested)
+    else:
+        routed_name, model, canary = BASELINE_MODEL, None, False
+    if model is None:
+        model_name, values = BASELINE_MODEL, baseline_predict(batch, endpoint)
+    else:
+        X = build_features(batch, endpoint)
+        model_name, values = model_predict(routed_name, model, X, batch, endpoint)
+        if shadow_evaluator is not None and not canary and model_name == routed_name:
+            shadow_evaluator.submit(X, values)
+    with stage_timer("intervals", endpoint):
+        lower, upper = compute_confidence_intervals(values, batch, model_name)
+    return model_name, values, lower, upper
 
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_sales(request: PredictionRequest):
-    """Generate sales prediction for given store, department, and date."""
+@profiler.profile("predict")
+async def predict_sales(request: PredictionRequest, model: Optional[str] = None):
+    """
+    Generate sales prediction for given store, department, and date.
+
+    ``model`` names the model to score with (see ``/models``), e.g. a
+    distilled fast model; by default SERVING_MODEL is used.
+    """
+    metrics.observe_since_request_start("stage_duration_seconds", stage="parse", endpoint="predict")
     try:
-        logger.info(f"Prediction request: Store {request.store_id}, Dept {request.dept_id}, Date {request.date}")
-        
-        # Check if models are loaded, otherwise use fallback
-        if not models:
-            logger.info("Using fallback prediction algorithm")
-            prediction = fallback_prediction(request)
-            return PredictionResponse(
-                store_id=request.store_id,
-                dept_id=request.dept_id,
-                date=request.date,
-                predicted_sales=prediction,
-                confidence_interval=[prediction * 0.9, prediction * 1.1],
-                model_used="fallback_algorithm",
-                prediction_timestamp=datetime.now().isoformat()
-            )
+        model = requested_model(model)
+        with stage_timer("logging", "predict"):
+            prediction_logger.info("Prediction request: Store %d, Dept %d, Date %s",
+                                   request.store_id, request.dept_id, request.date)
         
         # Parse date
         try:
@@ -202,26 +805,23 @@ async def predict_sales(request: PredictionRequest):
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         
-        # Create feature vector (simplified for demo)
-        # In production, this would involve full feature engineering pipeline
-        features = create_feature_vector(request, prediction_date)
-        
-        # Get prediction from best model (Weighted Ensemble)
-        model_name = "weighted_ensemble"
-        if model_name in models:
-            model = models[model_name]
-            prediction = model.predict([features])[0]
+        # Serve the materialized forecast unless the request overrides exogenous inputs
+        batch = requests_to_batch([request])
+        eligible = np.array([not has_overrides(request) and materialized_for(model)])
+        materialized_name, stored, hits = read_materialized(batch, eligible, "predict")
+        if hits[0]:
+            model_name, prediction = materialized_name, float(stored[0])
+            # Calibrated interval from the precomputed residual quantiles
+            with stage_timer("intervals", "predict"):
+                confidence_interval = compute_confidence_interval(
+                    prediction, request.store_id, request.dept_id, prediction_date, model_name
+                )
         else:
-            # Fallback to any available model
-            model_name = list(models.keys())[0]
-            model = models[model_name]
-            prediction = model.predict([features])[0]
-        
-        # Calculate confidence interval (simplified)
-        confidence_interval = [
-            float(prediction * 0.9),  # Lower bound
-            float(prediction * 1.1)   # Upper bound
-        ]
+            # Live inference, or the seasonal baseline without models
+            async with admitted(1, "predict"):
+                model_name, values, lower, upper = score_batch(batch, "predict", request_deadline.get(), model)
+            prediction = float(values[0])
+            confidence_interval = [float(lower[0]), float(upper[0])]
         
         response = PredictionResponse(
             store_id=request.store_id,
@@ -229,71 +829,519 @@ async def predict_sales(request: PredictionRequest):
             date=request.date,
             predicted_sales=float(prediction),
             confidence_interval=confidence_interval,
+            interval_calibrated=interval_calibration(model_name)[1],
             model_used=model_name,
             prediction_timestamp=datetime.now().isoformat()
         )
         
-        logger.info(f"Prediction successful: {prediction:.2f}")
+        with stage_timer("logging", "predict"):
+            prediction_logger.info("Prediction successful: %.2f", prediction)
         return response
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
+        logger.error("Prediction error: %s", e)
         raise HTTPException(status_code=500, detail=f"Prediction failed: {str(e)}")
 
-def create_feature_vector(request: PredictionRequest, prediction_date: datetime):
-    """Create feature vector from request (simplified version)."""
-    # This is a simplified feature creation for demo purposes
-    # In production, this would use the full feature engineering pipeline
-    
-    features = [
-        request.store_id,
-        request.dept_id,
-        prediction_date.year,
-        prediction_date.month,
-        prediction_date.isocalendar().week,
-        prediction_date.timetuple().tm_yday,
-        request.temperature or 70.0,  # Default values
-        request.fuel_price or 3.5,
-        request.cpi or 220.0,
-        request.unemployment or 7.0
-    ]
-    
-    # Pad with zeros to match expected feature count
-    while len(features) < len(feature_list):
-        features.append(0.0)
-    
-    return features[:len(feature_list)]
-
 @app.post("/batch_predict")
-async def batch_predict(requests: List[PredictionRequest]):
-    """Generate predictions for multiple requests."""
+@profiler.profile("batch_predict")
+async def batch_predict(requests: List[PredictionRequest], shape: str = "rows", model: Optional[str] = None):
+    """
+    Generate predictions for multiple requests.
+
+    ``shape=rows`` returns one ``PredictionResponse`` object per request;
+    ``shape=columns`` returns the same fields as arrays aligned with the
+    requests (see ``serving.responses.batch_columns``). ``model`` selects
+    the model as for ``/predict``.
+    """
+    metrics.observe_since_request_start("stage_duration_seconds", stage="parse", endpoint="batch_predict")
+    if shape not in BATCH_SHAPES:
+        raise HTTPException(status_code=400, detail=f"shape must be one of {', '.join(BATCH_SHAPES)}")
+    model = requested_model(model)
     try:
-        predictions = []
-        for request in requests:
-            prediction = await predict_sales(request)
-            predictions.append(prediction)
+        check_batch_rows(len(requests))
+        timestamp = datetime.now().isoformat()
+        if not requests:
+            store_ids = dept_ids = dates = model_names = []
+            values, lower, upper = np.empty(0), np.empty(0), np.empty(0)
+        else:
+            prediction_logger.info("Batch prediction request: %d rows", len(requests))
+            
+            with stage_timer("columns", "batch_predict"):
+                batch = requests_to_batch(requests)
+                eligible = np.array([not has_overrides(request) for request in requests]) & materialized_for(model)
+            
+            # Materialized forecasts first, then encode and score the remaining rows in one pass
+            materialized_name, values, hits = read_materialized(batch, eligible, "batch_predict")
+            model_names = np.full(len(requests), materialized_name, dtype=object)
+            lower, upper = np.empty(len(requests)), np.empty(len(requests))
+            if hits.any():
+                with stage_timer("intervals", "batch_predict"):
+                    lower[hits], upper[hits] = compute_confidence_intervals(
+                        values[hits], {key: column[hits] for key, column in batch.items()}, materialized_name
+                    )
+            if not hits.all():
+                misses = ~hits
+                rows = int(misses.sum())
+                async with admitted(rows, "batch_predict"):
+                    model_names[misses], values[misses], lower[misses], upper[misses] = await offload(
+                        rows, score_batch, {key: column[misses] for key, column in batch.items()},
+                        "batch_predict", request_deadline.get(), model
+                    )
+            
+            store_ids = [request.store_id for request in requests]
+            dept_ids = [request.dept_id for request in requests]
+            dates = [request.date for request in requests]
         
-        return {
-            "predictions": predictions,
-            "batch_size": len(predictions),
-            "timestamp": datetime.now().isoformat()
-        }
+        # Plain dicts and arrays serialized by orjson, without a pydantic model per row
+        with stage_timer("response", "batch_predict"):
+            calibrated = intervals_calibrated(model_names)
+            if shape == "columns":
+                content = {"batch_size": len(requests), "timestamp": timestamp,
+                           **batch_columns(store_ids, dept_ids, dates, values, lower, upper, model_names,
+                                           calibrated)}
+            else:
+                content = {
+                    "predictions": batch_rows(store_ids, dept_ids, dates, values, lower, upper, model_names,
+                                              calibrated, timestamp),
+                    "batch_size": len(requests),
+                    "timestamp": timestamp
+                }
+            response = ORJSONResponse(content)
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Batch prediction error: {e}")
+        logger.error("Batch prediction error: %s", e)
         raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
 
+@app.post("/batch_predict/stream")
+async def batch_predict_stream(request: Request, format: Optional[str] = None, output: Optional[str] = None,
+                               chunk_size: Optional[int] = None, model: Optional[str] = None):
+    """
+    Score an NDJSON or CSV upload in chunks and stream the results back.
+
+    The body is either the raw file (``Content-Type: application/x-ndjson``
+    or ``text/csv``) or a multipart upload in a ``file`` field. Results are
+    written as NDJSON or CSV (``output``, defaults to the input format) one
+    chunk at a time, so memory is bounded by ``chunk_size`` rows. Rows that
+    fail validation are returned with an ``error`` instead of a prediction.
+    """
+    if not models and baseline_table is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    model = requested_model(model)
+    if chunk_size is None:
+        chunk_size = STREAMING_CONFIG["chunk_size"]
+    if not 1 <= chunk_size <= STREAMING_CONFIG["max_chunk_size"]:
+        raise HTTPException(status_code=400,
+                            detail=f"chunk_size must be between 1 and {STREAMING_CONFIG['max_chunk_size']}")
+
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Multipart upload must contain a 'file' field")
+        source = upload.file
+        fmt = format or streaming.detect_format(upload.content_type, upload.filename)
+    else:
+        source = await streaming.spool(request.stream(), STREAMING_CONFIG["spool_memory_bytes"])
+        fmt = format or streaming.detect_format(content_type)
+    output = output or fmt
+    if fmt not in streaming.FORMATS or output not in streaming.FORMATS:
+        source.close()
+        raise HTTPException(status_code=400, detail="format and output must be ndjson or csv")
+
+    async def results():
+        rows = 0
+        try:
+            for i, frame in enumerate(streaming.iter_frames(source, fmt, chunk_size)):
+                with stage_timer("parse", "batch_predict_stream"):
+                    batch, valid, errors = streaming.frame_to_batch(frame)
+                if valid.any():
+                    async with admitted(len(frame), "batch_predict_stream"):
+                        model_name, values, lower, upper = await offload(
+                            len(frame), score_batch, batch, "batch_predict_stream", None, model
+                        )
+                else:
+                    model_name, values, lower, upper = None, np.empty(0), np.empty(0), np.empty(0)
+                with stage_timer("response", "batch_predict_stream"):
+                    chunk = streaming.encode_results(
+                        frame, valid, errors, values, lower, upper, model_name,
+                        interval_calibration(model_name)[1], output, header=(i == 0)
+                    )
+                rows += len(frame)
+                yield chunk
+        except HTTPException as e:
+            # Not admitted after streaming has started: report it in-band
+            logger.warning("Streaming batch stopped after %d rows: %s", rows, e.detail)
+            if output == "ndjson":
+                yield json.dumps({"error": e.detail, "rows_processed": rows}) + "\n"
+            else:
+                yield f"# error: {e.detail} after {rows} rows\n"
+        except ValueError as e:
+            # Malformed input after streaming has started: report it in-band
+            logger.error("Streaming batch aborted after %d rows: %s", rows, e)
+            if output == "ndjson":
+                yield json.dumps({"error": f"Could not parse input: {e}", "rows_processed": rows}) + "\n"
+            else:
+                yield f"# error: could not parse input after {rows} rows: {e}\n"
+        finally:
+            source.close()
+            prediction_logger.info("Streamed batch prediction: %d rows", rows)
+
+    return StreamingResponse(results(), media_type=streaming.MEDIA_TYPES[output])
+
+@app.post("/batch_predict/columnar")
+async def batch_predict_columnar(request: Request, model: Optional[str] = None):
+    """
+    Score a columnar payload (NumPy ``.npz`` or Arrow IPC stream).
+
+    The request body holds one array per field; the response uses the same
+    container with ``predicted_sales``, ``lower_bound`` and ``upper_bound``
+    columns aligned with the request rows. The model that scored the batch
+    is reported in the ``X-Model-Used`` header, and whether the interval
+    table was calibrated on it in ``X-Interval-Calibrated``.
+    """
+    if not models and baseline_table is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    model = requested_model(model)
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == columnar.ARROW_STREAM:
+        if not columnar.arrow_available():
+            raise HTTPException(status_code=415, detail="Arrow payloads require pyarrow on the server")
+        read, write = columnar.read_arrow, columnar.write_arrow
+    elif content_type == columnar.NPZ:
+        read, write = columnar.read_npz, columnar.write_npz
+    else:
+        raise HTTPException(status_code=415,
+                            detail=f"Content-Type must be {columnar.NPZ} or {columnar.ARROW_STREAM}")
+
+    body = await request.body()
+    with stage_timer("parse", "batch_predict_columnar"):
+        try:
+            batch = columnar.columns_to_batch(read(body))
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=f"Invalid columnar payload: {e}")
+
+    rows = len(batch['Store'])
+    check_batch_rows(rows)
+    try:
+        if rows:
+            async with admitted(rows, "batch_predict_columnar"):
+                model_name, values, lower, upper = await offload(
+                    rows, score_batch, batch, "batch_predict_columnar", request_deadline.get(), model
+                )
+        else:
+            model_name = select_model(model)[0] if models else BASELINE_MODEL
+            values, lower, upper = np.empty(0), np.empty(0), np.empty(0)
+        with stage_timer("response", "batch_predict_columnar"):
+            payload = write({
+                'predicted_sales': values,
+                'lower_bound': np.asarray(lower, dtype=np.float64),
+                'upper_bound': np.asarray(upper, dtype=np.float64)
+            })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Columnar batch prediction error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Batch prediction failed: {str(e)}")
+
+    prediction_logger.info("Columnar batch prediction: %d rows", len(values))
+    calibrated = "true" if interval_calibration(model_name)[1] else "false"
+    return Response(payload, media_type=content_type,
+                    headers={"X-Model-Used": model_name, "X-Interval-Calibrated": calibrated})
+
+@app.post("/predict/hierarchy", response_model=HierarchyResponse)
+async def predict_hierarchy(request: HierarchyRequest):
+    """
+    Forecast every store/department series for one week in a single batch
+    and return coherent department, store and chain totals.
+    """
+    if not models and baseline_table is None:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    if hierarchy_model is None:
+        raise HTTPException(status_code=503, detail="Store/department hierarchy not available")
+    if request.method not in RECONCILIATION_METHODS:
+        raise HTTPException(status_code=400, detail=f"method must be one of {', '.join(RECONCILIATION_METHODS)}")
+    if request.method == "mint_shrink" and not hierarchy_model.supports_mint:
+        raise HTTPException(status_code=400, detail="mint_shrink requires a calibrated hierarchy artifact")
+    try:
+        day = np.datetime64(datetime.strptime(request.date, "%Y-%m-%d").date(), 'D')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    hierarchy = hierarchy_model.hierarchy
+    n = hierarchy.n_bottom
+    batch = {
+        'Store': hierarchy.stores,
+        'Dept': hierarchy.depts,
+        'Date': np.full(n, day),
+        **{name: np.full(n, np.nan) for name in ('Temperature', 'Fuel_Price', 'CPI', 'Unemployment')},
+        **{name: np.full(n, np.nan) for name in MARKDOWN_COLUMNS}
+    }
+    try:
+        async with admitted(n, "predict_hierarchy"):
+            model_name, values, _, _ = await offload(n, score_batch, batch, "predict_hierarchy",
+                                                     request_deadline.get())
+        with stage_timer("reconcile", "predict_hierarchy"):
+            nodes = hierarchy_model.reconcile(values, request.method, int(week_numbers([day])[0]))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Hierarchy prediction error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Hierarchy prediction failed: {str(e)}")
+
+    with stage_timer("response", "predict_hierarchy"):
+        selected = set(request.stores) if request.stores else None
+        bottom = nodes[hierarchy.n_aggregate:]
+        stores = []
+        for i, (store_id, rows) in enumerate(hierarchy.store_slices().items()):
+            if selected is not None and store_id not in selected:
+                continue
+            departments = None
+            if request.include_departments:
+                departments = [
+                    {'dept_id': int(dept), 'predicted_sales': float(value)}
+                    for dept, value in zip(hierarchy.depts[rows], bottom[rows])
+                ]
+            stores.append({
+                'store_id': store_id,
+                'predicted_sales': float(nodes[1 + i]),
+                'departments': departments
+            })
+
+    prediction_logger.info("Hierarchy prediction for %s (%s): %d series", request.date, request.method, n)
+    return {
+        'date': request.date,
+        'method': request.method,
+        'total': float(nodes[0]),
+        'stores': stores,
+        'model_used': model_name,
+        'prediction_timestamp': datetime.now().isoformat()
+    }
+
+@app.post("/predict/scenarios", response_model=ScenarioResponse)
+async def predict_scenarios(request: ScenarioRequest):
+    """
+    Evaluate what-if perturbations of the exogenous inputs for every
+    store/department series in one week, scoring the base and all
+    scenarios in a single stacked model call.
+    """
+    if not models:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+    if hierarchy_model is None:
+        raise HTTPException(status_code=503, detail="Store/department hierarchy not available")
+    if not request.scenarios:
+        raise HTTPException(status_code=400, detail="At least one scenario is required")
+    if len(request.scenarios) > SCENARIO_CONFIG["max_scenarios"]:
+        raise HTTPException(status_code=400,
+                            detail=f"At most {SCENARIO_CONFIG['max_scenarios']} scenarios per request")
+    try:
+        day = np.datetime64(datetime.strptime(request.date, "%Y-%m-%d").date(), 'D')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    try:
+        scenarios = [
+            Scenario(spec.name, [Perturbation(p.column, p.op, p.value) for p in spec.perturbations], spec.stores)
+            for spec in request.scenarios
+        ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    hierarchy = hierarchy_model.hierarchy
+    selected = np.ones(hierarchy.n_bottom, dtype=bool)
+    if request.stores:
+        selected = np.isin(hierarchy.stores, request.stores)
+    n = int(selected.sum())
+    if n == 0:
+        raise HTTPException(status_code=400, detail="No known store/department series for the requested stores")
+    if n * (1 + len(scenarios)) > SCENARIO_CONFIG["max_rows"]:
+        raise HTTPException(status_code=400, detail="Too many series x scenarios; narrow the stores or scenarios")
+
+    batch = {
+        'Store': hierarchy.stores[selected],
+        'Dept': hierarchy.depts[selected],
+        'Date': np.full(n, day),
+        **{name: np.full(n, np.nan) for name in ('Temperature', 'Fuel_Price', 'CPI', 'Unemployment')},
+        **{name: np.full(n, np.nan) for name in MARKDOWN_COLUMNS}
+    }
+    model_name, model = select_model()
+
+    def predict_stacked() -> np.ndarray:
+        with stage_timer("features", "predict_scenarios"):
+            X = scenario_engine.stack(batch, scenarios)
+        with stage_timer("model_predict", "predict_scenarios", model=model_name):
+            return np.asarray(model.predict(X), dtype=np.float64).reshape(1 + len(scenarios), n)
+
+    rows = n * (1 + len(scenarios))
+    try:
+        async with admitted(rows, "predict_scenarios"):
+            values = await offload(rows, predict_stacked)
+        metrics.increment("predictions_total", values.size, model=model_name)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Scenario prediction error: %s", e)
+        raise HTTPException(status_code=500, detail=f"Scenario prediction failed: {str(e)}")
+
+    with stage_timer("response", "predict_scenarios"):
+        totals = values.sum(axis=1)
+        base_total = float(totals[0])
+        if request.include_stores:
+            store_ids, store_index = np.unique(batch['Store'], return_inverse=True)
+            per_store = np.stack([np.bincount(store_index, weights=row, minlength=len(store_ids))
+                                  for row in values])
+        results = []
+        for i, scenario in enumerate(scenarios, start=1):
+            delta = float(totals[i]) - base_total
+            stores = None
+            if request.include_stores:
+                stores = [
+                    {'store_id': int(store), 'predicted_sales': float(value), 'delta': float(value - base)}
+                    for store, value, base in zip(store_ids, per_store[i], per_store[0])
+                ]
+            results.append({
+                'name': scenario.name,
+                'total': float(totals[i]),
+                'delta': delta,
+                'delta_pct': 100.0 * delta / base_total if base_total else 0.0,
+                'stores': stores
+            })
+
+    prediction_logger.info("Scenario prediction for %s: %d scenarios x %d series", request.date, len(scenarios), n)
+    return {
+        'date': request.date,
+        'series': n,
+        'base_total': base_total,
+        'scenarios': results,
+        'model_used': model_name,
+        'prediction_timestamp': datetime.now().isoformat()
+    }
+
+@app.get("/monitoring/drift")
+async def feature_drift():
+    """PSI and KS drift scores of live model inputs against the training data."""
+    if drift_monitor is None:
+        raise HTTPException(status_code=503, detail="Drift reference not available")
+    return {
+        "reference_rows": drift_monitor.reference.rows,
+        "decay": drift_monitor.decay,
+        "psi_thresholds": {"moderate": PSI_THRESHOLDS[0], "significant": PSI_THRESHOLDS[1]},
+        "features": drift_monitor.scores()
+    }
+
 @app.get("/models")
 async def list_models():
     """List available models and their metadata."""
     return {
         "available_models": list(models.keys()) if models else [],
+        "default_model": select_model()[0] if models else BASELINE_MODEL,
         "total_models": len(models) if models else 0,
         "feature_count": len(feature_list)
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Expose request and stage timing histograms in Prometheus text format."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Guard admin endpoints with ADMIN_TOKEN when one is configured."""
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@app.get("/admin/profiling", dependencies=[Depends(require_admin)])
+async def profiling_status():
+    """Current profiling settings and number of profiled requests per endpoint."""
+    return profiler.status()
+
+@app.post("/admin/profiling", dependencies=[Depends(require_admin)])
+async def configure_profiling(enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                              reset: bool = False):
+    """Toggle profiling or change the sample rate without a restart."""
+    try:
+        profiler.configure(enabled=enabled, sample_rate=sample_rate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if reset:
+        profiler.reset()
+    logger.info("Profiling %s at sample rate %.3f",
+                "enabled" if profiler.enabled else "disabled", profiler.sample_rate)
+    return profiler.status()
+
+@app.get("/admin/profiling/stats", dependencies=[Depends(require_admin)])
+async def profiling_stats(endpoint: Optional[str] = None, format: str = "text",
+                          sort: str = "cumulative", limit: int = 50):
+    """
+    Aggregated profile of sampled requests.
+
+    ``format`` is ``text`` (pstats listing), ``pstats`` (binary dump for
+    snakeviz) or ``collapsed`` (stacks for flamegraph.pl / speedscope).
+    """
+    if format == "text":
+        try:
+            return PlainTextResponse(profiler.report_text(endpoint, sort, limit))
+        except KeyError:
+            raise HTTPException(status_code=400, detail=f"Unknown sort key: {sort}")
+    if format == "pstats":
+        return Response(
+            profiler.report_pstats(endpoint), media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{endpoint or "api"}.pstats"'}
+        )
+    if format == "collapsed":
+        return PlainTextResponse(profiler.report_collapsed(endpoint))
+    raise HTTPException(status_code=400, detail="format must be text, pstats or collapsed")
+
+@app.get("/admin/shadow", dependencies=[Depends(require_admin)])
+async def shadow_status():
+    """Shadow/canary settings and disagreement of the candidate with the primary model."""
+    if shadow_evaluator is None:
+        return {"candidate": None, "available_candidates": sorted(candidate_models)}
+    return shadow_evaluator.status()
+
+@app.post("/admin/shadow", dependencies=[Depends(require_admin)])
+async def configure_shadow(model: Optional[str] = None, enabled: Optional[bool] = None,
+                           sample_rate: Optional[float] = None, canary_percent: Optional[float] = None,
+                           reset: bool = False):
+    """
+    Select the candidate model, toggle shadowing or change the sample rate
+    and canary percentage without a restart. Candidates are the models of
+    the candidate artifact, never the primary registry, so the primary is
+    not compared against itself.
+
+    Raises:
+        HTTPException: 400 for a name that is not a candidate model
+    """
+    global shadow_evaluator
+    if model is not None:
+        if not callable(getattr(candidate_models.get(model), 'predict', None)):
+            raise HTTPException(status_code=400, detail=f"Unknown candidate model '{model}'. "
+                                                        f"Available: {', '.join(candidate_models) or 'none'}")
+        previous = shadow_evaluator
+        shadow_evaluator = ShadowEvaluator(
+            model, candidate_models[model],
+            previous.sample_rate if previous is not None else SHADOW_CONFIG["sample_rate"],
+            previous.canary_percent if previous is not None else SHADOW_CONFIG["canary_percent"],
+            SHADOW_CONFIG["max_pending"], SHADOW_CONFIG["workers"]
+        )
+        if previous is not None:
+            previous.shutdown()
+    if shadow_evaluator is None:
+        raise HTTPException(status_code=400, detail="No candidate model selected")
+    try:
+        shadow_evaluator.configure(enabled=enabled, sample_rate=sample_rate, canary_percent=canary_percent)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if reset:
+        shadow_evaluator.reset()
+    logger.info("Shadow evaluation of '%s' %s: sample rate %.3f, canary %.1f%%", shadow_evaluator.name,
+                "enabled" if shadow_evaluator.enabled else "disabled",
+                shadow_evaluator.sample_rate, shadow_evaluator.canary_percent)
+    return shadow_evaluator.status()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -2,16 +2,26 @@
 Database package for Walmart Sales Forecasting application.
 """
 
-from .models import Prediction, UserSession, SystemMetric, BatchJob
+from .models import Prediction, PredictionRollup, UserSession, SystemMetric, BatchJob
 from .connection import get_db, get_db_session, create_tables, test_connection
+from .partitions import (
+    ensure_partitions, expired_months, rollup_month, recent_predictions, series_predictions, series_rollups
+)
 
 __all__ = [
     'Prediction',
+    'PredictionRollup',
     'UserSession', 
     'SystemMetric',
     'BatchJob',
     'get_db',
     'get_db_session',
     'create_tables',
-    'test_connection'
+    'test_connection',
+    'ensure_partitions',
+    'expired_months',
+    'rollup_month',
+    'recent_predictions',
+    'series_predictions',
+    'series_rollups'
 ]
\ No newline at end of file
@@ -29,7 +29,13 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 def create_tables():
-    """Create all database tables."""
+    """Create all database tables (``predictions`` partitioned on PostgreSQL)."""
+    if engine.dialect.name == 'postgresql':
+        from sqlalchemy import text
+        from .partitions import PREDICTIONS_DDL, ensure_partitions
+        with get_db_session() as db:
+            db.execute(text(PREDICTIONS_DDL))
+            ensure_partitions(db)
     Base.metadata.create_all(bind=engine)
 
 def get_db() -> Generator[Session, None, None]:
@@ -2,7 +2,7 @@
 Database models for the Walmart Sales Forecasting application.
 """
 
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, JSON
+from sqlalchemy import BigInteger, Column, Date, Integer, String, DateTime, Boolean, Text, JSON
 from sqlalchemy.types import DECIMAL
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
@@ -11,10 +11,16 @@ from datetime import datetime
 Base = declarative_base()
 
 class Prediction(Base):
-    """Model for storing sales predictions."""
+    """
+    Model for storing sales predictions.
+
+    On PostgreSQL the table is range partitioned by month of ``created_at``
+    (see ``database.partitions``) and its primary key is ``(id, created_at)``;
+    ``id`` alone is unique through its sequence, which is all the ORM needs.
+    """
     __tablename__ = 'predictions'
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger().with_variant(Integer, 'sqlite'), primary_key=True, index=True)
     store_id = Column(Integer, nullable=False, index=True)
     dept_id = Column(Integer, nullable=False, index=True)
     prediction_date = Column(DateTime, nullable=False, index=True)
@@ -23,7 +29,23 @@ class Prediction(Base):
     confidence_upper = Column(DECIMAL(12, 2))
     model_used = Column(String(100))
     input_features = Column(JSON)
-    created_at = Column(DateTime, default=func.now(), index=True)
+    created_at = Column(DateTime, default=func.now(), nullable=False, index=True)
+
+class PredictionRollup(Base):
+    """Aggregates of predictions compacted out of expired partitions, per creation month."""
+    __tablename__ = 'prediction_rollups'
+
+    month = Column(Date, primary_key=True)
+    store_id = Column(Integer, primary_key=True)
+    dept_id = Column(Integer, primary_key=True)
+    prediction_date = Column(DateTime, primary_key=True)
+    model_used = Column(String(100), primary_key=True)
+    predictions = Column(Integer, nullable=False)
+    mean_predicted_sales = Column(DECIMAL(12, 2), nullable=False)
+    min_predicted_sales = Column(DECIMAL(12, 2))
+    max_predicted_sales = Column(DECIMAL(12, 2))
+    mean_confidence_lower = Column(DECIMAL(12, 2))
+    mean_confidence_upper = Column(DECIMAL(12, 2))
 
 class UserSession(Base):
     """Model for user sessions."""
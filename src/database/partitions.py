@@ -0,0 +1,266 @@
+"""
+Monthly partitions, retention and partition-pruned queries for ``predictions``.
+
+On PostgreSQL ``predictions`` is range partitioned by ``created_at``, one
+partition per month (``predictions_pYYYY_MM``) plus a default partition
+for rows outside the prepared months. Writes always land in the current
+month's partition. Once a month falls out of the retention window its
+rows are compacted into ``prediction_rollups`` and the partition is
+dropped, which is a metadata operation instead of a large ``DELETE``.
+Rows that arrive later for a month that has already been rolled up (they
+land in the default partition) are merged into the existing aggregates
+on the next run.
+
+On other databases (SQLite in tests) the same functions work on a plain
+table: partition management is skipped and expired rows are rolled up
+and deleted.
+
+Queries should bound ``created_at`` so the planner only visits the
+matching partitions; the helpers below always do.
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import func, insert, literal, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from .models import Prediction, PredictionRollup
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = 'predictions_p'
+
+# Partitioned parent table, also created by database/init.sql
+PREDICTIONS_DDL = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id BIGSERIAL,
+    store_id INTEGER NOT NULL,
+    dept_id INTEGER NOT NULL,
+    prediction_date DATE NOT NULL,
+    predicted_sales DECIMAL(12, 2) NOT NULL,
+    confidence_lower DECIMAL(12, 2),
+    confidence_upper DECIMAL(12, 2),
+    model_used VARCHAR(100),
+    input_features JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT LOCALTIMESTAMP,
+    PRIMARY KEY (id, created_at),
+    UNIQUE (store_id, dept_id, prediction_date, created_at)
+) PARTITION BY RANGE (created_at);
+CREATE TABLE IF NOT EXISTS predictions_default PARTITION OF predictions DEFAULT;
+CREATE INDEX IF NOT EXISTS idx_predictions_store_dept_date ON predictions(store_id, dept_id, prediction_date);
+CREATE INDEX IF NOT EXISTS idx_predictions_created_at ON predictions(created_at);
+"""
+
+def is_partitioned(db: Session) -> bool:
+    return db.get_bind().dialect.name == 'postgresql'
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month.year:04d}_{month.month:02d}"
+
+def _partition_exists(db: Session, month: date) -> bool:
+    return db.execute(text("SELECT to_regclass(:name)"), {'name': partition_name(month)}).scalar() is not None
+
+def _create_partition(db: Session, month: date) -> None:
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    in_month = "created_at >= :start AND created_at < :end"
+    create = (f"CREATE TABLE {partition_name(month)} PARTITION OF predictions "
+              f"FOR VALUES FROM ('{bounds['start'].isoformat()}') TO ('{bounds['end'].isoformat()}')")
+    stranded = db.execute(text(f"SELECT EXISTS (SELECT 1 FROM predictions_default WHERE {in_month})"),
+                          bounds).scalar()
+    if not stranded:
+        db.execute(text(create))
+        return
+    # PostgreSQL refuses the new partition while the default one holds rows
+    # for its range: detach the default, create the month, move the rows
+    # across and re-attach
+    db.execute(text("ALTER TABLE predictions DETACH PARTITION predictions_default"))
+    db.execute(text(create))
+    moved = db.execute(text(f"INSERT INTO predictions SELECT * FROM predictions_default WHERE {in_month}"),
+                       bounds).rowcount
+    db.execute(text(f"DELETE FROM predictions_default WHERE {in_month}"), bounds)
+    db.execute(text("ALTER TABLE predictions ATTACH PARTITION predictions_default DEFAULT"))
+    logger.info(f"Moved {moved} rows from predictions_default into {partition_name(month)}")
+
+def ensure_partitions(db: Session, months_ahead: int = 2, today: Optional[date] = None) -> List[str]:
+    """
+    Create the partitions for the current month and ``months_ahead`` following months.
+
+    Rows of a month already written to the default partition (when the job
+    did not run before the month started) are moved into the new partition.
+    A month that cannot be created is logged and skipped.
+
+    Returns:
+        Names of the partitions that were created (none outside PostgreSQL)
+    """
+    if not is_partitioned(db):
+        return []
+    current = month_start(today or date.today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if _partition_exists(db, month):
+            continue
+        try:
+            with db.begin_nested():
+                _create_partition(db, month)
+        except Exception as e:
+            logger.error(f"Could not create partition {partition_name(month)} for {month:%Y-%m}: {e}")
+            continue
+        created.append(partition_name(month))
+    return created
+
+def expired_months(db: Session, keep_months: int, today: Optional[date] = None) -> List[date]:
+    """
+    Months with predictions older than the retention window, oldest first.
+
+    Args:
+        db: Session
+        keep_months: Full months kept besides the current one
+        today: Reference date (defaults to today)
+    """
+    cutoff = add_months(month_start(today or date.today()), -keep_months)
+    before_cutoff = Prediction.created_at < datetime.combine(cutoff, datetime.min.time())
+    oldest = db.execute(select(func.min(Prediction.created_at)).where(before_cutoff)).scalar()
+    if oldest is None:
+        return []
+    if isinstance(oldest, str):  # SQLite returns aggregates of DATETIME columns as text
+        oldest = datetime.fromisoformat(oldest)
+    months = []
+    month = month_start(oldest)
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+def _merge_rollups(db: Session, columns: List[str], aggregates):
+    """
+    ``INSERT ... SELECT`` into ``prediction_rollups`` that merges into existing aggregates.
+
+    A rolled-up month receives more rows when they arrive with an old
+    ``created_at``. Their counts are added, the means combined weighted by
+    count and min/max widened. Other databases get the plain insert.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        upsert, least, greatest = postgresql.insert, func.least, func.greatest
+    elif dialect == 'sqlite':
+        upsert, least, greatest = sqlite.insert, func.min, func.max
+    else:
+        return insert(PredictionRollup).from_select(columns, aggregates)
+    statement = upsert(PredictionRollup).from_select(columns, aggregates)
+    old, new = PredictionRollup.__table__.c, statement.excluded
+    total = old.predictions + new.predictions
+
+    def mean(column: str):
+        merged = (old[column] * old.predictions + new[column] * new.predictions) / total
+        return func.coalesce(merged, new[column], old[column])
+
+    return statement.on_conflict_do_update(
+        index_elements=[old.month, old.store_id, old.dept_id, old.prediction_date, old.model_used],
+        set_={
+            'predictions': total,
+            'mean_predicted_sales': mean('mean_predicted_sales'),
+            'min_predicted_sales': least(old.min_predicted_sales, new.min_predicted_sales),
+            'max_predicted_sales': greatest(old.max_predicted_sales, new.max_predicted_sales),
+            'mean_confidence_lower': mean('mean_confidence_lower'),
+            'mean_confidence_upper': mean('mean_confidence_upper')
+        }
+    )
+
+def rollup_month(db: Session, month: date) -> int:
+    """
+    Compact one month of predictions into ``prediction_rollups`` and remove the rows.
+
+    Rows are aggregated per store, department, prediction date and model,
+    and merged into the month's aggregates when it was rolled up before.
+    The month's partition is dropped when it exists, otherwise the rows are
+    deleted. Run each month in its own transaction so the aggregates and
+    the removal commit together.
+
+    Returns:
+        Number of rollup rows written
+    """
+    start = datetime.combine(month, datetime.min.time())
+    end = datetime.combine(add_months(month, 1), datetime.min.time())
+    in_month = (Prediction.created_at >= start) & (Prediction.created_at < end)
+    model = func.coalesce(Prediction.model_used, 'unknown')
+    aggregates = (
+        select(
+            literal(month), Prediction.store_id, Prediction.dept_id, Prediction.prediction_date, model,
+            func.count(), func.avg(Prediction.predicted_sales), func.min(Prediction.predicted_sales),
+            func.max(Prediction.predicted_sales), func.avg(Prediction.confidence_lower),
+            func.avg(Prediction.confidence_upper)
+        )
+        .where(in_month)
+        .group_by(Prediction.store_id, Prediction.dept_id, Prediction.prediction_date, model)
+    )
+    columns = [
+        'month', 'store_id', 'dept_id', 'prediction_date', 'model_used', 'predictions', 'mean_predicted_sales',
+        'min_predicted_sales', 'max_predicted_sales', 'mean_confidence_lower', 'mean_confidence_upper'
+    ]
+    rolled = db.execute(_merge_rollups(db, columns, aggregates)).rowcount
+
+    if is_partitioned(db) and _partition_exists(db, month):
+        db.execute(text(f"DROP TABLE {partition_name(month)}"))
+    else:
+        db.query(Prediction).filter(in_month).delete(synchronize_session=False)
+    return rolled
+
+def recent_predictions(db: Session, days: int = 7, limit: Optional[int] = None) -> List[Prediction]:
+    """Predictions created in the last ``days`` days, newest first (the ``recent_predictions`` view)."""
+    query = (
+        db.query(Prediction)
+        .filter(Prediction.created_at >= datetime.now() - timedelta(days=days))
+        .order_by(Prediction.created_at.desc())
+    )
+    return query.limit(limit).all() if limit else query.all()
+
+def series_predictions(db: Session, store_id: int, dept_id: int, created_since: datetime,
+                       start: Optional[date] = None, end: Optional[date] = None) -> List[Prediction]:
+    """
+    Predictions for one store/department series made since ``created_since``.
+
+    ``created_since`` is required so that only the partitions from that
+    month on are scanned; older predictions are in ``series_rollups``.
+
+    Args:
+        db: Session
+        store_id: Store
+        dept_id: Department
+        created_since: Earliest creation time
+        start: First prediction date (inclusive)
+        end: Last prediction date (inclusive)
+    """
+    query = db.query(Prediction).filter(
+        Prediction.created_at >= created_since,
+        Prediction.store_id == store_id,
+        Prediction.dept_id == dept_id
+    )
+    # prediction_date is a timestamp column: compare with datetimes, the end as the next midnight
+    if start is not None:
+        query = query.filter(Prediction.prediction_date >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        next_day = datetime.combine(end + timedelta(days=1), datetime.min.time())
+        query = query.filter(Prediction.prediction_date < next_day)
+    return query.order_by(Prediction.prediction_date, Prediction.created_at).all()
+
+def series_rollups(db: Session, store_id: int, dept_id: int,
+                   since_month: Optional[date] = None) -> List[PredictionRollup]:
+    """Compacted prediction history of one store/department series."""
+    query = db.query(PredictionRollup).filter(
+        PredictionRollup.store_id == store_id,
+        PredictionRollup.dept_id == dept_id
+    )
+    if since_month is not None:
+        query = query.filter(PredictionRollup.month >= since_month)
+    return query.order_by(PredictionRollup.month, PredictionRollup.prediction_date).all()
@@ -0,0 +1,28 @@
+"""
+Feature engineering helpers shared by training jobs and the API.
+"""
+
+from .calendar import (
+    holiday_dates, week_ending, week_numbers, season_weeks, is_holiday_week, holiday_flags, holiday_types,
+    CalendarTable, CALENDAR_FEATURES
+)
+from .encoders import LabelLookup, FrequencyTargetLookup, CategoricalEncoders
+from .exogenous import ExogenousIndex
+from .builder import FeatureBuilder
+
+__all__ = [
+    'holiday_dates',
+    'week_ending',
+    'week_numbers',
+    'season_weeks',
+    'is_holiday_week',
+    'holiday_flags',
+    'holiday_types',
+    'CalendarTable',
+    'CALENDAR_FEATURES',
+    'LabelLookup',
+    'FrequencyTargetLookup',
+    'CategoricalEncoders',
+    'ExogenousIndex',
+    'FeatureBuilder'
+]
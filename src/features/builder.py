@@ -0,0 +1,187 @@
+"""
+Batch feature matrix construction for serving.
+
+Requests are first collected into column arrays (one array per input
+field) and then turned into the model's feature matrix in a single pass,
+so encoding and date handling cost one vectorized operation per column
+rather than one Python call per row. Temporal features are gathered from
+the precomputed ``CalendarTable``.
+
+Everything that depends on the exogenous inputs is computed by
+``exogenous_columns`` from the inputs and a separate lag context
+(previous-week values from the ``ExogenousIndex``), so what-if scenarios
+can recompute just those columns for perturbed inputs.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .calendar import CalendarTable, HOLIDAY_TYPES
+from .encoders import CategoricalEncoders, NOMINAL_COMPONENTS
+from .exogenous import ExogenousIndex, MARKDOWN_COLUMNS
+
+# Values used when a request omits an exogenous field and no index is loaded
+EXOGENOUS_DEFAULTS = {
+    'Temperature': 70.0,
+    'Fuel_Price': 3.5,
+    'CPI': 220.0,
+    'Unemployment': 7.0
+}
+
+# Features derived from the exogenous inputs (see ``exogenous_columns``)
+EXOGENOUS_FEATURES = list(EXOGENOUS_DEFAULTS) + MARKDOWN_COLUMNS + [
+    'Temp_Change', 'Monthly_Avg_Temp', 'Temp_Deviation', 'Fuel_Price_Change',
+    'Fuel_Price_Volatility', 'CPI_Change', 'Unemployment_Change',
+    'Temp_Category_encoded', 'Unemployment_Category_encoded'
+]
+
+# Weeks in the notebook's rolling fuel price standard deviation
+VOLATILITY_WINDOW = 4
+
+# Interaction encoding columns and the category map each one is read from
+NOMINAL_FEATURES = {
+    f"{feature}_{suffix}": feature for feature in NOMINAL_COMPONENTS for suffix in ('freq', 'target_enc')
+}
+
+class FeatureBuilder:
+    """
+    Assemble the model feature matrix from batch column arrays.
+
+    Features the builder does not derive (lags and rolling sales
+    statistics) are left at zero, matching the padding behaviour of the
+    original single-row builder. The week-over-week change, volatility and
+    deviation features need the exogenous index and stay at zero without
+    it. The ``*_freq`` and ``*_target_enc`` interaction encodings need the
+    category maps (``categorical_maps.npz``); a feature list that uses them
+    is rejected when the maps are missing.
+
+    Raises:
+        ValueError: When ``feature_list`` needs interaction maps the encoders lack
+    """
+
+    def __init__(self, feature_list: List[str], encoders: Optional[CategoricalEncoders] = None,
+                 exogenous: Optional[ExogenousIndex] = None,
+                 calendar: Optional[CalendarTable] = None):
+        self.feature_list = list(feature_list)
+        self.positions = {name: i for i, name in enumerate(self.feature_list)}
+        self.encoders = encoders if encoders is not None else CategoricalEncoders({})
+        missing = sorted({NOMINAL_FEATURES[name] for name in self.feature_list
+                          if name in NOMINAL_FEATURES and NOMINAL_FEATURES[name] not in self.encoders.nominal})
+        if missing:
+            raise ValueError(f"No category maps for {', '.join(missing)}; "
+                             f"build them with python src/features/encoders.py")
+        self.exogenous = exogenous
+        self.calendar = calendar or CalendarTable()
+        # Holiday types are stored as indices into HOLIDAY_TYPES; encode them once
+        self.holiday_type_codes = self.encoders.encode_label('Holiday_Type', HOLIDAY_TYPES)
+
+    def build(self, batch: Dict[str, np.ndarray]) -> np.ndarray:
+        """
+        Build the feature matrix for a batch.
+
+        Args:
+            batch: Column arrays keyed by feature name. ``Store``, ``Dept`` and
+                ``Date`` are required; exogenous columns may contain NaN.
+
+        Returns:
+            Array of shape (rows, len(feature_list))
+        """
+        n = len(batch['Store'])
+        X = np.zeros((n, len(self.feature_list)), dtype=np.float64)
+        for name, values in self.compute_columns(batch).items():
+            idx = self.positions.get(name)
+            if idx is not None:
+                X[:, idx] = values
+        return X
+
+    def compute_columns(self, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Derive every feature the builder supports as a named column."""
+        if self.exogenous is not None:
+            batch = self.exogenous.fill(batch)
+        columns = self.calendar.gather(batch['Date'])
+        columns['Store'] = np.asarray(batch['Store'], dtype=np.float64)
+        columns['Dept'] = np.asarray(batch['Dept'], dtype=np.float64)
+
+        raw, context = self.exogenous_inputs(batch, columns['Month'])
+        columns.update(self.exogenous_columns(raw, context))
+        if 'Size' in batch:
+            columns['Size'] = np.asarray(batch['Size'], dtype=np.float64)
+
+        columns.update(self._categorical_columns(batch, columns))
+        return columns
+
+    def exogenous_inputs(self, batch: Dict[str, np.ndarray], months: Optional[np.ndarray] = None
+                         ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """
+        Split a (filled) batch into exogenous inputs and their lag context.
+
+        Args:
+            batch: Column batch, already filled from the exogenous index
+            months: Calendar month per row (gathered when omitted)
+
+        Returns:
+            (inputs with defaults applied, lag context; empty without an index)
+        """
+        n = len(batch['Store'])
+        raw = {}
+        for name, default in EXOGENOUS_DEFAULTS.items():
+            values = np.asarray(batch.get(name, np.full(n, np.nan)), dtype=np.float64)
+            raw[name] = np.where(np.isnan(values), default, values)
+        for name in MARKDOWN_COLUMNS:
+            values = np.asarray(batch.get(name, np.full(n, np.nan)), dtype=np.float64)
+            raw[name] = np.nan_to_num(values, nan=0.0)
+
+        context = {}
+        if self.exogenous is not None:
+            stores, dates = batch['Store'], batch['Date']
+            if months is None:
+                months = self.calendar.gather(dates)['Month']
+            for name in ('Temperature', 'CPI', 'Unemployment'):
+                context[name] = self.exogenous.previous(name, stores, dates)[:, 0]
+            context['Fuel_Price'] = self.exogenous.previous('Fuel_Price', stores, dates, VOLATILITY_WINDOW - 1)
+            context['Monthly_Avg_Temp'] = self.exogenous.monthly_temperature_for(stores, months)
+        return raw, context
+
+    def exogenous_columns(self, raw: Dict[str, np.ndarray],
+                          context: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Compute every feature listed in ``EXOGENOUS_FEATURES`` the inputs allow."""
+        enc = self.encoders
+        columns = dict(raw)
+        if context:
+            columns['Temp_Change'] = raw['Temperature'] - context['Temperature']
+            columns['CPI_Change'] = raw['CPI'] - context['CPI']
+            columns['Unemployment_Change'] = raw['Unemployment'] - context['Unemployment']
+            columns['Fuel_Price_Change'] = raw['Fuel_Price'] - context['Fuel_Price'][:, 0]
+            window = np.column_stack([raw['Fuel_Price'], context['Fuel_Price']])
+            columns['Fuel_Price_Volatility'] = window.std(axis=1, ddof=1)
+            columns['Monthly_Avg_Temp'] = context['Monthly_Avg_Temp']
+            columns['Temp_Deviation'] = raw['Temperature'] - context['Monthly_Avg_Temp']
+        columns['Temp_Category_encoded'] = enc.temp_category.encode(raw['Temperature']).astype(np.float64)
+        columns['Unemployment_Category_encoded'] = (
+            enc.unemployment_category.encode(raw['Unemployment']).astype(np.float64)
+        )
+        return columns
+
+    def _categorical_columns(self, batch, columns) -> Dict[str, np.ndarray]:
+        enc = self.encoders
+        n = len(columns['Store'])
+        store_types = batch.get('Type', np.full(n, 'nan'))
+        codes = {
+            'Store': columns['Store'].astype(np.int64),
+            'Dept': columns['Dept'].astype(np.int64),
+            'Quarter': columns['Quarter'].astype(np.int64),
+            'Type_encoded': enc.encode_label('Type', store_types),
+            'Holiday_Type_encoded': self.holiday_type_codes[columns['Holiday_Type_Index'].astype(np.int64)],
+            'Size_Bin': enc.size_bins(batch.get('Size', np.full(n, np.nan)))
+        }
+
+        encoded = {
+            'Type_encoded': codes['Type_encoded'],
+            'Holiday_Type_encoded': codes['Holiday_Type_encoded']
+        }
+        for feature, components in NOMINAL_COMPONENTS.items():
+            freq, target = enc.encode_nominal(feature, *(codes[c] for c in components))
+            encoded[f"{feature}_freq"] = freq
+            encoded[f"{feature}_target_enc"] = target
+        return {name: np.asarray(values, dtype=np.float64) for name, values in encoded.items()}
@@ -0,0 +1,253 @@
+"""
+Calendar utilities for the sales forecasting project.
+
+Walmart flags four holiday weeks in the competition data (Super Bowl,
+Labor Day, Thanksgiving and Christmas). A flagged week is the Saturday to
+Friday sales week that contains the holiday itself, so the flag can be
+derived for any date, including dates beyond ``features.csv``.
+
+All temporal model features depend only on the sales week, so serving
+gathers them from a ``CalendarTable`` precomputed once per week instead of
+recomputing them per request.
+"""
+
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import FEATURE_CONFIG
+
+# Labels produced by the notebook's ``identify_holidays``, in rule order
+HOLIDAY_TYPES = ['Thanksgiving', 'Christmas', 'NewYear', 'Valentine', 'July4th', 'LaborDay', 'Regular']
+
+DateLike = Union[date, datetime]
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """Return the n-th given weekday (Monday=0) of a month."""
+    first = date(year, month, 1)
+    offset = (weekday - first.weekday()) % 7
+    return first + timedelta(days=offset + 7 * (n - 1))
+
+def holiday_dates(year: int) -> List[date]:
+    """
+    Get the dates of the four Walmart holidays for a year.
+
+    Args:
+        year: Calendar year
+
+    Returns:
+        List of Super Bowl, Labor Day, Thanksgiving and Christmas dates
+    """
+    # The Super Bowl moved to the second Sunday of February in 2022
+    super_bowl = _nth_weekday(year, 2, 6, 1 if year < 2022 else 2)
+    labor_day = _nth_weekday(year, 9, 0, 1)
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    christmas = date(year, 12, 25)
+    return [super_bowl, labor_day, thanksgiving, christmas]
+
+def week_ending(day: DateLike) -> date:
+    """Return the Friday that closes the Saturday-Friday sales week of a date."""
+    if isinstance(day, datetime):
+        day = day.date()
+    return day + timedelta(days=(4 - day.weekday()) % 7)
+
+def week_numbers(days) -> np.ndarray:
+    """
+    Number the Saturday-Friday sales weeks since the Unix epoch.
+
+    Week 0 ends on Friday 1970-01-02. Used as the shared index into the
+    precomputed per-week lookup tables.
+
+    Args:
+        days: Array-like of dates
+
+    Returns:
+        Integer week numbers
+    """
+    epoch_days = np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+    # 1970-01-01 was a Thursday, so Fridays are the days with epoch_days % 7 == 1
+    fridays = epoch_days + (1 - epoch_days) % 7
+    return (fridays - 1) // 7
+
+def season_weeks(days) -> np.ndarray:
+    """
+    Slot (0-51) of each date's sales week in the yearly season.
+
+    Keyed on the calendar: the ISO week of the week-ending Friday (the
+    ``Week`` feature) minus one, with week 53 folded into 52. Unlike
+    ``week_numbers(days) % 52``, which slips a week every five to six
+    years, a week keeps its slot across years; holidays tied to a weekday,
+    such as Thanksgiving, move by at most one slot.
+
+    Args:
+        days: Array-like of dates
+
+    Returns:
+        Integer season slots
+    """
+    # The ISO week of a Friday is the one of the Thursday before it
+    thursdays = (week_numbers(days) * 7).astype('datetime64[D]')
+    day_of_year = (thursdays - thursdays.astype('datetime64[Y]').astype('datetime64[D]')).astype(np.int64)
+    return np.minimum(day_of_year // 7, 51)
+
+def is_holiday_week(day: DateLike) -> bool:
+    """
+    Check whether a date falls in one of the flagged holiday weeks.
+
+    Args:
+        day: Any date inside the sales week
+
+    Returns:
+        True if the week contains a Walmart holiday
+    """
+    friday = week_ending(day)
+    saturday = friday - timedelta(days=6)
+    years = {saturday.year, friday.year}
+    return any(
+        saturday <= holiday <= friday
+        for year in years
+        for holiday in holiday_dates(year)
+    )
+
+def holiday_flags(days: Iterable[DateLike]) -> np.ndarray:
+    """Evaluate ``is_holiday_week`` for a sequence of dates."""
+    return np.fromiter((is_holiday_week(d) for d in days), dtype=bool)
+
+def holiday_types(days) -> np.ndarray:
+    """
+    Vectorized version of the notebook's ``identify_holidays``.
+
+    Args:
+        days: Array-like of dates
+
+    Returns:
+        Array of holiday type labels ('Thanksgiving', 'Christmas', ...)
+    """
+    index = pd.DatetimeIndex(days)
+    month = index.month.to_numpy()
+    day = index.day.to_numpy()
+    conditions = [
+        (month == 11) & (day >= 22) & (day <= 28),
+        (month == 12) & (day >= 20),
+        (month == 1) & (day <= 7),
+        (month == 2) & (day >= 10) & (day <= 16),
+        (month == 7) & (day <= 7),
+        (month == 9) & (day <= 7)
+    ]
+    return np.select(conditions, HOLIDAY_TYPES[:-1], default='Regular')
+
+# Temporal features held by the calendar table, in column order
+CALENDAR_FEATURES = [
+    'Year', 'Month', 'Week', 'DayOfYear', 'Quarter', 'WeekOfYear',
+    'Month_sin', 'Month_cos', 'Week_sin', 'Week_cos', 'Days_Since_Start',
+    'Days_To_Christmas', 'Days_To_Thanksgiving',
+    'IsHoliday_x', 'IsHoliday_y', 'IsHoliday_int', 'Holiday_Type_Index'
+]
+
+def friday_of_week(weeks) -> np.ndarray:
+    """Inverse of ``week_numbers``: the week-ending Friday of each week number."""
+    return (np.asarray(weeks, dtype=np.int64) * 7 + 1).astype('datetime64[D]')
+
+def _days_to_holiday(fridays: pd.DatetimeIndex, month: int, day: int) -> np.ndarray:
+    """Vectorized version of the notebook's ``days_to_holiday``."""
+    years = fridays.year.to_numpy()
+    this_year = pd.to_datetime({'year': years, 'month': month, 'day': day})
+    next_year = pd.to_datetime({'year': years + 1, 'month': month, 'day': day})
+    days_to = (pd.DatetimeIndex(this_year) - fridays).days.to_numpy()
+    # If the holiday passed more than 30 days ago, count to next year's
+    days_next = (pd.DatetimeIndex(next_year) - fridays).days.to_numpy()
+    return np.where(days_to < -30, days_next, days_to)
+
+def _holiday_week_flags(fridays: np.ndarray) -> np.ndarray:
+    years = pd.DatetimeIndex(fridays).year
+    flagged = [
+        week_ending(holiday)
+        for year in range(int(years.min()) - 1, int(years.max()) + 2)
+        for holiday in holiday_dates(year)
+    ]
+    return np.isin(fridays, np.array(flagged, dtype='datetime64[D]'))
+
+def compute_calendar_features(weeks) -> np.ndarray:
+    """
+    Compute all temporal features for a set of week numbers.
+
+    Features are evaluated at the week-ending Friday, which is the date
+    every row of the training data carries.
+
+    Args:
+        weeks: Week numbers as returned by ``week_numbers``
+
+    Returns:
+        Array of shape (len(weeks), len(CALENDAR_FEATURES))
+    """
+    fridays = friday_of_week(weeks)
+    index = pd.DatetimeIndex(fridays)
+    month = index.month.to_numpy(dtype=np.float64)
+    week = index.isocalendar().week.to_numpy(dtype=np.float64)
+    start = np.datetime64(FEATURE_CONFIG["series_start"], 'D')
+    holiday = _holiday_week_flags(fridays).astype(np.float64)
+    holiday_type = pd.Index(HOLIDAY_TYPES).get_indexer(holiday_types(fridays))
+
+    columns = [
+        index.year.to_numpy(dtype=np.float64),
+        month,
+        week,
+        index.dayofyear.to_numpy(dtype=np.float64),
+        index.quarter.to_numpy(dtype=np.float64),
+        week,
+        np.sin(2 * np.pi * month / 12),
+        np.cos(2 * np.pi * month / 12),
+        np.sin(2 * np.pi * week / 52),
+        np.cos(2 * np.pi * week / 52),
+        (fridays - start).astype(np.float64),
+        _days_to_holiday(index, 12, 25),
+        _days_to_holiday(index, 11, 25),
+        holiday,
+        holiday,
+        holiday,
+        holiday_type
+    ]
+    return np.column_stack(columns).astype(np.float64)
+
+class CalendarTable:
+    """
+    Precomputed weekly calendar features.
+
+    ``matrix`` is a C-contiguous ``(n_weeks, len(CALENDAR_FEATURES))`` array
+    indexed by ``week_number - first_week``, so a whole batch is served by
+    a single row gather. Weeks outside the table are computed on the fly.
+    """
+
+    def __init__(self, years: Tuple[int, int] = FEATURE_CONFIG["calendar_years"]):
+        start_year, end_year = years
+        self.first_week = int(week_numbers([np.datetime64(f"{start_year}-01-01")])[0])
+        last_week = int(week_numbers([np.datetime64(f"{end_year}-12-31")])[0])
+        self.matrix = np.ascontiguousarray(
+            compute_calendar_features(np.arange(self.first_week, last_week + 1))
+        )
+        self.n_weeks = self.matrix.shape[0]
+        self.columns = {name: i for i, name in enumerate(CALENDAR_FEATURES)}
+
+    def rows(self, dates) -> np.ndarray:
+        """Gather the calendar feature rows for a batch of dates."""
+        offsets = week_numbers(dates) - self.first_week
+        in_range = (offsets >= 0) & (offsets < self.n_weeks)
+        rows = self.matrix[np.clip(offsets, 0, self.n_weeks - 1)]
+        if not in_range.all():
+            rows[~in_range] = compute_calendar_features(offsets[~in_range] + self.first_week)
+        return rows
+
+    def gather(self, dates) -> Dict[str, np.ndarray]:
+        """Gather the calendar features for a batch as named columns."""
+        rows = self.rows(dates)
+        return {name: rows[:, i] for name, i in self.columns.items()}
+
+    def holiday_flags(self, dates) -> np.ndarray:
+        """Holiday-week flags for a batch, read from the table."""
+        return self.rows(dates)[:, self.columns['IsHoliday_int']].astype(bool)
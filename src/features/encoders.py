@@ -0,0 +1,305 @@
+"""
+Compiled categorical encoders for batch feature generation.
+
+``label_encoders.pkl`` holds the sklearn ``LabelEncoder`` objects fitted in
+the feature engineering notebook. Calling ``transform`` on them per row is
+slow, so at load time they are compiled into sorted NumPy class arrays and
+encoded with ``searchsorted``. The frequency and target encodings of the
+high-cardinality interaction features are stored as arrays indexed by
+category code, with a dense index from the integer components of each
+category (e.g. Store x Dept) to its code.
+
+Usage:
+    python src/features/encoders.py   # build categorical_maps.npz
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import LABEL_ENCODERS_FILE, CATEGORY_MAPS_FILE
+from utils.logger import get_project_logger
+
+logger = get_project_logger("encoders")
+
+# Code returned for categories the encoder has never seen
+UNKNOWN_CODE = -1
+
+# Binning rules from the feature engineering notebook (pd.cut, right-closed)
+TEMP_BINS = ([32, 50, 70, 85], ['Freezing', 'Cold', 'Cool', 'Warm', 'Hot'])
+UNEMPLOYMENT_BINS = ([5, 7.5, 10], ['Low', 'Medium', 'High', 'Very_High'])
+
+# Integer components that identify each interaction category
+NOMINAL_COMPONENTS = {
+    'Store_Dept_ID': ('Store', 'Dept'),
+    'Type_Size_Interaction': ('Type_encoded', 'Size_Bin'),
+    'Holiday_Type_Interaction': ('Holiday_Type_encoded', 'Type_encoded'),
+    'Dept_Quarter_ID': ('Dept', 'Quarter')
+}
+
+class LabelLookup:
+    """Vectorized replacement for a fitted sklearn ``LabelEncoder``."""
+
+    def __init__(self, classes: Sequence[str], unknown_code: int = UNKNOWN_CODE):
+        classes = np.asarray(classes).astype(str)
+        order = np.argsort(classes, kind='stable')
+        self.classes = classes[order]
+        self.codes = order.astype(np.int64)
+        self.mapping = {label: int(code) for label, code in zip(self.classes, self.codes)}
+        self.unknown_code = unknown_code
+
+    @classmethod
+    def from_sklearn(cls, encoder, unknown_code: int = UNKNOWN_CODE) -> "LabelLookup":
+        """Compile a fitted ``LabelEncoder``."""
+        return cls(encoder.classes_, unknown_code)
+
+    def encode(self, values) -> np.ndarray:
+        """
+        Encode a batch of labels.
+
+        Args:
+            values: Array-like of labels
+
+        Returns:
+            Integer codes, ``unknown_code`` for unseen labels
+        """
+        values = np.asarray(values).astype(str)
+        if len(self.classes) == 0:
+            return np.full(values.shape, self.unknown_code, dtype=np.int64)
+        pos = np.searchsorted(self.classes, values)
+        pos = np.minimum(pos, len(self.classes) - 1)
+        known = self.classes[pos] == values
+        return np.where(known, self.codes[pos], self.unknown_code)
+
+    def encode_one(self, value) -> int:
+        """Encode a single label with a dict lookup."""
+        return self.mapping.get(str(value), self.unknown_code)
+
+class BinnedLookup:
+    """Encode a numeric column through ``pd.cut`` bins and a label encoder in one gather."""
+
+    def __init__(self, edges: Sequence[float], labels: Sequence[str], lookup: LabelLookup,
+                 lower_bound: Optional[float] = None):
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.lower_bound = lower_bound
+        # pd.cut yields NaN outside the bins, which the notebook encoded as 'nan'
+        self.label_codes = lookup.encode(list(labels) + ['nan'])
+
+    def encode(self, values) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        bins = np.digitize(values, self.edges, right=True)
+        missing = np.isnan(values)
+        if self.lower_bound is not None:
+            missing |= values <= self.lower_bound
+        bins[missing] = len(self.label_codes) - 1
+        return self.label_codes[bins]
+
+class FrequencyTargetLookup:
+    """
+    Frequency and target encodings of one interaction feature.
+
+    ``freq`` and ``target`` are indexed by category code and carry one extra
+    trailing slot for unknown categories, so code -1 needs no special case.
+    """
+
+    def __init__(self, index: np.ndarray, freq: np.ndarray, target: np.ndarray):
+        self.index = np.asarray(index, dtype=np.int32)
+        self.freq = np.asarray(freq, dtype=np.float64)
+        self.target = np.asarray(target, dtype=np.float64)
+
+    def codes(self, *components) -> np.ndarray:
+        """Map integer component arrays to category codes (-1 if unknown)."""
+        comps = [np.asarray(c, dtype=np.int64) for c in components]
+        valid = np.ones(np.broadcast(*comps).shape, dtype=bool)
+        for comp, size in zip(comps, self.index.shape):
+            valid &= (comp >= 0) & (comp < size)
+        clipped = tuple(np.where(valid, comp, 0) for comp in comps)
+        return np.where(valid, self.index[clipped], UNKNOWN_CODE)
+
+    def encode(self, *components) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (frequency, target_encoding) arrays for a batch."""
+        codes = self.codes(*components)
+        return self.freq[codes], self.target[codes]
+
+class CategoricalEncoders:
+    """Container for all compiled categorical encoders used at serving time."""
+
+    def __init__(self, labels: Dict[str, LabelLookup],
+                 nominal: Optional[Dict[str, FrequencyTargetLookup]] = None,
+                 size_bin_edges: Optional[np.ndarray] = None):
+        self.labels = labels
+        self.nominal = nominal or {}
+        self.size_bin_edges = size_bin_edges
+        empty = LabelLookup([])
+        self.temp_category = BinnedLookup(*TEMP_BINS, labels.get('Temp_Category', empty))
+        self.unemployment_category = BinnedLookup(
+            *UNEMPLOYMENT_BINS, labels.get('Unemployment_Category', empty), lower_bound=0.0
+        )
+
+    def __len__(self):
+        return len(self.labels)
+
+    @classmethod
+    def load(cls, encoders_path: Union[str, Path] = LABEL_ENCODERS_FILE,
+             maps_path: Union[str, Path] = CATEGORY_MAPS_FILE) -> "CategoricalEncoders":
+        """
+        Load and compile the label encoders and interaction maps.
+
+        Missing files yield empty lookups, which encode everything as unknown.
+        """
+        labels = {}
+        if Path(encoders_path).exists():
+            with open(encoders_path, 'rb') as f:
+                raw = joblib.load(f)
+            labels = {name: LabelLookup.from_sklearn(enc) for name, enc in raw.items()}
+
+        nominal, size_edges = {}, None
+        if Path(maps_path).exists():
+            nominal, size_edges = load_category_maps(maps_path)
+
+        return cls(labels, nominal, size_edges)
+
+    def save_arrays(self, directory: Union[str, Path]) -> List[str]:
+        """
+        Write every encoder as plain ``.npy`` arrays (no pickles).
+
+        Returns:
+            File names written, relative to ``directory``
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+        for name, lookup in self.labels.items():
+            # Original LabelEncoder order, so codes survive the round trip
+            arrays[f"labels__{name}"] = lookup.classes[np.argsort(lookup.codes)]
+        for feature, lookup in self.nominal.items():
+            arrays[f"{feature}__index"] = lookup.index
+            arrays[f"{feature}__freq"] = lookup.freq
+            arrays[f"{feature}__target"] = lookup.target
+        if self.size_bin_edges is not None:
+            arrays['size_bin_edges'] = np.asarray(self.size_bin_edges, dtype=np.float64)
+        for key, values in arrays.items():
+            np.save(directory / f"{key}.npy", values, allow_pickle=False)
+        return [f"{key}.npy" for key in arrays]
+
+    @classmethod
+    def load_arrays(cls, directory: Union[str, Path], mmap: bool = True) -> "CategoricalEncoders":
+        """Load encoders written by ``save_arrays``; large maps are memory-mapped."""
+        directory = Path(directory)
+        mode = 'r' if mmap else None
+        labels, nominal, size_edges = {}, {}, None
+        for path in sorted(directory.glob("*.npy")):
+            key = path.stem
+            if key.startswith("labels__"):
+                labels[key[len("labels__"):]] = LabelLookup(np.load(path, allow_pickle=False))
+            elif key.endswith("__index"):
+                feature = key[:-len("__index")]
+                nominal[feature] = FrequencyTargetLookup(
+                    np.load(path, mmap_mode=mode),
+                    np.load(directory / f"{feature}__freq.npy", mmap_mode=mode),
+                    np.load(directory / f"{feature}__target.npy", mmap_mode=mode)
+                )
+            elif key == 'size_bin_edges':
+                size_edges = np.load(path)
+        return cls(labels, nominal, size_edges)
+
+    def encode_label(self, feature: str, values) -> np.ndarray:
+        lookup = self.labels.get(feature)
+        if lookup is None:
+            return np.full(len(values), UNKNOWN_CODE, dtype=np.int64)
+        return lookup.encode(values)
+
+    def size_bins(self, sizes) -> np.ndarray:
+        """Bin store sizes with the edges ``pd.cut(Size, bins=3)`` used in training."""
+        sizes = np.asarray(sizes, dtype=np.float64)
+        if self.size_bin_edges is None:
+            return np.full(sizes.shape, UNKNOWN_CODE, dtype=np.int64)
+        bins = np.digitize(sizes, self.size_bin_edges[1:-1], right=True)
+        return np.where(np.isnan(sizes), UNKNOWN_CODE, bins)
+
+    def encode_nominal(self, feature: str, *components) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Return (frequency, target) encodings, NaN when the map is unavailable.
+
+        ``FeatureBuilder`` refuses feature lists that need a missing map, so
+        the NaN never reaches a model through it.
+        """
+        lookup = self.nominal.get(feature)
+        if lookup is None:
+            n = len(np.atleast_1d(components[0]))
+            return np.full(n, np.nan), np.full(n, np.nan)
+        return lookup.encode(*components)
+
+def build_category_maps(df: pd.DataFrame) -> Tuple[Dict[str, FrequencyTargetLookup], np.ndarray]:
+    """
+    Build the interaction feature maps from the processed training data.
+
+    Args:
+        df: Processed dataset with the encoded and ``*_freq``/``*_target_enc`` columns
+
+    Returns:
+        Tuple of (lookups by feature name, size bin edges)
+    """
+    df = df.copy()
+    size_bins, size_edges = pd.cut(df['Size'], bins=3, labels=False, retbins=True)
+    df['Size_Bin'] = size_bins
+    global_mean = float(df['Weekly_Sales'].mean())
+
+    nominal = {}
+    for feature, components in NOMINAL_COMPONENTS.items():
+        freq_col, target_col = f"{feature}_freq", f"{feature}_target_enc"
+        if freq_col in df.columns and target_col in df.columns:
+            grouped = df.groupby(list(components))[[freq_col, target_col]].first()
+        else:
+            grouped = df.groupby(list(components))['Weekly_Sales'].agg(['count', 'mean'])
+            grouped.columns = [freq_col, target_col]
+
+        keys = grouped.index.to_frame(index=False).to_numpy(dtype=np.int64)
+        shape = tuple(int(k) + 1 for k in keys.max(axis=0))
+        index = np.full(shape, UNKNOWN_CODE, dtype=np.int32)
+        index[tuple(keys.T)] = np.arange(len(keys), dtype=np.int32)
+
+        freq = np.append(grouped[freq_col].to_numpy(dtype=np.float64), 0.0)
+        target = np.append(grouped[target_col].to_numpy(dtype=np.float64), global_mean)
+        nominal[feature] = FrequencyTargetLookup(index, freq, target)
+        logger.info(f"Compiled {feature}: {len(keys)} categories")
+
+    return nominal, np.asarray(size_edges, dtype=np.float64)
+
+def save_category_maps(nominal: Dict[str, FrequencyTargetLookup], size_edges: np.ndarray,
+                       path: Union[str, Path] = CATEGORY_MAPS_FILE) -> None:
+    """Persist interaction maps as a single ``.npz`` archive."""
+    arrays = {'size_bin_edges': size_edges}
+    for feature, lookup in nominal.items():
+        arrays[f"{feature}__index"] = lookup.index
+        arrays[f"{feature}__freq"] = lookup.freq
+        arrays[f"{feature}__target"] = lookup.target
+    np.savez_compressed(path, **arrays)
+
+def load_category_maps(path: Union[str, Path] = CATEGORY_MAPS_FILE):
+    """Load interaction maps written by ``save_category_maps``."""
+    nominal = {}
+    with np.load(path) as data:
+        for feature in NOMINAL_COMPONENTS:
+            if f"{feature}__index" in data.files:
+                nominal[feature] = FrequencyTargetLookup(
+                    data[f"{feature}__index"], data[f"{feature}__freq"], data[f"{feature}__target"]
+                )
+        size_edges = data['size_bin_edges'] if 'size_bin_edges' in data.files else None
+    return nominal, size_edges
+
+if __name__ == "__main__":
+    from data.data_loader import DataLoader
+
+    processed = DataLoader().load_processed_data()
+    if processed is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+    maps, edges = build_category_maps(processed)
+    save_category_maps(maps, edges)
+    logger.info(f"Category maps saved to {CATEGORY_MAPS_FILE}")
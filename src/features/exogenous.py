@@ -0,0 +1,185 @@
+"""
+Exogenous feature index over ``features.csv`` and ``stores.csv``.
+
+The weekly store-level signals (temperature, fuel price, markdowns, CPI,
+unemployment) are pivoted into dense ``(store, week)`` arrays so that
+missing request fields can be filled for a whole batch with one fancy
+index per column. Weeks past the end of the file are forward-filled by
+clamping to the last known week; markdowns are promotional events and
+are treated as zero outside the known range instead. The index also
+serves the lag context of the derived features (previous-week values and
+per-store monthly average temperature).
+"""
+
+import sys
+import warnings
+from pathlib import Path
+from typing import Dict, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import FEATURES_FILE, STORES_FILE
+from .calendar import friday_of_week, week_numbers
+
+FORWARD_FILL_COLUMNS = ['Temperature', 'Fuel_Price', 'CPI', 'Unemployment']
+MARKDOWN_COLUMNS = [f"MarkDown{i}" for i in range(1, 6)]
+EXOGENOUS_COLUMNS = FORWARD_FILL_COLUMNS + MARKDOWN_COLUMNS
+
+class ExogenousIndex:
+    """
+    Dense per-store, per-week lookup of exogenous features.
+
+    Each column is an array of shape ``(max_store + 1, n_weeks)``. Row 0
+    holds the cross-store median and serves stores missing from the data.
+    Store attributes (``Size``, ``Type``) are arrays indexed by store id.
+    ``monthly_temperature`` has shape ``(max_store + 1, 13)`` and holds each
+    store's mean temperature per calendar month (column 0 unused).
+    """
+
+    def __init__(self, first_week: int, values: Dict[str, np.ndarray],
+                 store_size: np.ndarray, store_type: np.ndarray):
+        self.first_week = int(first_week)
+        self.values = {name: np.ascontiguousarray(arr, dtype=np.float64) for name, arr in values.items()}
+        self.store_size = np.asarray(store_size, dtype=np.float64)
+        self.store_type = np.asarray(store_type).astype(str)
+        self.max_store = len(self.store_size) - 1
+        self.n_weeks = next(iter(self.values.values())).shape[1]
+        self.monthly_temperature = self._monthly_means(self.values['Temperature'])
+
+    def _monthly_means(self, grid: np.ndarray) -> np.ndarray:
+        fridays = friday_of_week(self.first_week + np.arange(self.n_weeks))
+        months = fridays.astype('datetime64[M]').astype(np.int64) % 12 + 1
+        means = np.zeros((grid.shape[0], 13))
+        for month in np.unique(months):
+            means[:, month] = grid[:, months == month].mean(axis=1)
+        return means
+
+    @classmethod
+    def from_frames(cls, features_df: pd.DataFrame, stores_df: pd.DataFrame) -> "ExogenousIndex":
+        """
+        Build the index from the raw features and stores frames.
+
+        Args:
+            features_df: Contents of ``features.csv``
+            stores_df: Contents of ``stores.csv``
+
+        Returns:
+            Populated ExogenousIndex
+        """
+        weeks = week_numbers(pd.to_datetime(features_df['Date']).to_numpy())
+        first_week = int(weeks.min())
+        n_weeks = int(weeks.max()) - first_week + 1
+        max_store = int(max(features_df['Store'].max(), stores_df['Store'].max()))
+
+        stores = features_df['Store'].to_numpy(dtype=np.int64)
+        cols = weeks - first_week
+        values = {}
+        for name in EXOGENOUS_COLUMNS:
+            grid = np.full((max_store + 1, n_weeks), np.nan)
+            if name in features_df.columns:
+                grid[stores, cols] = features_df[name].to_numpy(dtype=np.float64)
+            if name in FORWARD_FILL_COLUMNS:
+                grid = _fill_along_weeks(grid)
+            else:
+                grid = np.nan_to_num(grid, nan=0.0)
+            # Row 0: cross-store fallback for unknown stores
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=RuntimeWarning)
+                grid[0] = np.nanmedian(grid[1:], axis=0)
+            values[name] = np.nan_to_num(grid, nan=0.0)
+
+        store_size = np.full(max_store + 1, np.nan)
+        store_type = np.full(max_store + 1, 'nan', dtype=object)
+        store_ids = stores_df['Store'].to_numpy(dtype=np.int64)
+        store_size[store_ids] = stores_df['Size'].to_numpy(dtype=np.float64)
+        store_type[store_ids] = stores_df['Type'].astype(str).to_numpy()
+
+        return cls(first_week, values, store_size, store_type)
+
+    @classmethod
+    def from_csv(cls, features_path: Union[str, Path] = FEATURES_FILE,
+                 stores_path: Union[str, Path] = STORES_FILE) -> "ExogenousIndex":
+        """Build the index straight from the raw CSV files."""
+        return cls.from_frames(pd.read_csv(features_path), pd.read_csv(stores_path))
+
+    def _positions(self, store_ids, dates):
+        stores = np.asarray(store_ids, dtype=np.int64)
+        stores = np.where((stores > 0) & (stores <= self.max_store), stores, 0)
+        offsets = week_numbers(dates) - self.first_week
+        in_range = (offsets >= 0) & (offsets < self.n_weeks)
+        return stores, np.clip(offsets, 0, self.n_weeks - 1), in_range
+
+    def lookup(self, store_ids, dates) -> Dict[str, np.ndarray]:
+        """
+        Gather all exogenous columns for a batch.
+
+        Args:
+            store_ids: Store id per row
+            dates: Date per row
+
+        Returns:
+            Column arrays keyed by feature name, plus ``Size`` and ``Type``
+        """
+        stores, weeks, in_range = self._positions(store_ids, dates)
+        columns = {}
+        for name, grid in self.values.items():
+            gathered = grid[stores, weeks]
+            if name not in FORWARD_FILL_COLUMNS:
+                gathered = np.where(in_range, gathered, 0.0)
+            columns[name] = gathered
+        columns['Size'] = self.store_size[stores]
+        columns['Type'] = self.store_type[stores]
+        return columns
+
+    def previous(self, name: str, store_ids, dates, lags: int = 1) -> np.ndarray:
+        """
+        Values of a forward-filled column in the weeks before each row's week.
+
+        Weeks before the first known week take the first known value and
+        weeks past the end the last known one.
+
+        Returns:
+            Array of shape (rows, lags), most recent week first
+        """
+        stores, _, _ = self._positions(store_ids, dates)
+        offsets = week_numbers(dates) - self.first_week
+        weeks = np.clip(offsets[:, None] - np.arange(1, lags + 1), 0, self.n_weeks - 1)
+        return self.values[name][stores[:, None], weeks]
+
+    def monthly_temperature_for(self, store_ids, months) -> np.ndarray:
+        """Mean temperature of each row's store in the row's calendar month."""
+        stores = np.asarray(store_ids, dtype=np.int64)
+        stores = np.where((stores > 0) & (stores <= self.max_store), stores, 0)
+        return self.monthly_temperature[stores, np.asarray(months, dtype=np.int64)]
+
+    def fill(self, batch: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        Fill missing (NaN) exogenous fields of a batch from the index.
+
+        Values supplied by the client always take precedence.
+        """
+        n = len(batch['Store'])
+        looked_up = self.lookup(batch['Store'], batch['Date'])
+        filled = dict(batch)
+        for name in EXOGENOUS_COLUMNS:
+            supplied = np.asarray(batch.get(name, np.full(n, np.nan)), dtype=np.float64)
+            filled[name] = np.where(np.isnan(supplied), looked_up[name], supplied)
+        filled.setdefault('Size', looked_up['Size'])
+        filled.setdefault('Type', looked_up['Type'])
+        return filled
+
+def _fill_along_weeks(grid: np.ndarray) -> np.ndarray:
+    """Forward-fill then back-fill NaNs along the week axis of each store row."""
+    n_weeks = grid.shape[1]
+    idx = np.where(np.isnan(grid), 0, np.arange(n_weeks))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    filled = grid[np.arange(grid.shape[0])[:, None], idx]
+
+    # Leading NaNs take the first observed value of the row
+    reversed_grid = filled[:, ::-1]
+    idx = np.where(np.isnan(reversed_grid), 0, np.arange(n_weeks))
+    np.maximum.accumulate(idx, axis=1, out=idx)
+    return reversed_grid[np.arange(grid.shape[0])[:, None], idx][:, ::-1]
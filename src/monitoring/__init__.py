@@ -0,0 +1,20 @@
+"""
+Runtime monitoring: hot-path timing metrics, their persistence, sampled
+request profiling and input drift detection.
+"""
+
+from .metrics import Histogram, MetricsRegistry, registry
+from .snapshots import MetricsFlusher
+from .profiling import RequestProfiler, collapsed_stacks
+from .drift import DriftMonitor, DriftReference
+
+__all__ = [
+    'Histogram',
+    'MetricsRegistry',
+    'registry',
+    'MetricsFlusher',
+    'RequestProfiler',
+    'collapsed_stacks',
+    'DriftMonitor',
+    'DriftReference'
+]
@@ -0,0 +1,211 @@
+"""
+Drift monitoring of client-supplied inputs against the training distribution.
+
+Every monitored feature keeps a fixed-size histogram whose bin edges are
+quantiles of the training data (``train_processed.csv``). Memory is
+constant however much traffic is observed, and updating a batch costs
+one ``searchsorted`` and one ``bincount`` per feature. Two scores compare
+the live histogram with the reference proportions:
+
+- PSI (population stability index) over the bins
+- KS: the largest CDF gap at the bin edges, a lower bound on the exact
+  two-sample statistic
+
+Only values the client actually sent are observed. Omitted fields are
+NaN in the request batch and skipped, before the feature builder fills them
+from the historical store x week index; otherwise the histograms would
+mostly measure that index.
+
+Live counts decay by ``decay`` per ``interval_s`` seconds. The decay is
+applied from the elapsed time whenever counts are read or updated, so the
+scores follow recent traffic whether or not snapshots are flushed.
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from features.exogenous import FORWARD_FILL_COLUMNS, MARKDOWN_COLUMNS
+
+DRIFT_FEATURES = FORWARD_FILL_COLUMNS + MARKDOWN_COLUMNS
+
+# Floor for empty bins in the PSI log ratio
+PSI_EPSILON = 1e-4
+
+# Conventional PSI bands: below 0.1 stable, above 0.25 significant
+PSI_THRESHOLDS = (0.1, 0.25)
+
+def bin_index(edges: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Bin of each value; ``len(edges) + 1`` bins including both open ends."""
+    return np.searchsorted(edges, values, side='right')
+
+def population_stability_index(expected: np.ndarray, actual: np.ndarray) -> float:
+    """PSI between two bin-proportion vectors."""
+    expected = np.maximum(expected, PSI_EPSILON)
+    actual = np.maximum(actual, PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def ks_statistic(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Largest gap between the cumulative bin proportions."""
+    return float(np.max(np.abs(np.cumsum(actual) - np.cumsum(expected))))
+
+def drift_status(psi: float) -> str:
+    if psi < PSI_THRESHOLDS[0]:
+        return 'stable'
+    if psi < PSI_THRESHOLDS[1]:
+        return 'moderate'
+    return 'significant'
+
+class DriftReference:
+    """
+    Reference bin edges and proportions per feature.
+
+    Args:
+        edges: Feature name -> sorted unique bin edges
+        proportions: Feature name -> reference share of each of the
+            ``len(edges) + 1`` bins
+        rows: Number of reference rows the proportions came from
+    """
+
+    def __init__(self, edges: Dict[str, np.ndarray], proportions: Dict[str, np.ndarray], rows: int):
+        self.edges = {name: np.asarray(values, dtype=np.float64) for name, values in edges.items()}
+        self.proportions = {name: np.asarray(values, dtype=np.float64) for name, values in proportions.items()}
+        self.rows = int(rows)
+
+    @property
+    def features(self) -> List[str]:
+        return list(self.edges)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, features: Sequence[str] = DRIFT_FEATURES,
+                   bins: int = 20) -> "DriftReference":
+        """
+        Compute quantile bins and proportions from training data.
+
+        Args:
+            df: Training frame (``train_processed.csv``)
+            features: Columns to monitor; missing ones are skipped
+            bins: Number of quantile bins (fewer for columns with heavy ties)
+        """
+        edges, proportions = {}, {}
+        for name in features:
+            if name not in df.columns:
+                continue
+            values = pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=np.float64)
+            values = values[np.isfinite(values)]
+            if len(values) == 0:
+                continue
+            # Interior quantiles only: the outer bins are open-ended
+            edges[name] = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+            counts = np.bincount(bin_index(edges[name], values), minlength=len(edges[name]) + 1)
+            proportions[name] = counts / counts.sum()
+        return cls(edges, proportions, len(df))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "DriftReference":
+        with np.load(path) as data:
+            features = [str(name) for name in data['features']]
+            return cls(
+                {name: data[f"edges__{name}"] for name in features},
+                {name: data[f"proportions__{name}"] for name in features},
+                int(data['rows'])
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {'features': np.array(self.features), 'rows': np.int64(self.rows)}
+        for name in self.features:
+            arrays[f"edges__{name}"] = self.edges[name]
+            arrays[f"proportions__{name}"] = self.proportions[name]
+        np.savez(path, **arrays)
+
+class DriftMonitor:
+    """
+    Streaming histograms of client-supplied input values and their drift scores.
+
+    Args:
+        reference: Training reference distributions
+        decay: Share of the live counts kept per ``interval_s`` seconds
+        interval_s: Decay period (0 disables the decay)
+        min_observations: Live rows needed before a feature is scored
+        clock: Monotonic time source
+    """
+
+    def __init__(self, reference: DriftReference, decay: float = 0.5, interval_s: float = 60.0,
+                 min_observations: int = 100, clock: Callable[[], float] = time.monotonic):
+        self.reference = reference
+        self.features = reference.features
+        self.decay = decay
+        self.interval_s = interval_s
+        self.min_observations = min_observations
+        self.counts = {name: np.zeros(len(reference.edges[name]) + 1) for name in self.features}
+        self._clock = clock
+        self._decayed_at = clock()
+        self._lock = threading.Lock()
+
+    def _apply_decay(self) -> None:
+        """Decay the counts for the time since the last update; call with the lock held."""
+        now = self._clock()
+        if self.interval_s > 0 and now > self._decayed_at:
+            factor = self.decay ** ((now - self._decayed_at) / self.interval_s)
+            for counts in self.counts.values():
+                counts *= factor
+        self._decayed_at = now
+
+    def observe(self, batch: Mapping[str, np.ndarray]) -> None:
+        """
+        Add the client-supplied values of a request batch to the histograms.
+
+        Args:
+            batch: Column arrays before exogenous filling; NaN marks an omitted value
+        """
+        updates = {}
+        for name in self.features:
+            if name not in batch:
+                continue
+            values = np.asarray(batch[name], dtype=np.float64)
+            values = values[np.isfinite(values)]
+            if len(values):
+                updates[name] = np.bincount(bin_index(self.reference.edges[name], values),
+                                            minlength=len(self.counts[name]))
+        with self._lock:
+            self._apply_decay()
+            for name, counts in updates.items():
+                self.counts[name] += counts
+
+    def scores(self) -> Dict[str, Dict]:
+        """PSI, KS and live weight per feature; scores are None until enough rows arrive."""
+        with self._lock:
+            self._apply_decay()
+            counts = {name: values.copy() for name, values in self.counts.items()}
+        result = {}
+        for name, live in counts.items():
+            observed = float(live.sum())
+            entry = {'observed': observed, 'psi': None, 'ks': None, 'status': 'insufficient_data'}
+            if observed >= self.min_observations:
+                expected = self.reference.proportions[name]
+                psi = population_stability_index(expected, live / observed)
+                entry.update(psi=psi, ks=ks_statistic(expected, live / observed), status=drift_status(psi))
+            result[name] = entry
+        return result
+
+    def snapshot(self) -> List[Dict]:
+        """Snapshot rows for ``MetricsFlusher``."""
+        return [
+            {'metric': 'feature_drift_psi', 'value': entry['psi'], 'labels': {'feature': name},
+             'ks': entry['ks'], 'observed': entry['observed'], 'status': entry['status']}
+            for name, entry in self.scores().items() if entry['psi'] is not None
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            for counts in self.counts.values():
+                counts[:] = 0
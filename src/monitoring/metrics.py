@@ -0,0 +1,244 @@
+"""
+Lightweight in-process metrics for the serving hot path.
+
+Timers record into fixed-bucket histograms keyed by metric name and
+labels (stage, model, endpoint). Recording is a bisect plus a few integer
+updates under a lock, so it is cheap enough to wrap every stage of every
+request. Histograms are exposed in Prometheus text format and can be
+condensed into per-interval snapshots for the ``system_metrics`` table.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds in seconds, from 50us to 10s
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Set by TimingMiddleware when a request arrives, read by handlers to time parsing
+request_start: contextvars.ContextVar = contextvars.ContextVar("request_start", default=None)
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+class Histogram:
+    """Cumulative-bucket histogram of observed durations (seconds)."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float, counts: Optional[List[int]] = None) -> float:
+        """Estimate a quantile by linear interpolation inside the bucket."""
+        counts = counts if counts is not None else self.counts
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        cumulative = 0
+        for i, c in enumerate(counts):
+            if cumulative + c >= rank and c > 0:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / c
+            cumulative += c
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """Thread-safe registry of histograms and counters."""
+
+    def __init__(self, namespace: str = "walmart", buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self.counters: Dict[str, Dict[LabelKey, float]] = {}
+        self.help: Dict[str, str] = {}
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._flushed: Dict[Tuple[str, LabelKey], Tuple[List[int], float]] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = Histogram(self.buckets)
+            hist.observe(value)
+
+    def increment(self, name: str, amount: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + amount
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Time a block and record it in the ``name`` histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def observe_since_request_start(self, name: str, **labels) -> None:
+        """Record the time elapsed since the middleware saw the request."""
+        start = request_start.get()
+        if start is not None:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timed(self, name: str, **labels):
+        """Decorator version of ``timer`` for sync and async functions."""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with self.timer(name, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def render_prometheus(self) -> str:
+        """Render all series in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                full = f"{self.namespace}_{name}"
+                if name in self.help:
+                    lines.append(f"# HELP {full} {self.help[name]}")
+                lines.append(f"# TYPE {full} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{full}{_format_labels(key)} {value:g}")
+
+            for name, series in sorted(self.histograms.items()):
+                full = f"{self.namespace}_{name}"
+                if name in self.help:
+                    lines.append(f"# HELP {full} {self.help[name]}")
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{full}_bucket{_format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{full}_bucket{_format_labels(key, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist.sum:.9g}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self, since_last: bool = True) -> List[Dict]:
+        """
+        Summarize every histogram series.
+
+        Args:
+            since_last: Only report observations made since the previous
+                ``snapshot(since_last=True)`` call
+
+        Returns:
+            One dict per series with count, mean and p50/p95/p99 in milliseconds
+        """
+        rows = []
+        with self._lock:
+            for name, series in self.histograms.items():
+                for key, hist in series.items():
+                    counts, total = list(hist.counts), hist.sum
+                    if since_last:
+                        prev_counts, prev_total = self._flushed.get((name, key), ([0] * len(counts), 0.0))
+                        self._flushed[(name, key)] = (counts, total)
+                        counts = [c - p for c, p in zip(counts, prev_counts)]
+                        total -= prev_total
+                    count = sum(counts)
+                    if count == 0:
+                        continue
+                    rows.append({
+                        'metric': name,
+                        'labels': dict(key),
+                        'count': count,
+                        'mean_ms': total / count * 1000,
+                        'p50_ms': hist.quantile(0.50, counts) * 1000,
+                        'p95_ms': hist.quantile(0.95, counts) * 1000,
+                        'p99_ms': hist.quantile(0.99, counts) * 1000
+                    })
+            for name, series in self.counters.items():
+                for key, value in series.items():
+                    rows.append({'metric': name, 'labels': dict(key), 'value': value})
+        return rows
+
+class TimingMiddleware:
+    """
+    Pure ASGI middleware recording end-to-end latency per route.
+
+    Routes are labelled by their path template, so path parameters and
+    unmatched URLs cannot blow up the number of series.
+    """
+
+    def __init__(self, app, registry: "MetricsRegistry", metric: str = "request_duration_seconds"):
+        self.app = app
+        self.registry = registry
+        self.metric = metric
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        token = request_start.set(start)
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_start.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                endpoint = route.path
+            else:
+                endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            self.registry.observe(
+                self.metric, time.perf_counter() - start,
+                endpoint=endpoint, method=scope["method"], status=status[0]
+            )
+
+# Process-wide registry used by the API
+registry = MetricsRegistry()
@@ -0,0 +1,220 @@
+"""
+Opt-in cProfile sampling of API requests.
+
+A configurable fraction of calls to decorated handlers run under
+``cProfile``; the resulting stats are merged per endpoint in memory and
+can be exported as text, as a binary pstats dump (for snakeviz and
+friends) or as collapsed stacks for flamegraph tools. When profiling is
+disabled the decorator costs a single attribute check per request.
+
+Only one profile runs at a time: a request arriving while another one is
+being profiled (or a nested handler call) simply runs unprofiled.
+
+cProfile only records the thread it was enabled on. Work a profiled
+request hands to a worker thread is wrapped with ``profiled_in_thread``,
+which profiles it in that thread and adds the result to the request's
+profile.
+"""
+
+import contextvars
+import cProfile
+import functools
+import io
+import marshal
+import pstats
+import random
+import threading
+from typing import Dict, List, Optional, Tuple
+
+FunctionKey = Tuple[str, int, str]
+
+# Worker-thread profiles of the current request while it is profiled, None otherwise
+profiling_request: contextvars.ContextVar = contextvars.ContextVar("profiling_request", default=None)
+
+def profiled_in_thread(func):
+    """
+    Wrap ``func`` to run under its own cProfile in a worker thread when the calling request is profiled.
+
+    Call this on the handler side (before ``asyncio.to_thread``). Outside a
+    profiled request ``func`` is returned unchanged.
+    """
+    workers = profiling_request.get()
+    if workers is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ allows one profiler per interpreter, and that one sees every thread
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            workers.append(profile)
+    return wrapper
+
+def _frame_name(func: FunctionKey) -> str:
+    filename, line, name = func
+    if filename == '~':
+        # Built-ins are recorded as ('~', 0, "<built-in method ...>")
+        return name
+    return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+def collapsed_stacks(stats: pstats.Stats, min_weight_us: int = 1, max_depth: int = 64) -> List[str]:
+    """
+    Approximate collapsed stacks (``a;b;c weight``) from a cProfile call graph.
+
+    cProfile only records caller -> callee edges, so a callee's time is split
+    across the paths reaching its caller in proportion to that caller's time
+    on each path, as flameprof and gprof2dot do. Weights are in microseconds.
+
+    Args:
+        stats: Aggregated profile
+        min_weight_us: Paths with less inclusive time than this are pruned
+        max_depth: Maximum stack depth followed
+
+    Returns:
+        One collapsed-stack line per path with non-zero self time
+    """
+    entries = stats.stats
+    children: Dict[FunctionKey, List[Tuple[FunctionKey, float]]] = {}
+    for callee, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            children.setdefault(caller, []).append((callee, edge[3]))
+
+    totals: Dict[str, float] = {}
+
+    def walk(func: FunctionKey, path: List[str], visiting: set, inclusive: float):
+        _, _, self_time, cumulative, _ = entries[func]
+        scale = inclusive / cumulative if cumulative > 0 else 0.0
+        path = path + [_frame_name(func)]
+        if self_time * scale * 1e6 >= 0.5:
+            key = ';'.join(path)
+            totals[key] = totals.get(key, 0.0) + self_time * scale * 1e6
+        if len(path) >= max_depth:
+            return
+        visiting.add(func)
+        for callee, edge_cumulative in children.get(func, ()):
+            share = edge_cumulative * scale
+            if callee in visiting or callee not in entries or share * 1e6 < min_weight_us:
+                continue
+            walk(callee, path, visiting, share)
+        visiting.discard(func)
+
+    roots = [func for func, entry in entries.items() if not entry[4]]
+    for root in roots:
+        walk(root, [], set(), entries[root][3])
+
+    return [f"{stack} {int(round(weight))}" for stack, weight in sorted(totals.items()) if weight >= 1]
+
+class RequestProfiler:
+    """
+    Samples handler calls under cProfile and aggregates stats per endpoint.
+
+    Args:
+        enabled: Whether sampling is active
+        sample_rate: Fraction of calls profiled while enabled
+    """
+
+    def __init__(self, enabled: bool = False, sample_rate: float = 0.01):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.stats: Dict[str, pstats.Stats] = {}
+        self.profiled: Dict[str, int] = {}
+        self._active = threading.Lock()
+        self._merge = threading.Lock()
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None) -> None:
+        if enabled is not None:
+            self.enabled = enabled
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+
+    def reset(self) -> None:
+        with self._merge:
+            self.stats.clear()
+            self.profiled.clear()
+
+    def _record(self, endpoint: str, profile: cProfile.Profile, *workers: cProfile.Profile) -> None:
+        with self._merge:
+            if endpoint in self.stats:
+                self.stats[endpoint].add(profile, *workers)
+            else:
+                self.stats[endpoint] = pstats.Stats(profile, *workers)
+            self.profiled[endpoint] = self.profiled.get(endpoint, 0) + 1
+
+    def _should_sample(self) -> bool:
+        return self.enabled and random.random() < self.sample_rate
+
+    def profile(self, endpoint: str):
+        """Decorator sampling an async handler under cProfile."""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self._should_sample() or not self._active.acquire(blocking=False):
+                    return await func(*args, **kwargs)
+                # This profile records whatever the event loop runs while the
+                # handler awaits, other requests included. Batch scoring runs in
+                # a worker thread and is profiled there (``profiled_in_thread``)
+                profile, workers = cProfile.Profile(), []
+                token = profiling_request.set(workers)
+                try:
+                    profile.enable()
+                    try:
+                        return await func(*args, **kwargs)
+                    finally:
+                        profile.disable()
+                        profiling_request.reset(token)
+                finally:
+                    self._active.release()
+                    self._record(endpoint, profile, *workers)
+            return wrapper
+        return decorator
+
+    def _combined(self, endpoint: Optional[str]) -> Optional[pstats.Stats]:
+        with self._merge:
+            if endpoint:
+                selected = [self.stats[endpoint]] if endpoint in self.stats else []
+            else:
+                selected = list(self.stats.values())
+            if not selected:
+                return None
+            combined = pstats.Stats()
+            combined.add(*selected)
+            return combined
+
+    def status(self) -> Dict:
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'profiled_requests': dict(self.profiled)
+        }
+
+    def report_text(self, endpoint: Optional[str] = None, sort: str = 'cumulative',
+                    limit: int = 50) -> str:
+        """Human-readable ``pstats`` listing of the top functions."""
+        stats = self._combined(endpoint)
+        if stats is None:
+            return "No profiles recorded\n"
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
+
+    def report_pstats(self, endpoint: Optional[str] = None) -> bytes:
+        """Binary pstats dump, loadable with ``pstats.Stats(path)``."""
+        stats = self._combined(endpoint)
+        return marshal.dumps(stats.stats if stats is not None else {})
+
+    def report_collapsed(self, endpoint: Optional[str] = None) -> str:
+        """Collapsed stacks for flamegraph.pl / speedscope."""
+        stats = self._combined(endpoint)
+        if stats is None:
+            return ""
+        return "\n".join(collapsed_stacks(stats)) + "\n"
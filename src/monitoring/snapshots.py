@@ -0,0 +1,92 @@
+"""
+Periodic flushing of aggregated metric snapshots into ``system_metrics``.
+
+One row is written per metric series per interval (not per request), and
+the database write runs in a worker thread so the event loop never blocks
+on it. If the database is unreachable the snapshot is dropped and the
+flusher keeps running.
+"""
+
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.logger import get_project_logger
+
+from .metrics import MetricsRegistry
+
+logger = get_project_logger("metrics_flusher")
+
+SnapshotSource = Callable[[], List[Dict]]
+
+class MetricsFlusher:
+    """Background task that writes metric snapshots to the database."""
+
+    def __init__(self, registry: MetricsRegistry, interval_s: float = 60.0):
+        self.registry = registry
+        self.interval_s = interval_s
+        self.sources: List[SnapshotSource] = [registry.snapshot]
+        self._task: Optional[asyncio.Task] = None
+        self._db_warning_logged = False
+
+    def add_source(self, source: SnapshotSource) -> None:
+        """Register an extra callable returning snapshot rows."""
+        self.sources.append(source)
+
+    def collect(self) -> List[Dict]:
+        rows = []
+        for source in self.sources:
+            try:
+                rows.extend(source())
+            except Exception as e:
+                logger.warning(f"Metric snapshot source failed: {e}")
+        return rows
+
+    def write(self, rows: List[Dict]) -> int:
+        """Persist snapshot rows as SystemMetric records; returns rows written."""
+        if not rows:
+            return 0
+        try:
+            from database import SystemMetric, get_db_session
+            recorded_at = datetime.now()
+            with get_db_session() as db:
+                for row in rows:
+                    data = {k: v for k, v in row.items() if k != 'metric'}
+                    data['window_s'] = self.interval_s
+                    db.add(SystemMetric(
+                        metric_name=row['metric'],
+                        metric_value=row.get('mean_ms', row.get('value')),
+                        metric_data=data,
+                        recorded_at=recorded_at
+                    ))
+            self._db_warning_logged = False
+            return len(rows)
+        except Exception as e:
+            if not self._db_warning_logged:
+                logger.warning(f"Could not write metric snapshot to database: {e}")
+                self._db_warning_logged = True
+            return 0
+
+    async def flush(self) -> int:
+        rows = self.collect()
+        return await asyncio.to_thread(self.write, rows)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            await self.flush()
+
+    def start(self) -> None:
+        if self._task is None and self.interval_s > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the loop and write a final snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+            await self.flush()
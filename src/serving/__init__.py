@@ -0,0 +1,21 @@
+"""
+Serving-time components for the prediction API.
+"""
+
+from .intervals import IntervalTable
+from .baseline import BaselineTable
+from .hierarchy import Hierarchy, HierarchyModel
+from .scenarios import Perturbation, Scenario, ScenarioEngine
+from . import columnar, streaming
+
+__all__ = [
+    'IntervalTable',
+    'BaselineTable',
+    'Hierarchy',
+    'HierarchyModel',
+    'Perturbation',
+    'Scenario',
+    'ScenarioEngine',
+    'columnar',
+    'streaming'
+]
@@ -0,0 +1,303 @@
+"""
+Rate limiting and admission control for the prediction endpoints.
+
+- ``RateLimitMiddleware`` applies a token bucket per client and endpoint
+  before the request body is read. Buckets live in process
+  (``TokenBucketLimiter``) or in Redis (``RedisTokenBucketLimiter``) so
+  that all workers share them.
+- ``AdmissionController`` bounds the scoring work in flight, measured in
+  cost units (rows x models evaluated). Requests that do not fit wait in
+  one of two queues: interactive requests (small cost) are granted before
+  batches, and every ``batch_share``-th grant goes to the oldest waiting
+  batch so large jobs keep moving under sustained interactive load.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Mapping, Optional, Tuple
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+def redis_available() -> bool:
+    return aioredis is not None
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets keyed by an arbitrary string.
+
+    Args:
+        max_keys: Buckets kept before full (idle) ones are pruned
+        clock: Monotonic time source
+    """
+
+    def __init__(self, max_keys: int = 100000, clock: Callable[[], float] = time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        """
+        Take ``cost`` tokens from the bucket refilled at ``rate`` per second up to ``burst``.
+
+        Returns:
+            0 when allowed, otherwise the seconds until enough tokens are available
+        """
+        now = self._clock()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._prune(now, rate, burst)
+                bucket = self._buckets[key] = [burst, now]
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens >= cost:
+                bucket[0] = tokens - cost
+                return 0.0
+            bucket[0] = tokens
+            return (cost - tokens) / rate
+
+    def _prune(self, now: float, rate: float, burst: float) -> None:
+        full = [key for key, (tokens, last) in self._buckets.items() if tokens + (now - last) * rate >= burst]
+        for key in full:
+            del self._buckets[key]
+
+# Atomic refill-and-take; uses the Redis clock so workers on different hosts agree
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisTokenBucketLimiter:
+    """
+    Token buckets shared by all workers through Redis.
+
+    Falls back to an in-process limiter while Redis is unreachable, so an
+    outage loosens limits to per-worker instead of failing requests.
+
+    Args:
+        url: Redis connection URL
+        prefix: Key prefix for the bucket hashes
+    """
+
+    def __init__(self, url: str, prefix: str = "ratelimit:"):
+        if aioredis is None:
+            raise RuntimeError("The redis backend requires the redis package")
+        self.client = aioredis.from_url(url, socket_timeout=0.05, socket_connect_timeout=0.05)
+        self.prefix = prefix
+        self.fallback = TokenBucketLimiter()
+        self._script = self.client.register_script(_TAKE_SCRIPT)
+        self.errors = 0
+
+    async def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> float:
+        try:
+            return float(await self._script(keys=[self.prefix + key], args=[rate, burst, cost]))
+        except Exception:
+            self.errors += 1
+            return await self.fallback.take(key, rate, burst, cost)
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware answering 429 once a client's bucket for a path is empty.
+
+    Clients are identified by ``client_header`` (an API key) when present,
+    otherwise by their address.
+
+    Args:
+        app: Wrapped ASGI application
+        limiter: ``TokenBucketLimiter`` or ``RedisTokenBucketLimiter``
+        limits: Path -> (requests per second, burst); other paths are not limited
+        client_header: Header identifying the client
+        registry: Optional metrics registry counting ``rate_limited_total``
+    """
+
+    def __init__(self, app, limiter, limits: Mapping[str, Tuple[float, float]],
+                 client_header: str = "x-api-key", registry=None):
+        self.app = app
+        self.limiter = limiter
+        self.limits = dict(limits)
+        self.client_header = client_header.lower().encode()
+        self.registry = registry
+        self.rejected = 0
+
+    def client_id(self, scope) -> str:
+        for name, value in scope.get("headers", ()):
+            if name == self.client_header:
+                return "key:" + value.decode("latin-1")
+        client = scope.get("client")
+        return "addr:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        rate, burst = limit
+        wait = await self.limiter.take(f"{self.client_id(scope)}:{scope['path']}", rate, burst)
+        if wait <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        self.rejected += 1
+        if self.registry is not None:
+            self.registry.increment("rate_limited_total", endpoint=scope["path"])
+        body = json.dumps({"detail": "Rate limit exceeded"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(wait))).encode())
+            ]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; ``retry_after`` is in seconds."""
+
+    def __init__(self, detail: str, retry_after: float = 1.0):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Cost-weighted concurrency limit with interactive and batch queues.
+
+    Args:
+        capacity: Cost units (rows x models) allowed in flight
+        interactive_cost: Requests up to this cost use the interactive queue
+        batch_share: Every n-th grant to a waiter goes to a batch, if one waits
+        max_queue: Waiting requests per queue before new ones are rejected
+        max_wait_s: Seconds a request may wait before it is rejected
+    """
+
+    def __init__(self, capacity: float, interactive_cost: float = 1000, batch_share: int = 4,
+                 max_queue: int = 100, max_wait_s: float = 10.0):
+        self.capacity = capacity
+        self.interactive_cost = interactive_cost
+        self.batch_share = batch_share
+        self.max_queue = max_queue
+        self.max_wait_s = max_wait_s
+        self.in_flight = 0.0
+        self._queues = {'interactive': deque(), 'batch': deque()}
+        self._grants = 0
+        self.admitted = {'interactive': 0, 'batch': 0}
+        self.rejected = {'interactive': 0, 'batch': 0}
+        self.waited_s = {'interactive': 0.0, 'batch': 0.0}
+
+    def queue_for(self, cost: float) -> str:
+        return 'interactive' if cost <= self.interactive_cost else 'batch'
+
+    def _next_queue(self) -> Optional[str]:
+        interactive, batch = self._queues['interactive'], self._queues['batch']
+        if batch and (not interactive or self._grants % self.batch_share == self.batch_share - 1):
+            return 'batch'
+        return 'interactive' if interactive else None
+
+    def _dispatch(self) -> None:
+        while True:
+            name = self._next_queue()
+            if name is None:
+                return
+            queue = self._queues[name]
+            future, cost = queue[0]
+            if future.done():  # timed out or cancelled while waiting
+                queue.popleft()
+                continue
+            if self.in_flight + cost > self.capacity:
+                # The interactive queue may still proceed past a batch that does not fit yet
+                other = self._queues['interactive']
+                if name == 'batch' and other and self.in_flight + other[0][1] <= self.capacity:
+                    self._grant('interactive')
+                    continue
+                return
+            self._grant(name)
+
+    def _grant(self, name: str) -> None:
+        future, cost = self._queues[name].popleft()
+        self.in_flight += cost
+        self._grants += 1
+        future.set_result(None)
+
+    @asynccontextmanager
+    async def admit(self, cost: float):
+        """
+        Hold ``cost`` units of capacity for the duration of the block.
+
+        Costs above the capacity are clamped, so such a request runs alone.
+
+        Raises:
+            AdmissionRejected: When the queue is full or the wait exceeds ``max_wait_s``
+        """
+        cost = min(float(cost), self.capacity)
+        name = self.queue_for(cost)
+        queue = self._queues[name]
+        start = time.perf_counter()
+        if not queue and self.in_flight + cost <= self.capacity:
+            self.in_flight += cost
+        elif len(queue) >= self.max_queue:
+            self.rejected[name] += 1
+            raise AdmissionRejected("Server busy, too many queued requests", self.max_wait_s)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            queue.append((future, cost))
+            try:
+                await asyncio.wait_for(asyncio.shield(future), self.max_wait_s)
+            except BaseException as e:
+                if future.done() and not future.cancelled():
+                    # Granted just as the wait ended: hand the capacity back
+                    self.in_flight -= cost
+                else:
+                    future.cancel()
+                self._dispatch()
+                if isinstance(e, asyncio.TimeoutError):
+                    self.rejected[name] += 1
+                    raise AdmissionRejected("Server busy, admission timed out", self.max_wait_s)
+                raise
+        self.admitted[name] += 1
+        self.waited_s[name] += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            self.in_flight -= cost
+            self._dispatch()
+
+    def status(self) -> Dict:
+        return {
+            'capacity': self.capacity,
+            'in_flight': self.in_flight,
+            'queued': {name: len(queue) for name, queue in self._queues.items()},
+            'admitted': dict(self.admitted),
+            'rejected': dict(self.rejected),
+            'mean_wait_ms': {
+                name: self.waited_s[name] / self.admitted[name] * 1000 if self.admitted[name] else None
+                for name in self.admitted
+            }
+        }
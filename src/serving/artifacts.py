@@ -0,0 +1,372 @@
+"""
+Library-neutral model artifacts.
+
+``advanced_models.pkl`` pickles the sklearn wrappers of the XGBoost and
+LightGBM models, so it breaks whenever an upgrade changes their
+internals. The exported layout avoids pickles altogether:
+
+- each booster in its library's native format (XGBoost UBJSON, LightGBM
+  text model), which later library versions keep loading
+- ``manifest.json`` with the feature list, ensemble weights, model files,
+  their SHA-256 checksums and the library versions used for the export
+- encoders and interaction maps as one ``.npy`` per array, memory-mapped
+  on load
+
+Any model entry may carry its own ``feature_list``, a subset of the
+manifest's. The API still builds the full feature vector once per batch,
+and such a model only sees its columns. Standalone models (e.g. the
+reduced feature sets of ``training/select_features.py``) are registered
+with ``add_model`` under ``serving_models`` and served by name next to
+the ensemble. Besides the two booster formats a model may be a linear
+model stored as ``.npz`` (the distilled fast model of
+``training/distill_model.py``).
+
+Usage:
+    python src/serving/artifacts.py [--output results/models/artifacts]   # export the pickles
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Union
+
+import joblib
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from features.encoders import CategoricalEncoders
+from utils.config import (
+    ADVANCED_MODELS_FILE, ARTIFACTS_DIR, CATEGORY_MAPS_FILE, FEATURE_LIST_FILE, LABEL_ENCODERS_FILE
+)
+from utils.logger import get_project_logger
+
+logger = get_project_logger("artifacts")
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+
+# Artifact key prefix -> native format
+BOOSTER_FORMATS = {
+    'xgb': ('xgboost', 'ubj'),
+    'lgb': ('lightgbm', 'txt'),
+    'lin': ('linear', 'npz')
+}
+
+class BoosterModel:
+    """``predict`` adapter around a native XGBoost or LightGBM booster."""
+
+    def __init__(self, library: str, booster):
+        self.library = library
+        self.booster = booster
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if self.library == 'linear':
+            return self.booster.predict(X)
+        if self.library == 'xgboost':
+            return np.asarray(self.booster.inplace_predict(X), dtype=np.float64)
+        return np.asarray(self.booster.predict(X), dtype=np.float64)
+
+class LinearModel:
+    """
+    Linear model on standardized features, stored as plain arrays.
+
+    The coefficients may be stored as float16; they are folded with the
+    scaling into one float64 weight vector on load.
+    """
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, coef: np.ndarray, intercept: float):
+        self.mean = np.asarray(mean)
+        self.scale = np.asarray(scale)
+        self.coef = np.asarray(coef)
+        self.intercept = float(intercept)
+        self.weights = self.coef.astype(np.float64) / self.scale.astype(np.float64)
+        self.offset = self.intercept - float(self.mean.astype(np.float64) @ self.weights)
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.weights + self.offset
+
+    def save_model(self, path: str) -> None:
+        with open(path, 'wb') as f:
+            np.savez(f, mean=self.mean, scale=self.scale, coef=self.coef, intercept=np.array(self.intercept))
+
+    @classmethod
+    def load_model(cls, path: str) -> 'LinearModel':
+        with np.load(path) as arrays:
+            return cls(arrays['mean'], arrays['scale'], arrays['coef'], float(arrays['intercept']))
+
+class SubsetModel:
+    """Model trained on a subset of the serving features; selects its columns from the full matrix."""
+
+    def __init__(self, model, feature_list: List[str], serving_features: List[str]):
+        missing = [name for name in feature_list if name not in serving_features]
+        if missing:
+            raise ValueError(f"Features not in the serving feature list: {', '.join(missing)}")
+        self.model = model
+        self.feature_list = list(feature_list)
+        self.columns = np.array([serving_features.index(name) for name in feature_list], dtype=np.intp)
+
+    def predict(self, X) -> np.ndarray:
+        return self.model.predict(np.asarray(X, dtype=np.float64)[:, self.columns])
+
+def with_features(model, entry: Mapping, serving_features: List[str]):
+    """Wrap ``model`` when its manifest entry lists fewer or reordered features."""
+    features = entry.get('feature_list')
+    if features is None or list(features) == list(serving_features):
+        return model
+    return SubsetModel(model, features, serving_features)
+
+class EnsembleModel:
+    """Weighted sum of member predictions, as in ``training.common.ensemble_predict``."""
+
+    def __init__(self, members: Mapping[str, BoosterModel], weights: Mapping[str, float]):
+        self.members = dict(members)
+        self.weights = {key: float(weights[key]) for key in self.members}
+
+    def predict(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        prediction = np.zeros(len(X), dtype=np.float64)
+        for key, model in self.members.items():
+            prediction += self.weights[key] * model.predict(X)
+        return prediction
+
+class PickledEnsemble(EnsembleModel):
+    """``EnsembleModel`` over the sklearn wrappers in the notebook's artifact dictionary."""
+
+    def __init__(self, artifacts: Mapping):
+        weights = artifacts.get('ensemble_weights', {'xgb': 0.5, 'lgb': 0.5})
+        members = {key: artifacts[f"{key}_model"] for key in weights
+                   if hasattr(artifacts.get(f"{key}_model"), 'predict')}
+        if not members:
+            raise ValueError("No ensemble member models in the artifact dictionary")
+        super().__init__(members, weights)
+
+def pickled_models(artifacts) -> Dict:
+    """
+    Serving registry for a pickled model artifact (``advanced_models.pkl``, ``candidate_models.pkl``).
+
+    Matches ``load_artifacts``: the ensemble is registered as
+    ``weighted_ensemble`` and each booster under its artifact key;
+    parameters, feature columns and weights are left out. A pickled
+    single estimator is registered as ``weighted_ensemble`` as well,
+    as ``training.common.ensemble_predict`` serves it in its place.
+    """
+    if hasattr(artifacts, 'predict'):
+        return {'weighted_ensemble': artifacts}
+    models = {name: model for name, model in artifacts.items() if hasattr(model, 'predict')}
+    if 'ensemble_weights' in artifacts or ('xgb_model' in models and 'lgb_model' in models):
+        models = {'weighted_ensemble': PickledEnsemble(artifacts), **models}
+    return models
+
+class ModelArtifacts:
+    """Models, feature list and encoders loaded from an exported artifact directory."""
+
+    def __init__(self, models: Dict, feature_list: List[str], encoders: CategoricalEncoders, manifest: Dict):
+        self.models = models
+        self.feature_list = feature_list
+        self.encoders = encoders
+        self.manifest = manifest
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _library_version(library: str) -> Optional[str]:
+    if library == 'linear':
+        return np.__version__
+    try:
+        return __import__(library).__version__
+    except ImportError:
+        return None
+
+def _save_booster(library: str, model, path: Path) -> None:
+    # Accept the sklearn wrappers, bare boosters and model text (stored as is)
+    if isinstance(model, str):
+        path.write_text(model)
+        return
+    if library == 'linear':
+        booster = model
+    elif library == 'xgboost':
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+    else:
+        booster = model.booster_ if hasattr(model, 'booster_') else model
+    booster.save_model(str(path))
+
+def _load_booster(library: str, path: Path):
+    if library == 'linear':
+        return LinearModel.load_model(str(path))
+    if library == 'xgboost':
+        import xgboost as xgb
+        booster = xgb.Booster()
+        booster.load_model(str(path))
+        return booster
+    import lightgbm as lgb
+    return lgb.Booster(model_file=str(path))
+
+def export_artifacts(artifacts: Mapping, feature_list: List[str], encoders: CategoricalEncoders,
+                     directory: Union[str, Path]) -> Dict:
+    """
+    Write the ensemble artifact dictionary in native formats.
+
+    Standalone models already registered in ``directory`` with ``add_model``
+    are kept when their features are still in ``feature_list``.
+
+    Args:
+        artifacts: Dictionary saved by the advanced models notebook
+            (``xgb_model``, ``lgb_model``, ``ensemble_weights``, ...)
+        feature_list: Model feature order
+        encoders: Compiled categorical encoders
+        directory: Output directory
+
+    Returns:
+        The manifest written to ``manifest.json``
+    """
+    if not isinstance(artifacts, Mapping) or 'ensemble_weights' not in artifacts:
+        raise ValueError("Only the boosting ensemble artifact can be exported")
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    serving_models = {}
+    if (directory / MANIFEST).exists():
+        with open(directory / MANIFEST) as f:
+            serving_models = json.load(f).get('serving_models', {})
+
+    models = {}
+    for key, weight in artifacts['ensemble_weights'].items():
+        model = artifacts.get(f"{key}_model")
+        if model is None or key not in BOOSTER_FORMATS:
+            continue
+        library, extension = BOOSTER_FORMATS[key]
+        path = directory / f"{key}_model.{extension}"
+        _save_booster(library, model, path)
+        models[key] = {
+            'library': library,
+            'library_version': _library_version(library),
+            'file': path.name,
+            'sha256': _sha256(path),
+            'weight': float(weight)
+        }
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'created_at': datetime.now().isoformat(),
+        'feature_list': list(feature_list),
+        'models': models,
+        'encoders': encoders.save_arrays(directory / "encoders")
+    }
+    kept = {name: entry for name, entry in serving_models.items()
+            if set(entry['feature_list']) <= set(feature_list)}
+    if len(kept) < len(serving_models):
+        logger.warning(f"Dropped serving models trained on features no longer exported: "
+                       f"{', '.join(sorted(set(serving_models) - set(kept)))}")
+    if kept:
+        manifest['serving_models'] = kept
+    tmp = directory / f"{MANIFEST}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    tmp.replace(directory / MANIFEST)
+    return manifest
+
+def load_artifacts(directory: Union[str, Path], verify: bool = True) -> ModelArtifacts:
+    """
+    Load an exported artifact directory.
+
+    The ensemble is registered as ``weighted_ensemble``, each booster
+    under its artifact key (``xgb_model``, ``lgb_model``) and standalone
+    models under their ``serving_models`` name.
+
+    Raises:
+        ValueError: On an unsupported format version or a checksum mismatch
+    """
+    directory = Path(directory)
+    with open(directory / MANIFEST) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    def load(entry: Mapping):
+        path = directory / entry['file']
+        if verify and _sha256(path) != entry['sha256']:
+            raise ValueError(f"Checksum mismatch for {path.name}")
+        return with_features(BoosterModel(entry['library'], _load_booster(entry['library'], path)),
+                             entry, manifest['feature_list'])
+
+    members = {key: load(entry) for key, entry in manifest['models'].items()}
+    models = {}
+    if members:
+        weights = {key: entry['weight'] for key, entry in manifest['models'].items()}
+        models['weighted_ensemble'] = EnsembleModel(members, weights)
+    models.update({f"{key}_model": model for key, model in members.items()})
+    models.update({name: load(entry) for name, entry in manifest.get('serving_models', {}).items()})
+    encoders = CategoricalEncoders.load_arrays(directory / "encoders")
+    return ModelArtifacts(models, manifest['feature_list'], encoders, manifest)
+
+def add_model(directory: Union[str, Path], name: str, library: str, model, feature_list: List[str],
+              metadata: Optional[Mapping] = None) -> Dict:
+    """
+    Register a standalone booster in an exported artifact directory.
+
+    Args:
+        directory: Directory written by ``export_artifacts``
+        name: Name the API serves the model under (replaces an existing entry)
+        library: ``xgboost``, ``lightgbm`` or ``linear``
+        model: Fitted booster, sklearn wrapper or model text, or a ``LinearModel``
+        feature_list: Features the model was trained on, in order; a subset of the manifest's
+        metadata: Extra fields stored with the entry (e.g. holdout WMAE)
+
+    Returns:
+        The updated manifest
+    """
+    directory = Path(directory)
+    with open(directory / MANIFEST) as f:
+        manifest = json.load(f)
+    missing = [feature for feature in feature_list if feature not in manifest['feature_list']]
+    if missing:
+        raise ValueError(f"Features not in the artifact feature list: {', '.join(missing)}")
+    extension = dict(BOOSTER_FORMATS.values())[library]
+    path = directory / f"{name}.{extension}"
+    _save_booster(library, model, path)
+    manifest.setdefault('serving_models', {})[name] = {
+        'library': library,
+        'library_version': _library_version(library),
+        'file': path.name,
+        'sha256': _sha256(path),
+        'feature_list': list(feature_list),
+        **(metadata or {})
+    }
+    tmp = directory / f"{MANIFEST}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    tmp.replace(directory / MANIFEST)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Export pickled model artifacts to native formats")
+    parser.add_argument("--models", type=Path, default=ADVANCED_MODELS_FILE)
+    parser.add_argument("--output", type=Path, default=ARTIFACTS_DIR)
+    args = parser.parse_args()
+
+    with open(args.models, 'rb') as f:
+        artifacts = joblib.load(f)
+    # The API builds features in feature_list.txt order
+    if FEATURE_LIST_FILE.exists():
+        with open(FEATURE_LIST_FILE) as f:
+            feature_list = [line.strip() for line in f if line.strip()]
+    else:
+        feature_list = artifacts['feature_columns']
+    encoders = CategoricalEncoders.load(LABEL_ENCODERS_FILE, CATEGORY_MAPS_FILE)
+
+    manifest = export_artifacts(artifacts, feature_list, encoders, args.output)
+    for key, entry in manifest['models'].items():
+        logger.info(f"{key}: {entry['library']} {entry['library_version']} -> {entry['file']}")
+    logger.info(f"Exported {len(manifest['models'])} models, {len(manifest['feature_list'])} features and "
+                f"{len(manifest['encoders'])} encoder arrays to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Seasonal baseline forecasts for degraded serving.
+
+When no model is loaded, or the model fails on a batch, the API answers
+from a table of historical averages: the mean weekly sales of every
+(Store, Dept) in the same week of the 52-week season, keyed on the
+calendar week (``features.calendar.season_weeks``). The table is dense,
+so a whole batch is scored with a single gather and no per-row Python.
+"""
+
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+
+from features.calendar import season_weeks
+from .hierarchy import SEASON_WEEKS
+
+class BaselineTable:
+    """
+    Dense store x dept x season-week table of average weekly sales.
+
+    ``table`` has shape ``(max_store + 1, max_dept + 1, SEASON_WEEKS)``. As in
+    ``IntervalTable``, row 0 holds the department-level averages and column 0
+    the chain-wide average per series, so unknown ids resolve to a coarser
+    baseline. Cells without history are filled at build time from the
+    store/dept mean over all weeks, then from the coarser levels.
+    """
+
+    # Bumped when the season slots change meaning; older files must be rebuilt
+    FORMAT_VERSION = 2
+
+    def __init__(self, table: np.ndarray):
+        if table.ndim != 3 or table.shape[2] != SEASON_WEEKS:
+            raise ValueError(f"Invalid baseline table shape: {table.shape}")
+        self.table = np.ascontiguousarray(table, dtype=np.float32)
+        self.max_store = self.table.shape[0] - 1
+        self.max_dept = self.table.shape[1] - 1
+
+    @classmethod
+    def from_history(cls, stores, depts, dates, sales) -> "BaselineTable":
+        """
+        Average historical weekly sales per (Store, Dept, season week).
+
+        Args:
+            stores: Store id per row
+            depts: Department id per row
+            dates: Week date per row
+            sales: Weekly sales per row
+
+        Returns:
+            Populated BaselineTable
+        """
+        stores = np.asarray(stores, dtype=np.int64)
+        depts = np.asarray(depts, dtype=np.int64)
+        sales = np.asarray(sales, dtype=np.float64)
+        slots = season_weeks(dates)
+        shape = (int(stores.max()) + 1, int(depts.max()) + 1, SEASON_WEEKS)
+
+        sums = np.zeros(shape)
+        counts = np.zeros(shape)
+        np.add.at(sums, (stores, depts, slots), sales)
+        np.add.at(counts, (stores, depts, slots), 1)
+
+        def mean(axis=None):
+            total, n = sums.sum(axis=axis), counts.sum(axis=axis)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            table = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        series_mean = mean(axis=2)  # store x dept
+        dept_week = mean(axis=0)  # dept x week
+        dept_mean = mean(axis=(0, 2))  # dept
+        global_week = mean(axis=(0, 1))  # week
+        global_week = np.where(np.isnan(global_week), mean(), global_week)
+
+        # Department level (row 0) and chain level (column 0)
+        dept_level = np.where(np.isnan(dept_week), dept_mean[:, None], dept_week)
+        dept_level = np.where(np.isnan(dept_level), global_week[None, :], dept_level)
+        table[0] = dept_level
+        table[:, 0] = global_week
+
+        # Store/dept cells: same-week average, else the series mean, else the department level
+        table = np.where(np.isnan(table), series_mean[:, :, None], table)
+        table = np.where(np.isnan(table), dept_level[None, :, :], table)
+        return cls(table)
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "BaselineTable":
+        """Load a baseline table written by ``save``."""
+        with np.load(path) as data:
+            version = int(data['format_version']) if 'format_version' in data.files else 1
+            if version != cls.FORMAT_VERSION:
+                raise ValueError(f"Baseline table format {version} is outdated, "
+                                 f"rebuild it with python src/training/build_baseline.py")
+            return cls(data['table'])
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persist the table as a compressed ``.npz`` file."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, table=self.table, format_version=np.int64(self.FORMAT_VERSION))
+
+    def predict(self, store_ids, dept_ids, dates) -> np.ndarray:
+        """
+        Baseline forecasts for a batch.
+
+        Args:
+            store_ids: Store id per row
+            dept_ids: Department id per row
+            dates: Prediction date per row
+
+        Returns:
+            Forecast per row
+        """
+        stores = np.asarray(store_ids, dtype=np.int64)
+        depts = np.asarray(dept_ids, dtype=np.int64)
+        stores = np.where((stores > 0) & (stores <= self.max_store), stores, 0)
+        depts = np.where((depts > 0) & (depts <= self.max_dept), depts, 0)
+        stores = np.where(depts == 0, 0, stores)
+        slots = season_weeks(dates)
+        return self.table[stores, depts, slots].astype(np.float64)
@@ -0,0 +1,134 @@
+"""
+Per-request latency budgets for graceful model degradation.
+
+``DeadlineMiddleware`` turns the request's ``X-Deadline-Ms`` header (or the
+server default) into an absolute deadline as soon as the request reaches
+the app, so time spent queued behind other requests counts against it.
+Before scoring, the handler compares the remaining time with
+``LatencyEstimator``'s recent cost of each model at the batch size and
+serves the first model on its degradation ladder that is expected to
+finish in time.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Absolute time.perf_counter() deadline of the current request, None without a budget
+request_deadline: contextvars.ContextVar = contextvars.ContextVar("request_deadline", default=None)
+
+DEADLINE_HEADER = b"x-deadline-ms"
+
+class DeadlineMiddleware:
+    """
+    Pure ASGI middleware that sets ``request_deadline`` for each request.
+
+    Args:
+        app: Wrapped ASGI application
+        default_ms: Budget for requests without the header (0 disables)
+        max_ms: Upper bound on client-supplied budgets
+    """
+
+    def __init__(self, app, default_ms: float = 0.0, max_ms: float = 60000.0):
+        self.app = app
+        self.default_ms = default_ms
+        self.max_ms = max_ms
+
+    def budget_ms(self, headers) -> float:
+        for name, value in headers:
+            if name == DEADLINE_HEADER:
+                try:
+                    return min(max(float(value), 0.0), self.max_ms)
+                except ValueError:
+                    break
+        return self.default_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget = self.budget_ms(scope.get("headers", ()))
+        token = request_deadline.set(time.perf_counter() + budget / 1000 if budget > 0 else None)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """Time left until ``deadline``, None without a budget."""
+    return None if deadline is None else deadline - time.perf_counter()
+
+class LatencyEstimator:
+    """
+    Recent cost of each scoring step as ``overhead + per_row * rows``.
+
+    Fits the line by exponentially weighted least squares over observed
+    (rows, seconds) pairs, so the estimate follows load changes within a
+    few dozen batches. While all observations share one batch size the
+    cost is scaled proportionally to the row count.
+
+    Args:
+        decay: Weight of each new observation
+        safety_margin: Multiplier applied to estimates when planning
+    """
+
+    def __init__(self, decay: float = 0.1, safety_margin: float = 1.2):
+        self.decay = decay
+        self.safety_margin = safety_margin
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}
+
+    def observe(self, name: str, rows: int, seconds: float) -> None:
+        values = (1.0, rows, seconds, rows * rows, rows * seconds)
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = list(values)
+                return
+            for i, value in enumerate(values):
+                stats[i] += self.decay * (value - stats[i])
+
+    def estimate(self, name: str, rows: int) -> Optional[float]:
+        """Expected seconds to process ``rows`` rows, None before any observation."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                return None
+            w, n, t, nn, nt = stats
+        n, t, nn, nt = n / w, t / w, nn / w, nt / w
+        variance = nn - n * n
+        if variance <= 1e-9 * max(nn, 1.0):
+            return t * rows / n if n > 0 else t
+        per_row = max((nt - n * t) / variance, 0.0)
+        overhead = max(t - per_row * n, 0.0)
+        return overhead + per_row * rows
+
+    def choose(self, ladder: Iterable[str], rows: int, remaining: float,
+               fixed: float = 0.0) -> Optional[str]:
+        """
+        First model on ``ladder`` expected to finish within ``remaining`` seconds.
+
+        Models without observations are assumed to fit, so every model is
+        measured once before it can be ruled out.
+
+        Args:
+            ladder: Model names from most to least preferred
+            rows: Batch size
+            remaining: Seconds left in the budget
+            fixed: Seconds needed before any model runs (feature building)
+
+        Returns:
+            Model name, or None when nothing is expected to fit
+        """
+        for name in ladder:
+            cost = self.estimate(name, rows)
+            if cost is None or fixed + cost * self.safety_margin <= remaining:
+                return name
+        return None
+
+    def snapshot(self, rows: int = 1000) -> Dict[str, float]:
+        """Estimated milliseconds per ``rows`` rows for every observed step."""
+        with self._lock:
+            names = list(self._stats)
+        return {name: self.estimate(name, rows) * 1000 for name in names}
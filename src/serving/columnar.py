@@ -0,0 +1,139 @@
+"""
+Columnar request/response payloads for bulk scoring.
+
+A bulk request carries one array per field instead of one JSON object per
+row, so decoding is a buffer copy (or none at all) and the arrays go
+straight into the feature builder. Two containers are supported:
+
+- NumPy ``.npz`` (``application/x-npz``): always available, one ``.npy``
+  member per column, loaded with ``allow_pickle=False``
+- Arrow IPC stream (``application/vnd.apache.arrow.stream``): when
+  ``pyarrow`` is installed
+
+Request columns: ``store_id`` and ``dept_id`` (integers), ``date``
+(``datetime64`` or ``YYYY-MM-DD`` strings) and optionally ``temperature``,
+``fuel_price``, ``cpi``, ``unemployment`` and ``markdown1``..``markdown5``
+(floats, NaN for missing). Responses carry ``predicted_sales``,
+``lower_bound`` and ``upper_bound`` aligned with the request rows.
+"""
+
+import io
+from typing import Dict, Mapping
+
+import numpy as np
+
+from features.exogenous import MARKDOWN_COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+except ImportError:
+    pa = None
+
+NPZ = 'application/x-npz'
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+REQUIRED_COLUMNS = ('store_id', 'dept_id', 'date')
+
+FLOAT_COLUMNS = {
+    'temperature': 'Temperature',
+    'fuel_price': 'Fuel_Price',
+    'cpi': 'CPI',
+    'unemployment': 'Unemployment',
+    **{name.lower(): name for name in MARKDOWN_COLUMNS}
+}
+
+def arrow_available() -> bool:
+    return pa is not None
+
+def read_npz(body: bytes) -> Dict[str, np.ndarray]:
+    """Decode an ``.npz`` payload into a dict of column arrays."""
+    with np.load(io.BytesIO(body), allow_pickle=False) as data:
+        return {name: data[name] for name in data.files}
+
+def write_npz(columns: Mapping[str, np.ndarray]) -> bytes:
+    """Encode column arrays as an uncompressed ``.npz`` payload."""
+    buffer = io.BytesIO()
+    np.savez(buffer, **columns)
+    return buffer.getvalue()
+
+def read_arrow(body: bytes) -> Dict[str, np.ndarray]:
+    """Decode an Arrow IPC stream into a dict of column arrays."""
+    table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    return {name: table.column(name).to_numpy() for name in table.column_names}
+
+def write_arrow(columns: Mapping[str, np.ndarray]) -> bytes:
+    """Encode column arrays as an Arrow IPC stream."""
+    table = pa.table({name: pa.array(values) for name, values in columns.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _integer_column(columns: Mapping[str, np.ndarray], name: str) -> np.ndarray:
+    values = np.asarray(columns[name])
+    if values.dtype.kind in 'iu':
+        return values.astype(np.int64, copy=False)
+    if values.dtype.kind == 'f' and np.all(np.isfinite(values)) and np.all(values == np.round(values)):
+        return values.astype(np.int64)
+    raise ValueError(f"Column '{name}' must contain integers")
+
+def _date_column(values: np.ndarray) -> np.ndarray:
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        dates = values.astype('datetime64[D]')
+    elif values.dtype.kind in 'US':
+        try:
+            dates = values.astype('datetime64[D]')
+        except ValueError:
+            raise ValueError("Column 'date' has invalid dates. Use YYYY-MM-DD")
+    elif values.dtype.kind == 'O':
+        # Arrow string and date columns may arrive as object arrays
+        try:
+            dates = np.array(values.tolist(), dtype='datetime64[D]')
+        except (TypeError, ValueError):
+            raise ValueError("Column 'date' has invalid dates. Use YYYY-MM-DD")
+    else:
+        raise ValueError("Column 'date' must be datetime64 or YYYY-MM-DD strings")
+    if np.isnat(dates).any():
+        raise ValueError("Column 'date' contains missing dates")
+    return dates
+
+def columns_to_batch(columns: Mapping[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """
+    Validate request columns and map them onto the feature builder's batch layout.
+
+    Args:
+        columns: Column name -> 1-D array, as decoded from the payload
+
+    Returns:
+        Batch dict with the same keys as ``requests_to_batch``
+
+    Raises:
+        ValueError: On missing or unknown columns, mismatched lengths or bad values
+    """
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing required columns: {', '.join(missing)}")
+    unknown = set(columns) - set(REQUIRED_COLUMNS) - set(FLOAT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown columns: {', '.join(sorted(unknown))}")
+    lengths = {np.asarray(values).shape for values in columns.values()}
+    if len(lengths) != 1 or len(next(iter(lengths))) != 1:
+        raise ValueError("All columns must be 1-D arrays of the same length")
+    n = len(columns['store_id'])
+
+    batch = {
+        'Store': _integer_column(columns, 'store_id'),
+        'Dept': _integer_column(columns, 'dept_id'),
+        'Date': _date_column(columns['date'])
+    }
+    for field, name in FLOAT_COLUMNS.items():
+        if field in columns:
+            values = np.asarray(columns[field])
+            if values.dtype.kind not in 'iuf':
+                raise ValueError(f"Column '{field}' must be numeric")
+            batch[name] = values.astype(np.float64, copy=False)
+        else:
+            batch[name] = np.full(n, np.nan)
+    return batch
@@ -0,0 +1,243 @@
+"""
+Store/department hierarchy aggregation and forecast reconciliation.
+
+The hierarchy has three levels: the chain total, one node per store and
+one bottom series per (Store, Dept) pair. Nodes are ordered
+``[total, stores..., bottom...]`` and all aggregation goes through the
+sparse summing matrix ``S`` (nodes x bottom), so rolling a dept-level
+forecast up to every store and the chain is one sparse mat-vec.
+
+Reconciliation methods:
+
+- ``bottom_up``: aggregate the dept-level model forecasts (coherent by
+  construction)
+- ``mint_shrink``: combine the dept-level model forecasts with seasonal
+  naive store and chain forecasts using MinT with a shrinkage covariance
+  estimated offline from holdout residuals (Wickramasuriya et al., 2019)
+
+MinT is applied in its constraint form ``y~ = y^ - W C' (C W C')^-1 C y^``
+with ``C = [I, -S_agg]``. Only ``K = W C' (C W C')^-1`` (nodes x 46) is
+stored, so the full nodes x nodes covariance is never materialized,
+neither offline nor at serving time.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from features.calendar import friday_of_week, season_weeks
+
+SEASON_WEEKS = 52
+
+METHODS = ('bottom_up', 'mint_shrink')
+
+class Hierarchy:
+    """
+    Chain -> store -> (store, dept) hierarchy with its summing matrix.
+
+    Args:
+        stores: Store id of each bottom series
+        depts: Dept id of each bottom series
+    """
+
+    def __init__(self, stores: np.ndarray, depts: np.ndarray):
+        order = np.lexsort((depts, stores))
+        self.stores = np.asarray(stores, dtype=np.int64)[order]
+        self.depts = np.asarray(depts, dtype=np.int64)[order]
+        self.store_ids, self.bottom_store_index = np.unique(self.stores, return_inverse=True)
+        self.n_bottom = len(self.stores)
+        self.n_aggregate = 1 + len(self.store_ids)
+        self.n_nodes = self.n_aggregate + self.n_bottom
+
+        # Aggregation rows: the chain total sums everything, each store its depts
+        rows = np.concatenate([np.zeros(self.n_bottom, dtype=np.int64), 1 + self.bottom_store_index])
+        cols = np.concatenate([np.arange(self.n_bottom), np.arange(self.n_bottom)])
+        self.S_aggregate = sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(self.n_aggregate, self.n_bottom)
+        )
+        self.S = sparse.vstack([self.S_aggregate, sparse.identity(self.n_bottom, format='csr')]).tocsr()
+
+    def __len__(self):
+        return self.n_bottom
+
+    @classmethod
+    def from_pairs(cls, pairs: np.ndarray) -> "Hierarchy":
+        pairs = np.asarray(pairs, dtype=np.int64).reshape(-1, 2)
+        return cls(pairs[:, 0], pairs[:, 1])
+
+    @classmethod
+    def from_index(cls, index: np.ndarray) -> "Hierarchy":
+        """Build from a dense (store, dept) -> code index where known pairs are >= 0."""
+        pairs = np.argwhere(np.asarray(index) >= 0)
+        return cls.from_pairs(pairs[(pairs[:, 0] > 0) & (pairs[:, 1] > 0)])
+
+    def pairs(self) -> np.ndarray:
+        return np.column_stack([self.stores, self.depts])
+
+    def aggregate(self, bottom: np.ndarray) -> np.ndarray:
+        """Sum bottom-level values (n_bottom,) or (n_bottom, k) to all nodes."""
+        return self.S @ bottom
+
+    def constraint_residual(self, nodes: np.ndarray) -> np.ndarray:
+        """``C @ y``: how far each aggregate is from the sum of its children."""
+        return nodes[:self.n_aggregate] - self.S_aggregate @ nodes[self.n_aggregate:]
+
+    def store_slices(self) -> Dict[int, slice]:
+        """Bottom-series slice of each store (bottom series are sorted by store)."""
+        bounds = np.searchsorted(self.stores, self.store_ids, side='left')
+        ends = np.searchsorted(self.stores, self.store_ids, side='right')
+        return {int(s): slice(int(a), int(b)) for s, a, b in zip(self.store_ids, bounds, ends)}
+
+def shrinkage_lambda(residuals: np.ndarray) -> float:
+    """
+    Schafer-Strimmer shrinkage intensity towards the diagonal covariance.
+
+    Computed from T x T Gram matrices so no n x n matrix is formed; matches
+    ``shrink.estim`` in the R ``hts`` package (uncentered residuals).
+
+    Args:
+        residuals: T x n matrix of in-sample residuals for every node
+    """
+    T = residuals.shape[0]
+    scale = np.sqrt(np.mean(residuals ** 2, axis=0))
+    xs = residuals / np.where(scale > 0, scale, 1.0)
+    squares = xs ** 2
+
+    # sum_{i != j} sum_t xs_ti^2 xs_tj^2
+    fourth_cross = np.sum(squares.sum(axis=1) ** 2) - np.sum(squares ** 2)
+    # sum_{i != j} (sum_t xs_ti xs_tj)^2
+    gram = xs @ xs.T
+    column_norms = squares.sum(axis=0)
+    product_cross = np.sum(gram ** 2) - np.sum(column_norms ** 2)
+
+    variance = (fourth_cross - product_cross / T) / (T * (T - 1))
+    distance = product_cross / T ** 2
+    if distance <= 0:
+        return 1.0
+    return float(min(max(variance / distance, 0.0), 1.0))
+
+def mint_gain(hierarchy: Hierarchy, residuals: np.ndarray,
+              lam: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    """
+    MinT-shrink gain ``K = W C' (C W C')^-1`` from node residuals.
+
+    Args:
+        hierarchy: Hierarchy the residual columns are ordered by
+        residuals: T x n_nodes residual matrix (missing values as 0)
+        lam: Shrinkage intensity; estimated when None
+
+    Returns:
+        Tuple of (K with shape (n_nodes, n_aggregate), lambda)
+    """
+    T = residuals.shape[0]
+    if lam is None:
+        lam = shrinkage_lambda(residuals)
+    variances = np.mean(residuals ** 2, axis=0)
+    # Keep W positive definite for series without residual variance
+    floor = max(variances[variances > 0].min() if np.any(variances > 0) else 1.0, 1e-9) * 1e-3
+    variances = np.maximum(variances, floor)
+
+    C_T = sparse.vstack([
+        sparse.identity(hierarchy.n_aggregate, format='csr'),
+        -hierarchy.S_aggregate.T
+    ]).tocsr()
+    residuals_C = (C_T.T @ residuals.T).T  # T x n_aggregate
+    W_C = lam * (variances[:, None] * C_T.toarray()) + (1 - lam) * (residuals.T @ residuals_C) / T
+    C_W_C = C_T.T @ W_C
+    try:
+        K = np.linalg.solve(C_W_C.T, W_C.T).T
+    except np.linalg.LinAlgError:
+        K = W_C @ np.linalg.pinv(C_W_C)
+    return K, float(lam)
+
+class HierarchyModel:
+    """
+    Serving-time hierarchy with optional MinT-shrink reconciliation.
+
+    ``history`` holds actual weekly totals of the aggregate nodes
+    (n_aggregate x weeks, NaN where unknown) starting at week number
+    ``history_start``; it provides the seasonal naive base forecasts that
+    MinT combines with the model's dept-level forecasts.
+    """
+
+    def __init__(self, hierarchy: Hierarchy, gain: Optional[np.ndarray] = None,
+                 shrinkage: Optional[float] = None, history: Optional[np.ndarray] = None,
+                 history_start: int = 0):
+        self.hierarchy = hierarchy
+        self.gain = gain
+        self.shrinkage = shrinkage
+        self.history = history
+        self.history_start = int(history_start)
+
+    @property
+    def supports_mint(self) -> bool:
+        return self.gain is not None and self.history is not None
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "HierarchyModel":
+        with np.load(path) as data:
+            return cls(
+                Hierarchy.from_pairs(data['pairs']),
+                gain=data['gain'] if 'gain' in data.files else None,
+                shrinkage=float(data['shrinkage']) if 'shrinkage' in data.files else None,
+                history=data['history'] if 'history' in data.files else None,
+                history_start=int(data['history_start']) if 'history_start' in data.files else 0
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {'pairs': self.hierarchy.pairs()}
+        if self.gain is not None:
+            arrays.update(gain=self.gain, shrinkage=np.float64(self.shrinkage))
+        if self.history is not None:
+            arrays.update(history=self.history, history_start=np.int64(self.history_start))
+        np.savez(path, **arrays)
+
+    def seasonal_naive(self, week: int) -> np.ndarray:
+        """
+        Aggregate-node base forecasts: the most recent past-season week in the same season slot.
+
+        Slots follow the calendar (``season_weeks``), so the base stays on
+        the same holiday week however far ``week`` is from the history.
+        """
+        values = np.full(self.hierarchy.n_aggregate, np.nan)
+        # Past seasons only: at least half a season before the forecast week
+        last = min(week - SEASON_WEEKS // 2, self.history_start + self.history.shape[1] - 1)
+        if last < self.history_start:
+            return values
+        weeks = np.arange(self.history_start, last + 1)
+        slot = season_weeks(friday_of_week([week]))[0]
+        for offset in (weeks[season_weeks(friday_of_week(weeks)) == slot] - self.history_start)[::-1]:
+            values = np.where(np.isnan(values), self.history[:, offset], values)
+            if not np.isnan(values).any():
+                break
+        return values
+
+    def reconcile(self, bottom: np.ndarray, method: str = 'bottom_up',
+                  week: Optional[int] = None) -> np.ndarray:
+        """
+        Produce coherent forecasts for every node.
+
+        Args:
+            bottom: Dept-level model forecasts in hierarchy order
+            method: ``bottom_up`` or ``mint_shrink``
+            week: Week number of the forecast (needed by ``mint_shrink``)
+
+        Returns:
+            Array of n_nodes forecasts ordered ``[total, stores..., bottom...]``
+        """
+        if method == 'bottom_up':
+            return self.hierarchy.aggregate(bottom)
+        if method != 'mint_shrink':
+            raise ValueError(f"Unknown reconciliation method: {method}")
+        if not self.supports_mint:
+            raise ValueError("mint_shrink needs a hierarchy artifact with residual calibration")
+
+        base_aggregate = self.seasonal_naive(week)
+        # Without a seasonal base, an aggregate just takes the sum of its children
+        summed = self.hierarchy.S_aggregate @ bottom
+        base = np.concatenate([np.where(np.isnan(base_aggregate), summed, base_aggregate), bottom])
+        return base - self.gain @ self.hierarchy.constraint_residual(base)
@@ -0,0 +1,128 @@
+"""
+Calibrated prediction intervals for the serving API.
+
+The interval table is produced offline by ``training.calibrate_intervals``
+and stores residual quantiles for every (Store, Dept, holiday) cell in a
+dense array, so serving an interval is a single array lookup per row.
+
+The quantiles are residuals of one model (``model``, the weighted
+ensemble). Other models are served with the offsets scaled by ``scale``
+(their holdout error relative to that model), which is not a conformal
+guarantee.
+"""
+
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+def holdout_scales(entries: Mapping[str, Mapping], calibrated_model: str) -> Dict[str, float]:
+    """
+    Interval widening per model from the holdout errors in the artifact manifest.
+
+    Models registered with ``holdout_wmae`` and ``wmae_gap`` against
+    ``calibrated_model`` as their teacher (the distilled students) get the
+    ratio of their holdout WMAE to the teacher's, never below 1.
+
+    Args:
+        entries: Manifest ``models`` entries by name
+        calibrated_model: Model the interval table was calibrated on
+    """
+    scales = {}
+    for name, entry in entries.items():
+        if entry.get('teacher') != calibrated_model or 'holdout_wmae' not in entry or 'wmae_gap' not in entry:
+            continue
+        teacher_wmae = float(entry['holdout_wmae']) - float(entry['wmae_gap'])
+        if teacher_wmae > 0:
+            scales[name] = max(1.0, float(entry['holdout_wmae']) / teacher_wmae)
+    return scales
+
+class IntervalTable:
+    """
+    Dense lookup table of additive residual quantiles.
+
+    ``lower`` and ``upper`` have shape ``(max_store + 1, max_dept + 1, 2)``
+    and are indexed by store id, dept id and holiday flag. Row 0 holds the
+    department-level fallback and column 0 the global fallback, so unknown
+    ids resolve to a coarser calibration without any extra branching.
+    ``model`` names the model whose holdout residuals were calibrated.
+    """
+
+    def __init__(self, lower: np.ndarray, upper: np.ndarray, coverage: float,
+                 counts: Optional[np.ndarray] = None, model: str = 'weighted_ensemble'):
+        if lower.shape != upper.shape or lower.ndim != 3 or lower.shape[2] != 2:
+            raise ValueError(f"Invalid interval table shape: {lower.shape} / {upper.shape}")
+        self.lower = np.ascontiguousarray(lower, dtype=np.float32)
+        self.upper = np.ascontiguousarray(upper, dtype=np.float32)
+        self.coverage = float(coverage)
+        self.counts = counts
+        self.model = model
+        self.max_store = self.lower.shape[0] - 1
+        self.max_dept = self.lower.shape[1] - 1
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "IntervalTable":
+        """Load an interval table written by ``save``."""
+        with np.load(path) as data:
+            counts = data['counts'] if 'counts' in data.files else None
+            # Tables written before the model was recorded were calibrated on the ensemble
+            model = str(data['model']) if 'model' in data.files else 'weighted_ensemble'
+            return cls(data['lower'], data['upper'], float(data['coverage']), counts, model)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Persist the table as a compressed ``.npz`` file."""
+        arrays = {
+            'lower': self.lower,
+            'upper': self.upper,
+            'coverage': np.float32(self.coverage),
+            'model': np.array(self.model)
+        }
+        if self.counts is not None:
+            arrays['counts'] = self.counts
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(path, **arrays)
+
+    def _index(self, store_ids, dept_ids):
+        stores = np.asarray(store_ids, dtype=np.int64)
+        depts = np.asarray(dept_ids, dtype=np.int64)
+        stores = np.where((stores > 0) & (stores <= self.max_store), stores, 0)
+        depts = np.where((depts > 0) & (depts <= self.max_dept), depts, 0)
+        # Unknown departments use the global fallback even for known stores
+        stores = np.where(depts == 0, 0, stores)
+        return stores, depts
+
+    def bounds(self, predictions, store_ids, dept_ids, is_holiday,
+               scale: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute interval bounds for a batch of predictions.
+
+        Args:
+            predictions: Point predictions
+            store_ids: Store id per row
+            dept_ids: Department id per row
+            is_holiday: Holiday-week flag per row
+            scale: Factor applied to the residual offsets
+
+        Returns:
+            Tuple of (lower_bounds, upper_bounds) arrays
+        """
+        preds = np.asarray(predictions, dtype=np.float64)
+        stores, depts = self._index(store_ids, dept_ids)
+        holiday = np.asarray(is_holiday, dtype=np.int64)
+        lower, upper = self.lower[stores, depts, holiday], self.upper[stores, depts, holiday]
+        if scale != 1.0:
+            lower, upper = lower * scale, upper * scale
+        return preds + lower, preds + upper
+
+    def interval(self, prediction: float, store_id: int, dept_id: int, is_holiday: bool,
+                 scale: float = 1.0) -> list:
+        """Single-row variant of ``bounds`` returning ``[lower, upper]``."""
+        store = store_id if 0 < store_id <= self.max_store else 0
+        dept = dept_id if 0 < dept_id <= self.max_dept else 0
+        if dept == 0:
+            store = 0
+        holiday = int(bool(is_holiday))
+        return [
+            float(prediction + scale * self.lower[store, dept, holiday]),
+            float(prediction + scale * self.upper[store, dept, holiday])
+        ]
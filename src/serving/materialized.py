@@ -0,0 +1,158 @@
+"""
+Materialized weekly forecasts served without running the model.
+
+``training.materialize_forecasts`` scores every (Store, Dept) series for
+the upcoming weeks and writes the point forecasts as one dense
+``(max_store + 1, max_dept + 1, n_weeks)`` float32 array, NaN where a
+series was not scored, next to a small ``forecasts.json`` manifest. The
+API memory-maps the array, so a lookup is a single index into the page
+cache. Each run writes a new array file and then swaps the manifest, and
+the API picks up the new manifest on its next check.
+"""
+
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from features.calendar import week_numbers
+
+MANIFEST = 'forecasts.json'
+
+class ForecastStore:
+    """
+    Read-only view of a materialized forecast directory.
+
+    Args:
+        directory: Directory written by ``write_forecasts``
+        reload_interval_s: Minimum seconds between checks for a newer manifest
+    """
+
+    def __init__(self, directory: Union[str, Path], reload_interval_s: float = 30.0):
+        self.directory = Path(directory)
+        self.reload_interval_s = reload_interval_s
+        self.values: Optional[np.ndarray] = None
+        self.manifest: Dict = {}
+        self._mtime = None
+        self._checked = 0.0
+        self.reload()
+
+    @property
+    def model(self) -> Optional[str]:
+        return self.manifest.get('model')
+
+    @property
+    def start_week(self) -> int:
+        return self.manifest.get('start_week', 0)
+
+    @property
+    def n_weeks(self) -> int:
+        return 0 if self.values is None else self.values.shape[2]
+
+    def reload(self) -> bool:
+        """Map the forecasts named by the current manifest; returns whether they changed."""
+        path = self.directory / MANIFEST
+        self._checked = time.monotonic()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        with open(path) as f:
+            manifest = json.load(f)
+        self.values = np.load(self.directory / manifest['file'], mmap_mode='r')
+        self.manifest = manifest
+        self._mtime = mtime
+        return True
+
+    def maybe_reload(self) -> None:
+        if time.monotonic() - self._checked >= self.reload_interval_s:
+            self.reload()
+
+    def lookup(self, store_ids, dept_ids, dates) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Materialized forecasts for a batch.
+
+        Returns:
+            Tuple of (forecasts, hit_mask); forecasts are NaN where ``hit_mask`` is False
+        """
+        self.maybe_reload()
+        stores = np.asarray(store_ids, dtype=np.int64)
+        depts = np.asarray(dept_ids, dtype=np.int64)
+        values = np.full(len(stores), np.nan)
+        if self.values is None:
+            return values, np.zeros(len(stores), dtype=bool)
+        weeks = week_numbers(dates) - self.start_week
+        valid = ((stores >= 0) & (stores < self.values.shape[0]) & (depts >= 0) & (depts < self.values.shape[1])
+                 & (weeks >= 0) & (weeks < self.values.shape[2]))
+        values[valid] = self.values[stores[valid], depts[valid], weeks[valid]]
+        hits = ~np.isnan(values)
+        return values, hits
+
+    def status(self) -> Dict:
+        return {
+            'model': self.model,
+            'weeks': self.n_weeks,
+            'first_week_ending': self.manifest.get('first_week_ending'),
+            'series': self.manifest.get('series', 0),
+            'created_at': self.manifest.get('created_at')
+        }
+
+def write_forecasts(directory: Union[str, Path], stores, depts, weeks, forecasts, start_week: int,
+                    n_weeks: int, model: str, first_week_ending: str, keep: int = 2) -> Dict:
+    """
+    Write a new forecast array and switch the manifest to it.
+
+    Args:
+        directory: Output directory
+        stores: Store id per forecast
+        depts: Department id per forecast
+        weeks: Week number per forecast
+        forecasts: Point forecast per row
+        start_week: Week number of the first materialized week
+        n_weeks: Number of materialized weeks
+        model: Name of the model that produced the forecasts
+        first_week_ending: Friday of the first materialized week (for display)
+        keep: Forecast arrays to keep on disk, including the new one
+
+    Returns:
+        The manifest written to ``forecasts.json``
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    stores = np.asarray(stores, dtype=np.int64)
+    depts = np.asarray(depts, dtype=np.int64)
+    offsets = np.asarray(weeks, dtype=np.int64) - start_week
+
+    created_at = datetime.now()
+    name = f"forecasts_{created_at:%Y%m%d%H%M%S%f}.npy"
+    shape = (int(stores.max()) + 1, int(depts.max()) + 1, n_weeks)
+    values = np.lib.format.open_memmap(directory / name, mode='w+', dtype=np.float32, shape=shape)
+    values[:] = np.nan
+    values[stores, depts, offsets] = forecasts
+    values.flush()
+    del values
+
+    manifest = {
+        'file': name,
+        'model': model,
+        'start_week': int(start_week),
+        'first_week_ending': first_week_ending,
+        'weeks': int(n_weeks),
+        'series': int(len(np.unique(stores * shape[1] + depts))),
+        'created_at': created_at.isoformat()
+    }
+    tmp = directory / f"{MANIFEST}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, directory / MANIFEST)
+
+    # Older arrays may still be mapped by running servers until their next reload
+    for old in sorted(directory.glob("forecasts_*.npy"))[:-keep]:
+        old.unlink()
+    return manifest
@@ -0,0 +1,85 @@
+"""
+Fast JSON responses for the batch endpoints.
+
+``ORJSONResponse`` serializes plain dicts, lists and NumPy arrays with
+``orjson`` when it is installed (falling back to the standard library),
+so handlers can return their score arrays without building a pydantic
+model per row. ``batch_columns`` is the compact batch shape: one array per
+field instead of one object per row, with the model names dictionary
+encoded.
+"""
+
+import json
+from typing import Any, Dict, Sequence
+
+import numpy as np
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def orjson_available() -> bool:
+    return orjson is not None
+
+def _default(value: Any):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class ORJSONResponse(JSONResponse):
+    """JSON response that also accepts NumPy arrays and scalars."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def batch_rows(store_ids: Sequence[int], dept_ids: Sequence[int], dates: Sequence[str], values: np.ndarray,
+               lower: np.ndarray, upper: np.ndarray, model_names: Sequence[str], calibrated: np.ndarray,
+               timestamp: str) -> list:
+    """One ``PredictionResponse``-shaped dict per row."""
+    return [
+        {
+            'store_id': store_id,
+            'dept_id': dept_id,
+            'date': date,
+            'predicted_sales': value,
+            'confidence_interval': [lo, hi],
+            'interval_calibrated': is_calibrated,
+            'model_used': model_name,
+            'prediction_timestamp': timestamp
+        }
+        for store_id, dept_id, date, value, lo, hi, is_calibrated, model_name in zip(
+            store_ids, dept_ids, dates, np.asarray(values, dtype=np.float64).tolist(),
+            np.asarray(lower, dtype=np.float64).tolist(), np.asarray(upper, dtype=np.float64).tolist(),
+            np.asarray(calibrated, dtype=bool).tolist(), model_names
+        )
+    ]
+
+def batch_columns(store_ids: np.ndarray, dept_ids: np.ndarray, dates: Sequence[str], values: np.ndarray,
+                  lower: np.ndarray, upper: np.ndarray, model_names: np.ndarray,
+                  calibrated: np.ndarray) -> Dict[str, Any]:
+    """
+    Compact batch response: column arrays aligned with the request rows.
+
+    ``models`` lists the distinct model names and ``columns['model']`` holds
+    each row's index into it.
+    """
+    names, index = np.unique(np.asarray(model_names, dtype=str), return_inverse=True)
+    return {
+        'models': names.tolist(),
+        'columns': {
+            'store_id': np.asarray(store_ids, dtype=np.int64),
+            'dept_id': np.asarray(dept_ids, dtype=np.int64),
+            'date': list(dates),
+            'predicted_sales': np.asarray(values, dtype=np.float64),
+            'lower_bound': np.asarray(lower, dtype=np.float64),
+            'upper_bound': np.asarray(upper, dtype=np.float64),
+            'interval_calibrated': np.asarray(calibrated, dtype=bool),
+            'model': index.astype(np.int32)
+        }
+    }
@@ -0,0 +1,132 @@
+"""
+What-if scenarios over the exogenous inputs.
+
+A scenario is a list of declarative perturbations (``set``, ``add`` or
+``scale``) of the exogenous inputs - temperature, fuel price, CPI,
+unemployment and the five markdowns - optionally restricted to some
+stores. The base feature matrix is built once; each scenario starts from
+a copy of it and recomputes only the exogenous-dependent columns (the
+inputs themselves, their week-over-week changes, fuel price volatility,
+temperature deviation and the binned categories) from the perturbed
+inputs and the base rows' lag context. The base and every scenario are
+stacked into one matrix and scored in a single model call.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from features.builder import FeatureBuilder, EXOGENOUS_FEATURES
+from features.exogenous import EXOGENOUS_COLUMNS, MARKDOWN_COLUMNS
+
+OPERATIONS = ('set', 'add', 'scale')
+
+# Column groups a single perturbation can target
+COLUMN_GROUPS = {
+    'MarkDowns': MARKDOWN_COLUMNS
+}
+
+PERTURBABLE_COLUMNS = EXOGENOUS_COLUMNS + list(COLUMN_GROUPS)
+
+class Perturbation:
+    """
+    One change to an exogenous input column.
+
+    Args:
+        column: Input column, or ``MarkDowns`` for all five markdowns
+        op: ``set`` (replace), ``add`` (shift) or ``scale`` (multiply)
+        value: Operand of the operation
+    """
+
+    def __init__(self, column: str, op: str, value: float):
+        if column not in PERTURBABLE_COLUMNS:
+            raise ValueError(f"Cannot perturb '{column}'. Use one of {', '.join(PERTURBABLE_COLUMNS)}")
+        if op not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{op}'. Use one of {', '.join(OPERATIONS)}")
+        if not np.isfinite(value):
+            raise ValueError(f"Perturbation value for '{column}' must be finite")
+        self.column = column
+        self.op = op
+        self.value = float(value)
+
+    @property
+    def columns(self) -> List[str]:
+        return list(COLUMN_GROUPS.get(self.column, [self.column]))
+
+    def apply(self, values: np.ndarray) -> np.ndarray:
+        if self.op == 'set':
+            return np.full_like(values, self.value)
+        if self.op == 'add':
+            return values + self.value
+        return values * self.value
+
+class Scenario:
+    """
+    Named set of perturbations, applied in order.
+
+    Args:
+        name: Scenario label echoed in responses
+        perturbations: Changes to apply
+        stores: Apply only to rows of these stores (all rows when None)
+    """
+
+    def __init__(self, name: str, perturbations: Iterable[Perturbation],
+                 stores: Optional[Sequence[int]] = None):
+        self.name = name
+        self.perturbations = list(perturbations)
+        self.stores = None if stores is None else np.asarray(stores, dtype=np.int64)
+
+    def apply(self, inputs: Dict[str, np.ndarray], store_ids: np.ndarray) -> Dict[str, np.ndarray]:
+        """Return perturbed copies of the exogenous input columns."""
+        mask = None if self.stores is None else np.isin(store_ids, self.stores)
+        perturbed = dict(inputs)
+        for perturbation in self.perturbations:
+            for column in perturbation.columns:
+                updated = perturbation.apply(perturbed[column])
+                perturbed[column] = updated if mask is None else np.where(mask, updated, perturbed[column])
+        return perturbed
+
+class ScenarioEngine:
+    """
+    Build stacked feature matrices for a base batch and its scenarios.
+
+    Args:
+        builder: Feature builder used for the base rows
+    """
+
+    def __init__(self, builder: FeatureBuilder):
+        self.builder = builder
+        self.targets = [
+            (name, builder.positions[name]) for name in EXOGENOUS_FEATURES if name in builder.positions
+        ]
+
+    def stack(self, batch: Dict[str, np.ndarray], scenarios: Sequence[Scenario]) -> np.ndarray:
+        """
+        Feature matrix of the base rows followed by one block per scenario.
+
+        Args:
+            batch: Column batch of the base rows
+            scenarios: Scenarios to evaluate
+
+        Returns:
+            Array of shape ((1 + len(scenarios)) * rows, features); block 0
+            is the unperturbed base
+        """
+        builder = self.builder
+        if builder.exogenous is not None:
+            batch = builder.exogenous.fill(batch)
+        base = builder.build(batch)
+        inputs, context = builder.exogenous_inputs(batch)
+        store_ids = np.asarray(batch['Store'], dtype=np.int64)
+
+        n = len(base)
+        X = np.empty(((1 + len(scenarios)) * n, base.shape[1]), dtype=np.float64)
+        X[:n] = base
+        for i, scenario in enumerate(scenarios, start=1):
+            block = X[i * n:(i + 1) * n]
+            block[:] = base
+            columns = builder.exogenous_columns(scenario.apply(inputs, store_ids), context)
+            for name, idx in self.targets:
+                if name in columns:
+                    block[:, idx] = columns[name]
+        return X
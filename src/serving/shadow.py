@@ -0,0 +1,190 @@
+"""
+Shadow and canary evaluation of a candidate model on live traffic.
+
+Shadow mode hands a sampled fraction of scored batches, together with the
+primary model's predictions, to a small background thread pool. There
+the candidate scores the same feature matrix while the request has
+already returned. Disagreement statistics (absolute and relative
+differences, their distribution and the candidate's latency) are
+aggregated in memory. When ``max_pending`` batches are already waiting,
+new samples are dropped instead of queued, so a slow candidate can never
+build a backlog.
+
+Canary routing serves ``canary_percent`` of requests with the candidate
+instead of the primary model; canary requests are not shadowed.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Upper bounds of the relative-difference distribution buckets
+RELATIVE_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+class ShadowEvaluator:
+    """
+    Scores sampled batches with a candidate model off the response path.
+
+    Args:
+        name: Candidate model name
+        model: Candidate model with a ``predict`` method
+        sample_rate: Fraction of primary-scored batches also scored by the candidate
+        canary_percent: Percentage of requests served by the candidate
+        max_pending: Maximum batches waiting for the candidate before samples are dropped
+        workers: Background scoring threads
+    """
+
+    def __init__(self, name: str, model, sample_rate: float = 0.1, canary_percent: float = 0.0,
+                 max_pending: int = 4, workers: int = 1):
+        self.name = name
+        self.model = model
+        self.enabled = True
+        self.sample_rate = 0.0
+        self.canary_percent = 0.0
+        self.configure(sample_rate=sample_rate, canary_percent=canary_percent)
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.reset()
+
+    @property
+    def label(self) -> str:
+        """Model name reported for canary-served requests."""
+        return f"candidate_{self.name}"
+
+    def configure(self, enabled: Optional[bool] = None, sample_rate: Optional[float] = None,
+                  canary_percent: Optional[float] = None) -> None:
+        if sample_rate is not None:
+            if not 0.0 <= sample_rate <= 1.0:
+                raise ValueError("sample_rate must be between 0 and 1")
+            self.sample_rate = sample_rate
+        if canary_percent is not None:
+            if not 0.0 <= canary_percent <= 100.0:
+                raise ValueError("canary_percent must be between 0 and 100")
+            self.canary_percent = canary_percent
+        if enabled is not None:
+            self.enabled = enabled
+
+    def reset(self) -> None:
+        with self._lock:
+            self.batches = 0
+            self.rows = 0
+            self.dropped = 0
+            self.errors = 0
+            self.canary_requests = 0
+            self.sum_abs = 0.0
+            self.sum_sq = 0.0
+            self.sum_rel = 0.0
+            self.sum_diff = 0.0
+            self.max_abs = 0.0
+            self.sum_primary = 0.0
+            self.candidate_seconds = 0.0
+            self.relative_counts = np.zeros(len(RELATIVE_BUCKETS) + 1, dtype=np.int64)
+            self._flushed_batches = 0
+
+    def route(self) -> bool:
+        """Whether this request should be served by the candidate."""
+        if not self.enabled or self.canary_percent <= 0 or random.random() * 100 >= self.canary_percent:
+            return False
+        with self._lock:
+            self.canary_requests += 1
+        return True
+
+    def submit(self, X: np.ndarray, primary: np.ndarray) -> bool:
+        """
+        Sample a scored batch for background candidate scoring.
+
+        The caller must not modify ``X`` or ``primary`` afterwards.
+
+        Returns:
+            Whether the batch was queued
+        """
+        if not self.enabled or self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                return False
+            self._pending += 1
+        self._executor.submit(self._evaluate, X, primary)
+        return True
+
+    def _evaluate(self, X: np.ndarray, primary: np.ndarray) -> None:
+        try:
+            start = time.perf_counter()
+            candidate = np.asarray(self.model.predict(X), dtype=np.float64)
+            elapsed = time.perf_counter() - start
+            diff = candidate - primary
+            abs_diff = np.abs(diff)
+            relative = abs_diff / np.maximum(np.abs(primary), 1.0)
+            buckets = np.bincount(np.searchsorted(RELATIVE_BUCKETS, relative),
+                                  minlength=len(RELATIVE_BUCKETS) + 1)
+            with self._lock:
+                self.batches += 1
+                self.rows += len(diff)
+                self.sum_abs += float(abs_diff.sum())
+                self.sum_sq += float(np.square(diff).sum())
+                self.sum_rel += float(relative.sum())
+                self.sum_diff += float(diff.sum())
+                self.max_abs = max(self.max_abs, float(abs_diff.max(initial=0.0)))
+                self.sum_primary += float(primary.sum())
+                self.candidate_seconds += elapsed
+                self.relative_counts += buckets
+        except Exception:
+            with self._lock:
+                self.errors += 1
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def status(self) -> Dict:
+        """Settings and aggregated disagreement against the primary model."""
+        with self._lock:
+            rows = self.rows
+            distribution = {}
+            if rows:
+                labels = [f"<={bound:g}" for bound in RELATIVE_BUCKETS] + [f">{RELATIVE_BUCKETS[-1]:g}"]
+                distribution = {label: int(count) / rows for label, count in zip(labels, self.relative_counts)}
+            return {
+                'candidate': self.name,
+                'enabled': self.enabled,
+                'sample_rate': self.sample_rate,
+                'canary_percent': self.canary_percent,
+                'canary_requests': self.canary_requests,
+                'shadow_batches': self.batches,
+                'shadow_rows': rows,
+                'pending': self._pending,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'mean_abs_diff': self.sum_abs / rows if rows else None,
+                'rmse': float(np.sqrt(self.sum_sq / rows)) if rows else None,
+                'mean_relative_diff': self.sum_rel / rows if rows else None,
+                'mean_diff': self.sum_diff / rows if rows else None,
+                'max_abs_diff': self.max_abs if rows else None,
+                'mean_primary': self.sum_primary / rows if rows else None,
+                'candidate_latency_ms': self.candidate_seconds / self.batches * 1000 if self.batches else None,
+                'relative_diff_distribution': distribution
+            }
+
+    def snapshot(self) -> List[Dict]:
+        """Snapshot row for ``MetricsFlusher`` once new shadow batches were scored."""
+        status = self.status()
+        with self._lock:
+            if self.batches == self._flushed_batches:
+                return []
+            self._flushed_batches = self.batches
+        return [{
+            'metric': 'shadow_mean_abs_diff',
+            'value': status['mean_abs_diff'],
+            'labels': {'candidate': self.name},
+            **{key: status[key] for key in ('shadow_rows', 'rmse', 'mean_relative_diff', 'mean_diff',
+                                            'canary_requests', 'dropped', 'candidate_latency_ms')}
+        }]
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,167 @@
+"""
+Chunked parsing and encoding for the streaming batch endpoint.
+
+Uploads are spooled to a temporary file (in memory up to a small limit,
+on disk beyond it) and read back with pandas in fixed-size chunks, so
+memory stays bounded by the chunk size however many rows are sent. Each
+chunk is validated column-wise and turned into the same column batch
+that ``requests_to_batch`` produces, without per-row request objects.
+"""
+
+import tempfile
+from typing import AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features.exogenous import MARKDOWN_COLUMNS
+
+FORMATS = ('ndjson', 'csv')
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+# Accepted input field names -> request field names
+FIELD_ALIASES = {
+    'Store': 'store_id',
+    'Dept': 'dept_id',
+    'Date': 'date',
+    'Temperature': 'temperature',
+    'Fuel_Price': 'fuel_price',
+    'CPI': 'cpi',
+    'Unemployment': 'unemployment',
+    **{name: name.lower() for name in MARKDOWN_COLUMNS}
+}
+
+EXOGENOUS_FIELDS = {
+    'temperature': 'Temperature',
+    'fuel_price': 'Fuel_Price',
+    'cpi': 'CPI',
+    'unemployment': 'Unemployment'
+}
+
+def detect_format(content_type: Optional[str], filename: Optional[str] = None) -> str:
+    """Infer ``ndjson`` or ``csv`` from a filename or content type."""
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    if filename and filename.lower().endswith(('.ndjson', '.jsonl')):
+        return 'ndjson'
+    if content_type and 'csv' in content_type:
+        return 'csv'
+    return 'ndjson'
+
+async def spool(chunks: AsyncIterator[bytes], max_memory: int) -> tempfile.SpooledTemporaryFile:
+    """Copy a request body stream into a rewound spooled temporary file."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    async for chunk in chunks:
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+def iter_frames(source, fmt: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Read an NDJSON or CSV file object in DataFrames of ``chunk_size`` rows."""
+    if fmt == 'csv':
+        reader = pd.read_csv(source, chunksize=chunk_size, dtype={'date': str, 'Date': str})
+    else:
+        reader = pd.read_json(source, lines=True, chunksize=chunk_size,
+                              dtype=False, convert_dates=False)
+    with reader:
+        for frame in reader:
+            yield frame.rename(columns=FIELD_ALIASES)
+
+def _numeric(frame: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=np.float64)
+
+def _markdowns(frame: pd.DataFrame) -> np.ndarray:
+    """Markdowns from ``markdown1..5`` columns or a ``markdowns`` list field."""
+    n = len(frame)
+    markdowns = np.full((n, len(MARKDOWN_COLUMNS)), np.nan)
+    for i, name in enumerate(MARKDOWN_COLUMNS):
+        if name.lower() in frame:
+            markdowns[:, i] = _numeric(frame, name.lower())
+    if 'markdowns' in frame:
+        for row, values in enumerate(frame['markdowns'].to_numpy()):
+            if isinstance(values, list) and values:
+                values = values[:len(MARKDOWN_COLUMNS)]
+                markdowns[row, :len(values)] = values
+    return markdowns
+
+def frame_to_batch(frame: pd.DataFrame) -> Tuple[Dict[str, np.ndarray], np.ndarray, np.ndarray]:
+    """
+    Validate a parsed chunk and convert its valid rows to a column batch.
+
+    Args:
+        frame: Chunk with request field names as columns
+
+    Returns:
+        (batch for the valid rows, boolean validity mask over all rows,
+        per-row error message array with None for valid rows)
+    """
+    n = len(frame)
+    stores = _numeric(frame, 'store_id')
+    depts = _numeric(frame, 'dept_id')
+    if 'date' in frame:
+        dates = pd.to_datetime(frame['date'], format='%Y-%m-%d', errors='coerce').to_numpy('datetime64[D]')
+    else:
+        dates = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+
+    errors = np.full(n, None, dtype=object)
+    bad_date = np.isnat(dates)
+    errors[bad_date] = "Invalid date format. Use YYYY-MM-DD"
+    bad_dept = ~np.isfinite(depts) | (depts != np.round(depts))
+    errors[bad_dept] = "dept_id must be an integer"
+    bad_store = ~np.isfinite(stores) | (stores != np.round(stores))
+    errors[bad_store] = "store_id must be an integer"
+    valid = ~(bad_date | bad_dept | bad_store)
+
+    batch = {
+        'Store': stores[valid].astype(np.int64),
+        'Dept': depts[valid].astype(np.int64),
+        'Date': dates[valid]
+    }
+    for field, column in EXOGENOUS_FIELDS.items():
+        batch[column] = _numeric(frame, field)[valid]
+    markdowns = _markdowns(frame)[valid]
+    for i, name in enumerate(MARKDOWN_COLUMNS):
+        batch[name] = markdowns[:, i]
+    return batch, valid, errors
+
+def encode_results(frame: pd.DataFrame, valid: np.ndarray, errors: np.ndarray,
+                   values: np.ndarray, lower: np.ndarray, upper: np.ndarray,
+                   model_name: str, calibrated: bool, fmt: str, header: bool) -> str:
+    """
+    Encode one chunk of results; invalid rows carry an ``error`` and null predictions.
+
+    Args:
+        frame: Parsed input chunk (for the echoed identifiers)
+        valid: Validity mask returned by ``frame_to_batch``
+        errors: Per-row error messages returned by ``frame_to_batch``
+        values, lower, upper: Predictions and bounds for the valid rows
+        model_name: Model that scored the chunk
+        calibrated: Whether the interval table was calibrated on that model
+        fmt: ``ndjson`` or ``csv``
+        header: Whether to write the CSV header (first chunk only)
+    """
+    n = len(frame)
+    out = pd.DataFrame(index=frame.index)
+    for column in ('store_id', 'dept_id'):
+        ids = _numeric(frame, column)
+        integral = np.isfinite(ids) & (ids == np.round(ids))
+        out[column] = pd.arrays.IntegerArray(np.where(integral, ids, 0).astype(np.int64), ~integral)
+    out['date'] = frame['date'] if 'date' in frame else None
+    for column, scored in (('predicted_sales', values), ('lower_bound', lower), ('upper_bound', upper)):
+        full = np.full(n, np.nan)
+        # Rounded so float noise from the bounds arithmetic does not leak into the CSV
+        full[valid] = np.round(scored, 6)
+        out[column] = full
+    out['interval_calibrated'] = np.where(valid, calibrated, None)
+    out['model_used'] = np.where(valid, model_name, None)
+    out['error'] = errors
+
+    if fmt == 'csv':
+        return out.to_csv(index=False, header=header)
+    return out.to_json(orient='records', lines=True)
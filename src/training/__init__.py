@@ -0,0 +1,3 @@
+"""
+Offline training, calibration and evaluation jobs.
+"""
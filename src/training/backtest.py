@@ -0,0 +1,265 @@
+"""
+Rolling-origin backtests of a model factory over many forecast origins.
+
+The processed data is sorted by week once and converted to a single
+float32 feature matrix. Because rows are in week order, the training set
+of every origin (all weeks before it, or ``--window-weeks`` of them) and
+its test set (the ``--horizon-weeks`` weeks from the origin on) are
+contiguous row ranges, so each origin works on slices of the same array
+instead of re-filtering the frame. With ``--workers`` > 1 the matrix is
+written once to a temporary ``.npy`` that every worker process
+memory-maps, and origins are fitted and scored in parallel.
+
+Predictions are scored with the shared WMAE helpers per origin, per
+horizon (weeks ahead of the origin), per origin and horizon, and per
+group column. Note that the lag and rolling features in the processed
+data use realized sales, so horizons longer than a lag are optimistic in
+the same way as the notebook's validation split.
+
+Models come from a factory called with ``n_jobs`` that returns an
+unfitted estimator: ``lightgbm``, ``xgboost`` (tuned hyperparameters from
+``hyperparameter_optimization.json``), ``ensemble`` (both, equally
+weighted), ``ridge``, or any ``package.module:function``.
+
+Usage:
+    python src/training/backtest.py [--model lightgbm] [--origins 8] [--step-weeks 4]
+        [--horizon-weeks 4] [--window-weeks 52] [--workers 4] [--group-by Store Dept]
+        [--origin-dates 2012-06-01 2012-07-06]
+"""
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from training.common import load_feature_list, prepare_features, weighted_mean_absolute_error, wmae_by_group
+from utils.config import BACKTEST_CONFIG, HYPERPARAMETERS_FILE, MODEL_CONFIG, REPORTS_DIR
+from utils.logger import get_project_logger
+
+logger = get_project_logger("backtest")
+
+def tuned_params(study: str) -> Dict:
+    """Best hyperparameters of an optimization study, empty when the report is missing."""
+    if not HYPERPARAMETERS_FILE.exists():
+        return {}
+    with open(HYPERPARAMETERS_FILE) as f:
+        return json.load(f).get(study, {}).get('best_params', {})
+
+def lightgbm_factory(n_jobs: int):
+    import lightgbm as lgb
+    return lgb.LGBMRegressor(**tuned_params('lgb_study'), n_jobs=n_jobs,
+                             random_state=MODEL_CONFIG["random_state"], verbose=-1)
+
+def xgboost_factory(n_jobs: int):
+    import xgboost as xgb
+    return xgb.XGBRegressor(**tuned_params('xgb_study'), n_jobs=n_jobs, tree_method='hist',
+                            random_state=MODEL_CONFIG["random_state"])
+
+def ridge_factory(n_jobs: int):
+    from sklearn.linear_model import Ridge
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    return make_pipeline(StandardScaler(), Ridge(alpha=1.0))
+
+class AveragedModel:
+    """Equal-weight average of several estimators (the boosting ensemble without tuned weights)."""
+
+    def __init__(self, models: List):
+        self.models = models
+
+    def fit(self, X, y):
+        for model in self.models:
+            model.fit(X, y)
+        return self
+
+    def predict(self, X) -> np.ndarray:
+        return np.mean([np.asarray(model.predict(X), dtype=np.float64) for model in self.models], axis=0)
+
+def ensemble_factory(n_jobs: int):
+    return AveragedModel([xgboost_factory(n_jobs), lightgbm_factory(n_jobs)])
+
+FACTORIES: Dict[str, Callable] = {
+    'lightgbm': lightgbm_factory,
+    'xgboost': xgboost_factory,
+    'ensemble': ensemble_factory,
+    'ridge': ridge_factory
+}
+
+def resolve_factory(name: str) -> Callable:
+    """Factory by registered name or ``package.module:function`` path."""
+    if name in FACTORIES:
+        return FACTORIES[name]
+    module, _, attribute = name.partition(':')
+    if not attribute:
+        raise ValueError(f"Unknown model '{name}'. Use one of {', '.join(FACTORIES)} or module:function")
+    return getattr(importlib.import_module(module), attribute)
+
+def select_origins(weeks: np.ndarray, count: int, step_weeks: int, horizon_weeks: int,
+                   dates: Optional[List[str]] = None) -> np.ndarray:
+    """
+    Indices into ``weeks`` of the forecast origins, oldest first.
+
+    Without explicit ``dates`` the last origin is the latest week that still
+    has ``horizon_weeks`` weeks of actuals, and earlier ones are spaced
+    ``step_weeks`` apart.
+    """
+    if dates:
+        requested = np.array(dates, dtype='datetime64[ns]')
+        origins = np.searchsorted(weeks, requested)
+        if (origins >= len(weeks)).any() or not np.array_equal(weeks[np.minimum(origins, len(weeks) - 1)],
+                                                                requested):
+            raise ValueError("Origin dates must be weeks present in the data")
+    else:
+        last = len(weeks) - horizon_weeks
+        origins = np.arange(last - (count - 1) * step_weeks, last + 1, step_weeks)
+    if (origins < 1).any():
+        raise ValueError("Every origin needs at least one earlier week to train on")
+    return np.sort(origins)
+
+# Arrays shared with the worker processes, memory-mapped once per worker
+_arrays: Dict[str, np.ndarray] = {}
+
+def _init_worker(paths: Dict[str, str]) -> None:
+    for name, path in paths.items():
+        _arrays[name] = np.load(path, mmap_mode='r')
+
+def run_origin(factory_name: str, n_jobs: int, train: slice, test: slice) -> Dict:
+    """Fit on the ``train`` rows and score the ``test`` rows of the shared arrays."""
+    X, y = _arrays['X'], _arrays['y']
+    model = resolve_factory(factory_name)(n_jobs)
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    fitted = time.perf_counter()
+    predictions = np.asarray(model.predict(X[test]), dtype=np.float64)
+    return {
+        'predictions': predictions,
+        'fit_seconds': fitted - start,
+        'predict_seconds': time.perf_counter() - fitted
+    }
+
+def keyed(groups: np.ndarray, values: np.ndarray) -> Dict[str, float]:
+    return {'|'.join(str(key) for key in group): float(value) for group, value in zip(groups, values)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of a model over many forecast origins")
+    parser.add_argument("--model", default='lightgbm',
+                        help=f"{', '.join(FACTORIES)} or package.module:function returning an estimator")
+    parser.add_argument("--origins", type=int, default=BACKTEST_CONFIG["origins"])
+    parser.add_argument("--step-weeks", type=int, default=BACKTEST_CONFIG["step_weeks"])
+    parser.add_argument("--horizon-weeks", type=int, default=BACKTEST_CONFIG["horizon_weeks"])
+    parser.add_argument("--window-weeks", type=int, default=BACKTEST_CONFIG["window_weeks"],
+                        help="Training weeks before each origin (default: all earlier weeks)")
+    parser.add_argument("--origin-dates", nargs='+', default=None, help="Explicit origin weeks (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=BACKTEST_CONFIG["workers"])
+    parser.add_argument("--group-by", nargs='+', default=BACKTEST_CONFIG["group_by"])
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args()
+    resolve_factory(args.model)
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+    df['Date'] = pd.to_datetime(df['Date'])
+    df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+    missing = [column for column in args.group_by if column not in df.columns]
+    if missing:
+        raise SystemExit(f"Unknown group columns: {', '.join(missing)}")
+
+    # One sorted matrix; every origin's train and test sets are row ranges of it
+    X = np.ascontiguousarray(prepare_features(df, load_feature_list()).to_numpy(dtype=np.float32))
+    y = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+    is_holiday = df['IsHoliday_x'].to_numpy(dtype=bool)
+    dates = df['Date'].to_numpy()
+    weeks = np.unique(dates)
+    week_index = np.searchsorted(weeks, dates)
+    week_starts = np.append(np.searchsorted(dates, weeks), len(dates))
+
+    try:
+        origins = select_origins(weeks, args.origins, args.step_weeks, args.horizon_weeks, args.origin_dates)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    tasks = []
+    for origin in origins:
+        first = 0 if args.window_weeks is None else week_starts[max(origin - args.window_weeks, 0)]
+        last = week_starts[min(origin + args.horizon_weeks, len(weeks))]
+        tasks.append((slice(int(first), int(week_starts[origin])), slice(int(week_starts[origin]), int(last))))
+    logger.info(f"Backtesting {args.model} at {len(origins)} origins from {str(weeks[origins[0]])[:10]} to "
+                f"{str(weeks[origins[-1]])[:10]}, {args.horizon_weeks} weeks ahead, {args.workers} worker(s)")
+
+    workers = max(1, min(args.workers, len(tasks)))
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+    start = time.perf_counter()
+    if workers == 1:
+        _arrays.update(X=X, y=y)
+        results = [run_origin(args.model, n_jobs, train, test) for train, test in tasks]
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            paths = {}
+            for name, array in (('X', X), ('y', y)):
+                paths[name] = str(Path(directory) / f"{name}.npy")
+                np.save(paths[name], array)
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(paths,)) as pool:
+                futures = [pool.submit(run_origin, args.model, n_jobs, train, test) for train, test in tasks]
+                results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+
+    # Stack the scored rows of all origins (overlapping test weeks appear once per origin)
+    rows = np.concatenate([np.arange(test.start, test.stop) for _, test in tasks])
+    origin_ids = np.concatenate([np.full(test.stop - test.start, i) for i, (_, test) in enumerate(tasks)])
+    predictions = np.concatenate([result['predictions'] for result in results])
+    horizons = week_index[rows] - origins[origin_ids] + 1
+    actual, holiday = y[rows], is_holiday[rows]
+
+    origin_labels = np.array([str(weeks[origin])[:10] for origin in origins])
+    by_origin_keys, by_origin = wmae_by_group(actual, predictions, holiday, origin_ids)
+    report = {
+        'model': args.model,
+        'horizon_weeks': args.horizon_weeks,
+        'window_weeks': args.window_weeks,
+        'workers': workers,
+        'seconds': elapsed,
+        'wmae': weighted_mean_absolute_error(actual, predictions, holiday),
+        'by_origin': {
+            origin_labels[key[0]]: {
+                'wmae': float(value),
+                'train_rows': tasks[key[0]][0].stop - tasks[key[0]][0].start,
+                'test_rows': tasks[key[0]][1].stop - tasks[key[0]][1].start,
+                'fit_seconds': results[key[0]]['fit_seconds'],
+                'predict_seconds': results[key[0]]['predict_seconds']
+            }
+            for key, value in zip(by_origin_keys, by_origin)
+        },
+        'by_horizon': keyed(*wmae_by_group(actual, predictions, holiday, horizons)),
+        'by_origin_horizon': {
+            f"{origin_labels[origin]}|{horizon}": float(value)
+            for (origin, horizon), value in zip(*wmae_by_group(actual, predictions, holiday, origin_ids, horizons))
+        },
+        'by_group': {
+            column: keyed(*wmae_by_group(actual, predictions, holiday, df[column].to_numpy()[rows]))
+            for column in args.group_by
+        }
+    }
+    logger.info(f"Backtest WMAE {report['wmae']:,.2f} over {len(rows):,} forecasts in {elapsed:.1f}s")
+    for horizon, value in report['by_horizon'].items():
+        logger.info(f"  {horizon} week(s) ahead: WMAE {value:,.2f}")
+
+    output = args.output or REPORTS_DIR / f"backtest_{args.model.replace(':', '_')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report saved to {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Offline construction of the seasonal baseline table.
+
+Averages the raw weekly sales of every (Store, Dept) per week of the
+52-week season and writes the dense ``BaselineTable`` that the API serves
+whenever the models are unavailable. The baseline is first built on the
+weeks before the notebook's holdout split and scored on the holdout, then
+rebuilt on the full history for serving.
+
+Usage:
+    python src/training/build_baseline.py [--output results/models/baseline.npz]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from serving.baseline import BaselineTable
+from training.common import holdout_split, weighted_mean_absolute_error
+from utils.config import BASELINE_FILE, INTERVAL_CONFIG, TRAIN_FILE
+from utils.logger import get_project_logger
+
+logger = get_project_logger("build_baseline")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the seasonal baseline forecast table")
+    parser.add_argument("--train", type=Path, default=TRAIN_FILE)
+    parser.add_argument("--output", type=Path, default=BASELINE_FILE)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.train, usecols=['Store', 'Dept', 'Date', 'Weekly_Sales', 'IsHoliday'],
+                     parse_dates=['Date'])
+    columns = [df['Store'], df['Dept'], df['Date'].to_numpy(), df['Weekly_Sales']]
+
+    val_mask, split_date = holdout_split(df['Date'], INTERVAL_CONFIG["validation_quantile"])
+    train, val = df[~val_mask], df[val_mask]
+    holdout = BaselineTable.from_history(train['Store'], train['Dept'], train['Date'].to_numpy(),
+                                         train['Weekly_Sales'])
+    predicted = holdout.predict(val['Store'], val['Dept'], val['Date'].to_numpy())
+    wmae = weighted_mean_absolute_error(val['Weekly_Sales'], predicted, val['IsHoliday'])
+    logger.info(f"Holdout WMAE after {split_date.date()}: {wmae:,.2f} ({val_mask.sum():,} rows)")
+
+    table = BaselineTable.from_history(*columns)
+    table.save(args.output)
+    logger.info(f"Baseline table ({table.max_store} stores x {table.max_dept} depts) saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Offline construction of the drift monitoring reference.
+
+Bins every monitored exogenous feature of the processed training data
+into quantile bins and stores the bin edges and training proportions
+that the API's drift monitor compares live traffic against.
+
+Usage:
+    python src/training/build_drift_reference.py [--bins 20] [--output results/models/drift_reference.npz]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from monitoring.drift import DriftReference, DRIFT_FEATURES
+from utils.config import DRIFT_CONFIG, DRIFT_REFERENCE_FILE
+from utils.logger import get_project_logger
+
+logger = get_project_logger("build_drift_reference")
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the drift monitoring reference distributions")
+    parser.add_argument("--bins", type=int, default=DRIFT_CONFIG["bins"])
+    parser.add_argument("--output", type=Path, default=DRIFT_REFERENCE_FILE)
+    args = parser.parse_args()
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+
+    reference = DriftReference.from_frame(df, DRIFT_FEATURES, args.bins)
+    reference.save(args.output)
+    for name in reference.features:
+        logger.info(f"{name}: {len(reference.edges[name]) + 1} bins")
+    logger.info(f"Drift reference for {len(reference.features)} features saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Offline construction of the store/department reconciliation artifact.
+
+Collects the (Store, Dept) pairs present in the processed training data,
+the weekly store and chain totals (the seasonal naive base forecasts used
+at serving time) and the MinT-shrink gain. The gain is estimated from the
+notebook's holdout period: dept-level residuals of the saved ensemble and
+store/chain residuals of the seasonal naive forecasts.
+
+Usage:
+    python src/training/build_hierarchy.py [--output results/models/hierarchy.npz]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from features.calendar import week_numbers
+from serving.hierarchy import Hierarchy, HierarchyModel, mint_gain
+from training.common import (
+    load_feature_list, load_model_artifacts, prepare_features,
+    holdout_split, ensemble_predict
+)
+from utils.config import HIERARCHY_FILE, INTERVAL_CONFIG
+from utils.logger import get_project_logger
+
+logger = get_project_logger("build_hierarchy")
+
+def bottom_positions(hierarchy: Hierarchy, stores: np.ndarray, depts: np.ndarray) -> np.ndarray:
+    """Position of each (store, dept) row among the hierarchy's bottom series."""
+    keys = hierarchy.stores * 1000 + hierarchy.depts
+    return np.searchsorted(keys, np.asarray(stores) * 1000 + np.asarray(depts))
+
+def aggregate_history(hierarchy: Hierarchy, stores, depts, weeks, sales):
+    """
+    Weekly actual totals of the aggregate nodes.
+
+    Returns:
+        Tuple of (n_aggregate x n_weeks matrix, first week number)
+    """
+    start = int(weeks.min())
+    n_weeks = int(weeks.max()) - start + 1
+    bottom = np.zeros((hierarchy.n_bottom, n_weeks))
+    np.add.at(bottom, (bottom_positions(hierarchy, stores, depts), weeks - start), sales)
+
+    observed = np.zeros(n_weeks, dtype=bool)
+    observed[np.unique(weeks - start)] = True
+    history = np.asarray(hierarchy.S_aggregate @ bottom)
+    history[:, ~observed] = np.nan
+    return history, start
+
+def node_residuals(model: HierarchyModel, stores, depts, weeks, actual, predicted):
+    """
+    Holdout residuals for every node, one row per holdout week.
+
+    Bottom residuals come from the model, aggregate residuals from the
+    seasonal naive forecast; missing values are left at zero.
+    """
+    hierarchy = model.hierarchy
+    holdout_weeks = np.unique(weeks)
+    row = np.searchsorted(holdout_weeks, weeks)
+    positions = bottom_positions(hierarchy, stores, depts)
+
+    residuals = np.zeros((len(holdout_weeks), hierarchy.n_nodes))
+    residuals[row, hierarchy.n_aggregate + positions] = actual - predicted
+
+    for i, week in enumerate(holdout_weeks):
+        offset = week - model.history_start
+        naive = model.seasonal_naive(int(week))
+        totals = model.history[:, offset]
+        residuals[i, :hierarchy.n_aggregate] = np.nan_to_num(totals - naive)
+    return residuals, holdout_weeks
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the hierarchy reconciliation artifact")
+    parser.add_argument("--output", type=Path, default=HIERARCHY_FILE)
+    parser.add_argument("--shrinkage", type=float, default=None,
+                        help="Fixed shrinkage intensity (estimated when omitted)")
+    args = parser.parse_args()
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+
+    stores = df['Store'].to_numpy(dtype=np.int64)
+    depts = df['Dept'].to_numpy(dtype=np.int64)
+    weeks = week_numbers(df['Date'].to_numpy())
+    sales = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+
+    hierarchy = Hierarchy.from_pairs(np.unique(np.column_stack([stores, depts]), axis=0))
+    logger.info(f"Hierarchy: {len(hierarchy.store_ids)} stores, {hierarchy.n_bottom} store/dept series")
+
+    history, history_start = aggregate_history(hierarchy, stores, depts, weeks, sales)
+    model = HierarchyModel(hierarchy, history=history, history_start=history_start)
+
+    val_mask, split_date = holdout_split(df['Date'], INTERVAL_CONFIG["validation_quantile"])
+    X_val = prepare_features(df, load_feature_list())[val_mask]
+    predicted = ensemble_predict(load_model_artifacts(), X_val)
+    residuals, holdout_weeks = node_residuals(
+        model, stores[val_mask], depts[val_mask], weeks[val_mask], sales[val_mask], predicted
+    )
+    logger.info(f"Estimating MinT gain from {len(holdout_weeks)} holdout weeks after {split_date.date()}")
+
+    model.gain, model.shrinkage = mint_gain(hierarchy, residuals, args.shrinkage)
+    model.save(args.output)
+    logger.info(f"Hierarchy artifact saved to {args.output} (shrinkage {model.shrinkage:.3f})")
+
+    # Holdout comparison at the aggregate levels (in-sample for the gain)
+    bottom = np.zeros((hierarchy.n_bottom, len(holdout_weeks)))
+    np.add.at(bottom, (bottom_positions(hierarchy, stores[val_mask], depts[val_mask]),
+                       np.searchsorted(holdout_weeks, weeks[val_mask])), predicted)
+    actual = history[:, holdout_weeks - history_start]
+    for method in ('bottom_up', 'mint_shrink'):
+        forecasts = np.column_stack([
+            model.reconcile(bottom[:, i], method, int(week))[:hierarchy.n_aggregate]
+            for i, week in enumerate(holdout_weeks)
+        ])
+        errors = np.abs(actual - forecasts)
+        logger.info(f"{method}: chain MAE {np.nanmean(errors[0]):,.0f}, "
+                    f"store MAE {np.nanmean(errors[1:]):,.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Offline calibration of prediction intervals.
+
+Scores the notebook's holdout period (dates after the 80% quantile, which
+the saved models never saw) and turns the residuals into split-conformal
+quantiles per (Store, Dept, holiday) cell. Sparse cells fall back to the
+department level and then to the global level. The result is written as
+a dense ``IntervalTable`` that the API loads at startup.
+
+Usage:
+    python src/training/calibrate_intervals.py [--coverage 0.9]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from serving.intervals import IntervalTable
+from training.common import (
+    load_feature_list, load_model_artifacts, prepare_features,
+    holdout_split, ensemble_predict
+)
+from utils.config import INTERVAL_CONFIG, PREDICTION_INTERVALS_FILE
+from utils.logger import get_project_logger
+
+logger = get_project_logger("calibrate_intervals")
+
+def conformal_bounds(residuals: np.ndarray, coverage: float) -> Tuple[float, float]:
+    """
+    Split-conformal residual quantiles with finite-sample correction.
+
+    Args:
+        residuals: Holdout residuals (actual - predicted)
+        coverage: Nominal two-sided coverage
+
+    Returns:
+        Tuple of (lower_offset, upper_offset)
+    """
+    n = len(residuals)
+    alpha = (1.0 - coverage) / 2.0
+    upper_level = min(1.0, np.ceil((n + 1) * (1.0 - alpha)) / n)
+    lower_level = max(0.0, np.floor((n + 1) * alpha) / n)
+    return (
+        float(np.quantile(residuals, lower_level, method='lower')),
+        float(np.quantile(residuals, upper_level, method='higher'))
+    )
+
+def build_interval_table(residuals: pd.DataFrame, coverage: float,
+                         min_group_size: int, max_store: int, max_dept: int) -> IntervalTable:
+    """
+    Build the dense interval table from holdout residuals.
+
+    Args:
+        residuals: Frame with Store, Dept, IsHoliday and Residual columns
+        coverage: Nominal two-sided coverage
+        min_group_size: Minimum residuals for a cell to be calibrated on its own
+        max_store: Largest store id to allocate
+        max_dept: Largest department id to allocate
+
+    Returns:
+        Populated IntervalTable
+    """
+    shape = (max_store + 1, max_dept + 1, 2)
+    lower = np.zeros(shape, dtype=np.float32)
+    upper = np.zeros(shape, dtype=np.float32)
+    counts = np.zeros(shape, dtype=np.int32)
+
+    residuals = residuals.assign(IsHoliday=residuals['IsHoliday'].astype(int))
+    all_residuals = residuals['Residual'].to_numpy()
+
+    for holiday in (0, 1):
+        subset = residuals[residuals['IsHoliday'] == holiday]
+        values = subset['Residual'].to_numpy()
+        # Holiday weeks are rare; fall back to all weeks if there are too few
+        if len(values) < min_group_size:
+            values = all_residuals
+        global_bounds = conformal_bounds(values, coverage)
+        lower[:, :, holiday], upper[:, :, holiday] = global_bounds
+
+        dept_bounds = {}
+        for dept, group in subset.groupby('Dept'):
+            if len(group) >= min_group_size and 0 < dept <= max_dept:
+                dept_bounds[dept] = conformal_bounds(group['Residual'].to_numpy(), coverage)
+                lower[:, dept, holiday], upper[:, dept, holiday] = dept_bounds[dept]
+                counts[0, dept, holiday] = len(group)
+
+        for (store, dept), group in subset.groupby(['Store', 'Dept']):
+            if not (0 < store <= max_store and 0 < dept <= max_dept):
+                continue
+            counts[store, dept, holiday] = len(group)
+            if len(group) >= min_group_size:
+                lower[store, dept, holiday], upper[store, dept, holiday] = conformal_bounds(
+                    group['Residual'].to_numpy(), coverage
+                )
+
+        # Column 0 is the slot for unknown departments
+        lower[:, 0, holiday], upper[:, 0, holiday] = global_bounds
+
+    return IntervalTable(lower, upper, coverage, counts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate prediction intervals from holdout residuals")
+    parser.add_argument("--coverage", type=float, default=INTERVAL_CONFIG["coverage"])
+    parser.add_argument("--min-group-size", type=int, default=INTERVAL_CONFIG["min_group_size"])
+    parser.add_argument("--output", type=Path, default=PREDICTION_INTERVALS_FILE)
+    args = parser.parse_args()
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+
+    feature_cols = load_feature_list()
+    artifacts = load_model_artifacts()
+
+    df = df.sort_values(['Store', 'Dept', 'Date']).reset_index(drop=True)
+    val_mask, split_date = holdout_split(df['Date'], INTERVAL_CONFIG["validation_quantile"])
+    logger.info(f"Calibrating on {val_mask.sum():,} holdout rows after {split_date.date()}")
+
+    X_val = prepare_features(df, feature_cols)[val_mask]
+    holdout = df.loc[val_mask, ['Store', 'Dept', 'IsHoliday_x', 'Weekly_Sales']]
+    predictions = ensemble_predict(artifacts, X_val)
+
+    residuals = pd.DataFrame({
+        'Store': holdout['Store'].to_numpy(),
+        'Dept': holdout['Dept'].to_numpy(),
+        'IsHoliday': holdout['IsHoliday_x'].to_numpy(),
+        'Residual': holdout['Weekly_Sales'].to_numpy() - predictions
+    })
+
+    table = build_interval_table(
+        residuals,
+        coverage=args.coverage,
+        min_group_size=args.min_group_size,
+        max_store=INTERVAL_CONFIG["max_store"],
+        max_dept=INTERVAL_CONFIG["max_dept"]
+    )
+    table.save(args.output)
+
+    lower, upper = table.bounds(predictions, residuals['Store'], residuals['Dept'], residuals['IsHoliday'])
+    actual = holdout['Weekly_Sales'].to_numpy()
+    empirical = np.mean((actual >= lower) & (actual <= upper))
+    logger.info(f"Interval table saved to {args.output}")
+    logger.info(f"Nominal coverage {args.coverage:.0%}, in-sample coverage {empirical:.1%}")
+
+if __name__ == "__main__":
+    main()
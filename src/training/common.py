@@ -0,0 +1,116 @@
+"""
+Shared helpers for offline training and calibration jobs.
+
+These mirror the data preparation used in ``04_advanced_models.ipynb`` so
+that offline jobs see exactly the feature matrix the models were fit on.
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import ADVANCED_MODELS_FILE, FEATURE_LIST_FILE, METRICS_CONFIG
+
+def load_feature_list(path: Path = FEATURE_LIST_FILE) -> List[str]:
+    """Load the modeling feature list written by the feature engineering notebook."""
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip()]
+
+def load_model_artifacts(path: Path = ADVANCED_MODELS_FILE) -> Dict:
+    """Load the artifact dictionary saved by the advanced models notebook."""
+    with open(path, 'rb') as f:
+        return joblib.load(f)
+
+def prepare_features(df: pd.DataFrame, feature_cols: List[str]) -> pd.DataFrame:
+    """
+    Build the model feature matrix from the processed dataset.
+
+    Args:
+        df: Processed training data
+        feature_cols: Ordered feature names
+
+    Returns:
+        Numeric feature matrix with missing values imputed
+    """
+    X = df[feature_cols].copy()
+    for col in X.columns:
+        if X[col].dtype == 'object' or X[col].dtype.name == 'category':
+            X[col] = X[col].astype(str).astype('category').cat.codes
+    return X.fillna(X.median())
+
+def holdout_split(dates: pd.Series, quantile: float) -> Tuple[np.ndarray, pd.Timestamp]:
+    """
+    Reproduce the notebook's final train/validation split.
+
+    Returns:
+        Tuple of (validation_mask, split_date)
+    """
+    split_date = dates.quantile(quantile)
+    return (dates > split_date).to_numpy(), split_date
+
+def ensemble_predict(artifacts: Dict, X) -> np.ndarray:
+    """
+    Score a feature matrix with the weighted XGBoost/LightGBM ensemble.
+
+    Falls back to a single estimator when the artifact is a plain model.
+    """
+    if hasattr(artifacts, 'predict'):
+        return np.asarray(artifacts.predict(X), dtype=np.float64)
+
+    weights = artifacts.get('ensemble_weights', {'xgb': 0.5, 'lgb': 0.5})
+    prediction = np.zeros(len(X), dtype=np.float64)
+    for key, weight in weights.items():
+        model = artifacts.get(f"{key}_model")
+        if model is not None:
+            prediction += weight * np.asarray(model.predict(X), dtype=np.float64)
+    return prediction
+
+def weighted_mean_absolute_error(y_true, y_pred, is_holiday,
+                                 holiday_weight: Optional[int] = None) -> float:
+    """Weighted Mean Absolute Error (WMAE) - Kaggle competition metric."""
+    if holiday_weight is None:
+        holiday_weight = METRICS_CONFIG["holiday_weight"]
+    weights = np.where(np.asarray(is_holiday, dtype=bool), holiday_weight, METRICS_CONFIG["regular_weight"])
+    errors = weights * np.abs(np.asarray(y_true) - np.asarray(y_pred))
+    return float(errors.sum() / weights.sum())
+
+def wmae_by_group(y_true, y_pred, is_holiday, *keys: np.ndarray,
+                  holiday_weight: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    WMAE of every group defined by one or more key columns, in one pass.
+
+    Args:
+        y_true: Actual sales
+        y_pred: Predicted sales
+        is_holiday: Holiday week flags
+        keys: Aligned key arrays (e.g. origin and horizon); object arrays
+            such as store types or holiday names are supported
+
+    Returns:
+        Tuple of (unique_keys, wmae); ``unique_keys`` has one row per group
+        and one column per key array (object dtype when a key is not numeric)
+    """
+    if holiday_weight is None:
+        holiday_weight = METRICS_CONFIG["holiday_weight"]
+    weights = np.where(np.asarray(is_holiday, dtype=bool), holiday_weight, METRICS_CONFIG["regular_weight"])
+    errors = weights * np.abs(np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64))
+    # Factorize each key (NaN is a group of its own) and group on the combined codes
+    factorized = [pd.factorize(np.asarray(key), sort=True, use_na_sentinel=False) for key in keys]
+    shape = tuple(len(uniques) for _, uniques in factorized)
+    combined = np.ravel_multi_index([codes for codes, _ in factorized], shape)
+    group_codes, index = np.unique(combined, return_inverse=True)
+    columns = [np.asarray(uniques)[codes]
+               for (_, uniques), codes in zip(factorized, np.unravel_index(group_codes, shape))]
+    if all(column.dtype.kind in 'biuf' for column in columns):
+        groups = np.column_stack(columns)
+    else:
+        groups = np.empty((len(group_codes), len(columns)), dtype=object)
+        for j, column in enumerate(columns):
+            groups[:, j] = column
+    return groups, np.bincount(index, errors, len(groups)) / np.bincount(index, weights, len(groups))
@@ -0,0 +1,239 @@
+"""
+Distill the weighted ensemble into a small model for latency-critical callers.
+
+Dashboards ask for many predictions at once and care more about speed
+than about the last few dollars of WMAE. This job scores the processed
+training data with ``weighted_ensemble`` from the native artifacts and
+fits a student to those outputs (not to the actual sales):
+
+- ``lightgbm``: a shallow booster with few trees (``--trees``, ``--leaves``)
+- ``linear``: a ridge model on standardized features
+
+Either can be restricted to a reduced feature list written by
+``select_features.py`` (``--features results/models/feature_sets/top_25.txt``).
+``--quantize`` rounds the booster's split thresholds and leaf values, or
+the linear coefficients, to float16 precision. Values outside the float16
+range keep float32. Rounding makes the stored model smaller, not faster,
+so the report lists the accuracy it costs separately.
+
+The student is fitted on the notebook's training split and compared with
+the teacher on the holdout. The comparison covers WMAE against actual
+sales, mean absolute difference from the teacher, inference time on
+``--latency-rows`` rows and model size. The report goes to
+``results/reports/distillation.json``. ``--register`` adds the evaluated
+student to the artifacts as ``fast_<student>``. The API then serves it for
+``?model=fast_lightgbm``, or by default with ``SERVING_MODEL``.
+
+Usage:
+    python src/training/distill_model.py [--student lightgbm] [--trees 50] [--leaves 15]
+        [--features FILE] [--quantize] [--register]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from serving.artifacts import (
+    MANIFEST as ARTIFACT_MANIFEST, BoosterModel, LinearModel, add_model, load_artifacts, with_features
+)
+from training.common import holdout_split, load_feature_list, prepare_features, weighted_mean_absolute_error
+from training.select_features import best_of
+from utils.config import ARTIFACTS_DIR, DISTILL_CONFIG, INTERVAL_CONFIG, MODEL_CONFIG, REPORTS_DIR
+from utils.logger import get_project_logger
+
+logger = get_project_logger("distill_model")
+
+STUDENTS = ('lightgbm', 'linear')
+FLOAT16_MAX = float(np.finfo(np.float16).max)
+
+def predict_in_chunks(model, X: np.ndarray, rows: int = 100000) -> np.ndarray:
+    """Score ``X`` in slices so the float64 copies stay small."""
+    return np.concatenate([model.predict(X[start:start + rows]) for start in range(0, len(X), rows)])
+
+def quantize_value(value: float) -> str:
+    """Shortest text of ``value`` at float16 precision, or float32 beyond the float16 range."""
+    if abs(value) <= FLOAT16_MAX:
+        return str(np.float16(value))
+    return str(np.float32(value))
+
+def quantize_lightgbm(model_text: str) -> str:
+    """
+    Round thresholds and leaf values of a LightGBM text model.
+
+    ``tree_sizes`` is dropped because the tree blocks change length;
+    LightGBM then parses the trees sequentially.
+    """
+    lines = []
+    for line in model_text.splitlines():
+        key, sep, values = line.partition('=')
+        if key == 'tree_sizes':
+            continue
+        if sep and key in ('threshold', 'leaf_value') and values:
+            line = f"{key}={' '.join(quantize_value(float(value)) for value in values.split(' '))}"
+        lines.append(line)
+    return '\n'.join(lines) + '\n'
+
+def fit_lightgbm(X: np.ndarray, target: np.ndarray, trees: int, leaves: int, learning_rate: float,
+                 quantize: bool):
+    """
+    Fit the shallow booster student.
+
+    Returns:
+        Model text when quantized (so the compact values are stored as is), otherwise the booster
+    """
+    import lightgbm as lgb
+    model = lgb.LGBMRegressor(n_estimators=trees, num_leaves=leaves, learning_rate=learning_rate,
+                              random_state=MODEL_CONFIG["random_state"], verbose=-1)
+    model.fit(X, target)
+    if quantize:
+        return quantize_lightgbm(model.booster_.model_to_string())
+    return model.booster_
+
+def fit_linear(X: np.ndarray, target: np.ndarray, alpha: float, quantize: bool) -> LinearModel:
+    from sklearn.linear_model import Ridge
+    X = np.asarray(X, dtype=np.float64)
+    mean = X.mean(axis=0)
+    scale = X.std(axis=0)
+    scale[scale == 0] = 1.0
+    ridge = Ridge(alpha=alpha).fit((X - mean) / scale, target)
+    coef = ridge.coef_
+    if quantize and np.all(np.abs(coef) <= FLOAT16_MAX):
+        coef = coef.astype(np.float16)
+    return LinearModel(mean.astype(np.float32), scale.astype(np.float32), coef, ridge.intercept_)
+
+def load_student(library: str, model):
+    """Serving adapter of a fitted student, as ``serving.artifacts.load_artifacts`` builds it."""
+    if library == 'lightgbm':
+        import lightgbm as lgb
+        model = lgb.Booster(model_str=model) if isinstance(model, str) else model
+    return BoosterModel(library, model)
+
+def model_bytes(model) -> int:
+    if isinstance(model, str):
+        return len(model.encode())
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "model"
+        model.save_model(str(path))
+        return path.stat().st_size
+
+def evaluate(model, X_val: np.ndarray, y_val: np.ndarray, is_holiday: np.ndarray,
+             teacher_val: np.ndarray, sample: np.ndarray) -> Dict:
+    """Holdout accuracy against actual sales and the teacher, and the latency on ``sample``."""
+    predicted = predict_in_chunks(model, X_val)
+    return {
+        'holdout_wmae': weighted_mean_absolute_error(y_val, predicted, is_holiday),
+        'teacher_mae': float(np.mean(np.abs(predicted - teacher_val))),
+        'predict_ms': best_of(lambda: model.predict(sample)) * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Distill the weighted ensemble into a fast model")
+    parser.add_argument("--student", choices=STUDENTS, default=DISTILL_CONFIG["student"])
+    parser.add_argument("--trees", type=int, default=DISTILL_CONFIG["trees"])
+    parser.add_argument("--leaves", type=int, default=DISTILL_CONFIG["leaves"])
+    parser.add_argument("--learning-rate", type=float, default=DISTILL_CONFIG["learning_rate"])
+    parser.add_argument("--alpha", type=float, default=DISTILL_CONFIG["alpha"])
+    parser.add_argument("--features", type=Path, default=None,
+                        help="Feature list file (e.g. from select_features.py), defaults to all features")
+    parser.add_argument("--quantize", action="store_true", help="Round the student's parameters to float16")
+    parser.add_argument("--latency-rows", type=int, default=DISTILL_CONFIG["latency_rows"])
+    parser.add_argument("--name", default=None, help="Serving name (defaults to fast_<student>)")
+    parser.add_argument("--register", action="store_true", help="Add the student to the native artifacts")
+    args = parser.parse_args()
+    if not (ARTIFACTS_DIR / ARTIFACT_MANIFEST).exists():
+        raise SystemExit("No native artifacts with the teacher. Run python src/serving/artifacts.py first.")
+
+    artifacts = load_artifacts(ARTIFACTS_DIR)
+    if 'weighted_ensemble' not in artifacts.models:
+        raise SystemExit(f"No weighted_ensemble in {ARTIFACTS_DIR} to distill")
+    teacher, feature_list = artifacts.models['weighted_ensemble'], artifacts.feature_list
+    features: List[str] = load_feature_list(args.features) if args.features else feature_list
+    missing = [name for name in features if name not in feature_list]
+    if missing:
+        raise SystemExit(f"Features not in the artifact feature list: {', '.join(missing)}")
+    columns = np.array([feature_list.index(name) for name in features], dtype=np.intp)
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+    X = prepare_features(df, feature_list).to_numpy(dtype=np.float32)
+    y = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+    is_holiday = df['IsHoliday_x'].to_numpy(dtype=bool)
+    val_mask, split_date = holdout_split(df['Date'], INTERVAL_CONFIG["validation_quantile"])
+    train, val = np.flatnonzero(~val_mask), np.flatnonzero(val_mask)
+
+    # The student learns the teacher's outputs over the training split
+    targets = predict_in_chunks(teacher, X)
+    logger.info(f"Scored {len(X):,} rows with the teacher; fitting a {args.student} student on "
+                f"{len(train):,} rows and {len(features)} features")
+    X_val, y_val, holiday_val, teacher_val = X[val], y[val], is_holiday[val], targets[val]
+    sample = np.ascontiguousarray(X_val[:args.latency_rows], dtype=np.float64)
+
+    library = 'linear' if args.student == 'linear' else 'lightgbm'
+    variants = [False, True] if args.quantize else [False]
+    students = {}
+    for quantize in variants:
+        if args.student == 'linear':
+            students[quantize] = fit_linear(X[np.ix_(train, columns)], targets[train], args.alpha, quantize)
+        else:
+            students[quantize] = fit_lightgbm(X[np.ix_(train, columns)], targets[train], args.trees,
+                                              args.leaves, args.learning_rate, quantize)
+
+    teacher_bytes = sum((ARTIFACTS_DIR / entry['file']).stat().st_size
+                        for entry in artifacts.manifest['models'].values())
+    report = {
+        'student': args.student,
+        'features': len(features),
+        'feature_list_file': str(args.features) if args.features else None,
+        'params': ({'alpha': args.alpha} if args.student == 'linear' else
+                   {'trees': args.trees, 'leaves': args.leaves, 'learning_rate': args.learning_rate}),
+        'split_date': str(split_date.date()),
+        'latency_rows': len(sample),
+        'teacher': {
+            'holdout_wmae': weighted_mean_absolute_error(y_val, teacher_val, holiday_val),
+            'predict_ms': best_of(lambda: teacher.predict(sample)) * 1000,
+            'model_bytes': teacher_bytes
+        },
+        'variants': {}
+    }
+    for quantize, model in students.items():
+        served = with_features(load_student(library, model), {'feature_list': features}, feature_list)
+        result = evaluate(served, X_val, y_val, holiday_val, teacher_val, sample)
+        result['model_bytes'] = model_bytes(model)
+        result['wmae_gap'] = result['holdout_wmae'] - report['teacher']['holdout_wmae']
+        result['speedup'] = report['teacher']['predict_ms'] / result['predict_ms']
+        variant = 'float16' if quantize else 'float64'
+        report['variants'][variant] = result
+        logger.info(f"{variant}: holdout WMAE {result['holdout_wmae']:,.2f} ({result['wmae_gap']:+,.2f} vs "
+                    f"{report['teacher']['holdout_wmae']:,.2f}), {result['speedup']:.1f}x faster, "
+                    f"{result['model_bytes']:,} bytes")
+
+    if args.register:
+        quantize = args.quantize
+        variant = 'float16' if quantize else 'float64'
+        name = args.name or f"fast_{args.student}"
+        add_model(ARTIFACTS_DIR, name, library, students[quantize], features, {
+            'source': 'distill_model',
+            'teacher': 'weighted_ensemble',
+            'quantized': quantize,
+            **{key: report['variants'][variant][key] for key in ('holdout_wmae', 'wmae_gap', 'speedup')}
+        })
+        report['registered'] = name
+        logger.info(f"Registered {name} in {ARTIFACTS_DIR}")
+
+    report_path = REPORTS_DIR / "distillation.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report saved to {report_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Incremental retraining of the XGBoost/LightGBM ensemble on recent weeks.
+
+Instead of refitting both boosters on the full history, the saved models
+are either continued for a few boosting rounds on a recent window
+(``xgb_model=`` / ``init_model=``) or kept as they are while only the
+ensemble weights are re-estimated on that window. The weights are fitted
+on the last ``--weight-weeks`` of the window, which the boosters are not
+continued on, so they reflect out-of-sample errors (in ``weights`` mode
+nothing is refitted and the whole window is used). The candidate is scored
+on the latest weeks (the holdout fold, never trained on here) and is only
+promoted when its WMAE is no worse than the current artifact's. With
+``--compare-full`` a from-scratch retrain with the stored hyperparameters
+is timed and scored too, to report the time saved and the WMAE difference.
+It is fitted on every week before the weight weeks and weighted on them
+the same way.
+
+The candidate is always written to the candidate artifact, where the API
+can shadow it; ``--promote`` also replaces ``advanced_models.pkl`` when
+validation passes (the previous artifact is kept as ``.bak``) and, as the
+API serves them in preference to the pickle, re-exports the native
+artifacts when they exist.
+
+Usage:
+    python src/training/incremental_retrain.py [--mode continue|weights] [--window-weeks 26]
+        [--weight-weeks 4] [--holdout-weeks 4] [--rounds 100] [--compare-full] [--promote]
+"""
+
+import argparse
+import json
+import pickle
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from features.encoders import CategoricalEncoders
+from serving.artifacts import export_artifacts, MANIFEST as ARTIFACT_MANIFEST
+from training.common import (
+    load_feature_list, load_model_artifacts, prepare_features,
+    ensemble_predict, weighted_mean_absolute_error
+)
+from utils.config import (
+    ADVANCED_MODELS_FILE, ARTIFACTS_DIR, CANDIDATE_MODELS_FILE, CATEGORY_MAPS_FILE, LABEL_ENCODERS_FILE,
+    REPORTS_DIR, RETRAIN_CONFIG
+)
+from utils.logger import get_project_logger
+
+logger = get_project_logger("incremental_retrain")
+
+MODES = ('continue', 'weights')
+
+def recent_folds(dates: pd.Series, window_weeks: int, weight_weeks: int,
+                 holdout_weeks: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Masks of the recent training window, split into boosting and weight weeks, and the holdout weeks.
+
+    The window is the ``window_weeks`` weeks before the holdout; its last
+    ``weight_weeks`` form the weight fold.
+
+    Returns:
+        Tuple of (fit_mask, weight_mask, holdout_mask)
+    """
+    if not 0 < weight_weeks < window_weeks:
+        raise ValueError(f"weight_weeks must be between 1 and {window_weeks - 1}")
+    weeks = np.sort(dates.unique())
+    if len(weeks) <= holdout_weeks + weight_weeks:
+        raise ValueError(f"Need more than {holdout_weeks + weight_weeks} weeks of data")
+    holdout_start = weeks[-holdout_weeks]
+    weight_start = weeks[-holdout_weeks - weight_weeks]
+    window_start = weeks[max(0, len(weeks) - holdout_weeks - window_weeks)]
+    holdout_mask = (dates >= holdout_start).to_numpy()
+    weight_mask = ((dates >= weight_start) & (dates < holdout_start)).to_numpy()
+    fit_mask = ((dates >= window_start) & (dates < weight_start)).to_numpy()
+    return fit_mask, weight_mask, holdout_mask
+
+def continue_booster(key: str, model, X, y, rounds: int):
+    """Add ``rounds`` boosting rounds to a fitted model, trained on (X, y)."""
+    params = model.get_params()
+    params['n_estimators'] = rounds
+    candidate = type(model)(**params)
+    if key == 'xgb':
+        candidate.fit(X, y, xgb_model=model.get_booster())
+    else:
+        candidate.fit(X, y, init_model=model.booster_)
+    return candidate
+
+def refit_booster(model, X, y):
+    """Fit a fresh model with the same hyperparameters."""
+    return type(model)(**model.get_params()).fit(X, y)
+
+def inverse_error_weights(predictions: Dict[str, np.ndarray], y, is_holiday) -> Dict[str, float]:
+    """Normalized 1/WMAE weights, the notebook's weighting scheme applied to WMAE."""
+    inverse = {
+        key: 1.0 / max(weighted_mean_absolute_error(y, values, is_holiday), 1e-9)
+        for key, values in predictions.items()
+    }
+    total = sum(inverse.values())
+    return {key: value / total for key, value in inverse.items()}
+
+def member_predictions(artifacts: Dict, X) -> Dict[str, np.ndarray]:
+    return {
+        key: np.asarray(artifacts[f"{key}_model"].predict(X), dtype=np.float64)
+        for key in artifacts['ensemble_weights'] if artifacts.get(f"{key}_model") is not None
+    }
+
+def retrain(artifacts: Dict, mode: str, fit: Tuple, weight: Tuple, rounds: int) -> Dict:
+    """
+    Build the candidate artifact from the current one and the recent window.
+
+    Args:
+        artifacts: Current artifact
+        mode: ``continue`` or ``weights``
+        fit: (X, y) the boosters are continued on
+        weight: (X, y, is_holiday) of later weeks the ensemble weights are estimated on
+        rounds: Boosting rounds added per model
+    """
+    candidate = dict(artifacts)
+    if mode == 'continue':
+        X, y = fit
+        for key in artifacts['ensemble_weights']:
+            if artifacts.get(f"{key}_model") is not None:
+                candidate[f"{key}_model"] = continue_booster(key, artifacts[f"{key}_model"], X, y, rounds)
+    X, y, is_holiday = weight
+    candidate['ensemble_weights'] = inverse_error_weights(member_predictions(candidate, X), y, is_holiday)
+    return candidate
+
+def save_artifacts(artifacts: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'wb') as f:
+        pickle.dump(artifacts, f)
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally retrain the boosting ensemble on recent weeks")
+    parser.add_argument("--mode", choices=MODES, default='continue',
+                        help="continue the boosters, or only re-estimate the ensemble weights")
+    parser.add_argument("--window-weeks", type=int, default=RETRAIN_CONFIG["window_weeks"])
+    parser.add_argument("--weight-weeks", type=int, default=RETRAIN_CONFIG["weight_weeks"],
+                        help="Last window weeks held back from boosting to estimate the ensemble weights")
+    parser.add_argument("--holdout-weeks", type=int, default=RETRAIN_CONFIG["holdout_weeks"])
+    parser.add_argument("--rounds", type=int, default=RETRAIN_CONFIG["rounds"])
+    parser.add_argument("--tolerance", type=float, default=RETRAIN_CONFIG["tolerance"])
+    parser.add_argument("--compare-full", action="store_true",
+                        help="Also time and score a from-scratch retrain on all weeks before the weight weeks")
+    parser.add_argument("--promote", action="store_true",
+                        help="Replace advanced_models.pkl when the candidate passes validation")
+    parser.add_argument("--output", type=Path, default=CANDIDATE_MODELS_FILE)
+    args = parser.parse_args()
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+    artifacts = load_model_artifacts()
+    if not isinstance(artifacts, dict) or 'ensemble_weights' not in artifacts:
+        raise SystemExit("advanced_models.pkl does not contain the boosting ensemble")
+
+    df = df.sort_values(['Date', 'Store', 'Dept']).reset_index(drop=True)
+    X = prepare_features(df, load_feature_list())
+    y = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+    is_holiday = df['IsHoliday_x'].to_numpy(dtype=bool)
+    try:
+        fit_mask, weight_mask, holdout_mask = recent_folds(
+            df['Date'], args.window_weeks, args.weight_weeks, args.holdout_weeks
+        )
+    except ValueError as e:
+        raise SystemExit(str(e))
+    window_mask = fit_mask | weight_mask
+    # Without refitting, the whole window is out of sample for the weights
+    ensemble_mask = window_mask if args.mode == 'weights' else weight_mask
+    logger.info(f"Window: {window_mask.sum():,} rows over {args.window_weeks} weeks "
+                f"({ensemble_mask.sum():,} for the ensemble weights), "
+                f"holdout: {holdout_mask.sum():,} rows over {args.holdout_weeks} weeks")
+
+    def holdout_wmae(candidate: Dict) -> float:
+        return weighted_mean_absolute_error(
+            y[holdout_mask], ensemble_predict(candidate, X[holdout_mask]), is_holiday[holdout_mask]
+        )
+
+    report = {'mode': args.mode, 'window_rows': int(window_mask.sum()), 'weight_rows': int(ensemble_mask.sum()),
+              'holdout_rows': int(holdout_mask.sum())}
+    report['current_wmae'] = holdout_wmae(artifacts)
+
+    start = time.perf_counter()
+    candidate = retrain(artifacts, args.mode, (X[fit_mask], y[fit_mask]),
+                        (X[ensemble_mask], y[ensemble_mask], is_holiday[ensemble_mask]), args.rounds)
+    report['incremental_seconds'] = time.perf_counter() - start
+    report['incremental_wmae'] = holdout_wmae(candidate)
+    report['ensemble_weights'] = candidate['ensemble_weights']
+    logger.info(f"Incremental ({args.mode}) retrain: {report['incremental_seconds']:.1f}s, "
+                f"holdout WMAE {report['incremental_wmae']:,.2f} (current {report['current_wmae']:,.2f})")
+
+    if args.compare_full:
+        train_mask = ~holdout_mask & ~weight_mask
+        start = time.perf_counter()
+        full = dict(artifacts)
+        for key in artifacts['ensemble_weights']:
+            if artifacts.get(f"{key}_model") is not None:
+                full[f"{key}_model"] = refit_booster(artifacts[f"{key}_model"], X[train_mask], y[train_mask])
+        full['ensemble_weights'] = inverse_error_weights(
+            member_predictions(full, X[weight_mask]), y[weight_mask], is_holiday[weight_mask]
+        )
+        report['full_seconds'] = time.perf_counter() - start
+        report['full_wmae'] = holdout_wmae(full)
+        report['time_saved_seconds'] = report['full_seconds'] - report['incremental_seconds']
+        report['wmae_vs_full'] = report['incremental_wmae'] - report['full_wmae']
+        logger.info(f"Full retrain: {report['full_seconds']:.1f}s, holdout WMAE {report['full_wmae']:,.2f}; "
+                    f"incremental saves {report['time_saved_seconds']:.1f}s at "
+                    f"{report['wmae_vs_full']:+,.2f} WMAE")
+
+    report['passed'] = report['incremental_wmae'] <= report['current_wmae'] * (1 + args.tolerance)
+    candidate['retrain'] = {
+        'mode': args.mode,
+        'trained_through': str(df.loc[window_mask, 'Date'].max().date()),
+        'holdout_wmae': report['incremental_wmae']
+    }
+    save_artifacts(candidate, args.output)
+    logger.info(f"Candidate saved to {args.output}")
+
+    report['promoted'] = False
+    if not report['passed']:
+        logger.warning("Candidate is worse than the current models on the holdout; not promoted")
+    elif args.promote:
+        if (ARTIFACTS_DIR / ARTIFACT_MANIFEST).exists():
+            encoders = CategoricalEncoders.load(LABEL_ENCODERS_FILE, CATEGORY_MAPS_FILE)
+            export_artifacts(candidate, load_feature_list(), encoders, ARTIFACTS_DIR)
+            logger.info(f"Re-exported the native artifacts in {ARTIFACTS_DIR}")
+        if ADVANCED_MODELS_FILE.exists():
+            shutil.copy2(ADVANCED_MODELS_FILE, ADVANCED_MODELS_FILE.with_suffix('.pkl.bak'))
+        save_artifacts(candidate, ADVANCED_MODELS_FILE)
+        report['promoted'] = True
+        logger.info(f"Promoted candidate to {ADVANCED_MODELS_FILE}")
+
+    report_path = REPORTS_DIR / "incremental_retrain.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report saved to {report_path}")
+
+if __name__ == "__main__":
+    main()
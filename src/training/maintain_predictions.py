@@ -0,0 +1,49 @@
+"""
+Maintain the partitioned ``predictions`` table.
+
+Run daily (or at least monthly). Creates the partitions for the coming
+months, then compacts every month older than the retention window into
+``prediction_rollups`` and drops its partition, one month per
+transaction. On databases without partitioning (SQLite) the expired rows
+are rolled up and deleted instead.
+
+Usage:
+    python src/training/maintain_predictions.py [--keep-months 3] [--months-ahead 2] [--dry-run]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import ensure_partitions, expired_months, get_db_session, rollup_month
+from utils.config import RETENTION_CONFIG
+from utils.logger import get_project_logger
+
+logger = get_project_logger("maintain_predictions")
+
+def main():
+    parser = argparse.ArgumentParser(description="Create upcoming predictions partitions and roll up expired ones")
+    parser.add_argument("--keep-months", type=int, default=RETENTION_CONFIG["keep_months"])
+    parser.add_argument("--months-ahead", type=int, default=RETENTION_CONFIG["months_ahead"])
+    parser.add_argument("--dry-run", action="store_true", help="Only list the months that would be rolled up")
+    args = parser.parse_args()
+
+    with get_db_session() as db:
+        months = expired_months(db, args.keep_months)
+        if not args.dry_run:
+            for name in ensure_partitions(db, args.months_ahead):
+                logger.info(f"Created partition {name}")
+
+    if args.dry_run:
+        logger.info(f"Months past retention: {', '.join(m.strftime('%Y-%m') for m in months) or 'none'}")
+        return
+    for month in months:
+        with get_db_session() as db:
+            rolled = rollup_month(db, month)
+        logger.info(f"Rolled up {month:%Y-%m} into {rolled:,} prediction_rollups rows")
+    logger.info(f"Retention complete: {len(months)} month(s) compacted, keeping {args.keep_months} month(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Materialize next weeks' forecasts for every store/department series.
+
+Run after new weekly data arrives. Every (Store, Dept) pair in the
+training data is scored for the ``--weeks`` weeks following the last
+observed sales week (or from ``--start``), with exogenous inputs taken
+from features.csv, in one vectorized model call. The forecasts are
+written as a memory-mapped array that the API serves directly
+(``serving.materialized``), and as rows of the ``predictions`` table.
+
+Usage:
+    python src/training/materialize_forecasts.py [--weeks 4] [--start 2012-11-02] [--skip-db]
+"""
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from features.builder import FeatureBuilder
+from features.calendar import CalendarTable, friday_of_week, week_numbers
+from features.encoders import CategoricalEncoders
+from features.exogenous import ExogenousIndex, MARKDOWN_COLUMNS
+from serving.artifacts import load_artifacts, pickled_models, MANIFEST as ARTIFACT_MANIFEST
+from serving.intervals import IntervalTable
+from serving.materialized import write_forecasts
+from training.common import load_feature_list, load_model_artifacts
+from utils.config import (
+    ARTIFACTS_DIR, FEATURES_FILE, FORECASTS_DIR, MATERIALIZE_CONFIG, PREDICTION_INTERVALS_FILE,
+    STORES_FILE, TRAIN_FILE
+)
+from utils.logger import get_project_logger
+
+logger = get_project_logger("materialize_forecasts")
+
+def load_serving_model() -> Tuple[str, object, FeatureBuilder]:
+    """
+    Load the model and feature builder, preferring the native-format artifacts.
+
+    Returns:
+        Tuple of (model_name, model, feature_builder)
+    """
+    if (ARTIFACTS_DIR / ARTIFACT_MANIFEST).exists():
+        artifacts = load_artifacts(ARTIFACTS_DIR)
+        models, feature_list, encoders = artifacts.models, artifacts.feature_list, artifacts.encoders
+    else:
+        models = pickled_models(load_model_artifacts())
+        feature_list, encoders = load_feature_list(), CategoricalEncoders.load()
+    name = 'weighted_ensemble' if 'weighted_ensemble' in models else next(iter(models))
+    model = models[name]
+    exogenous = ExogenousIndex.from_csv(FEATURES_FILE, STORES_FILE)
+    return name, model, FeatureBuilder(feature_list, encoders, exogenous, CalendarTable())
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize upcoming weekly forecasts for all series")
+    parser.add_argument("--weeks", type=int, default=MATERIALIZE_CONFIG["weeks"])
+    parser.add_argument("--start", default=None,
+                        help="First forecast week (YYYY-MM-DD, defaults to the week after the training data)")
+    parser.add_argument("--output", type=Path, default=FORECASTS_DIR)
+    parser.add_argument("--skip-db", action="store_true", help="Do not write predictions table rows")
+    args = parser.parse_args()
+
+    train = pd.read_csv(TRAIN_FILE, usecols=['Store', 'Dept', 'Date'])
+    pairs = np.unique(train[['Store', 'Dept']].to_numpy(dtype=np.int64), axis=0)
+    if args.start:
+        start_week = int(week_numbers([np.datetime64(args.start)])[0])
+    else:
+        start_week = int(week_numbers(train['Date'].to_numpy(dtype='datetime64[D]')).max()) + 1
+
+    # Series-major grid: all weeks of series 0, then series 1, ...
+    weeks = np.tile(np.arange(start_week, start_week + args.weeks), len(pairs))
+    stores = np.repeat(pairs[:, 0], args.weeks)
+    depts = np.repeat(pairs[:, 1], args.weeks)
+    dates = friday_of_week(weeks)
+    n = len(weeks)
+    batch = {
+        'Store': stores,
+        'Dept': depts,
+        'Date': dates,
+        **{name: np.full(n, np.nan) for name in ('Temperature', 'Fuel_Price', 'CPI', 'Unemployment')},
+        **{name: np.full(n, np.nan) for name in MARKDOWN_COLUMNS}
+    }
+
+    model_name, model, builder = load_serving_model()
+    start = time.perf_counter()
+    forecasts = np.asarray(model.predict(builder.build(batch)), dtype=np.float64)
+    elapsed = time.perf_counter() - start
+    logger.info(f"Scored {len(pairs):,} series x {args.weeks} weeks ({n:,} rows) with {model_name} "
+                f"in {elapsed:.2f}s")
+
+    first_week_ending = str(dates[0])
+    manifest = write_forecasts(args.output, stores, depts, weeks, forecasts, start_week, args.weeks,
+                               model_name, first_week_ending)
+    logger.info(f"Forecasts for weeks ending {first_week_ending} to {dates.max()} written to "
+                f"{args.output / manifest['file']}")
+
+    if args.skip_db:
+        return
+    if PREDICTION_INTERVALS_FILE.exists():
+        is_holiday = CalendarTable().holiday_flags(dates)
+        lower, upper = IntervalTable.load(PREDICTION_INTERVALS_FILE).bounds(forecasts, stores, depts, is_holiday)
+    else:
+        lower, upper = forecasts * 0.9, forecasts * 1.1
+    try:
+        from database import Prediction, get_db_session
+        run = {'materialized': True, 'run': manifest['created_at']}
+        rows = [
+            {
+                'store_id': int(s), 'dept_id': int(d), 'prediction_date': datetime.fromisoformat(str(day)),
+                'predicted_sales': round(float(v), 2), 'confidence_lower': round(float(lo), 2),
+                'confidence_upper': round(float(hi), 2), 'model_used': model_name, 'input_features': run
+            }
+            for s, d, day, v, lo, hi in zip(stores, depts, dates, forecasts, lower, upper)
+        ]
+        with get_db_session() as db:
+            for i in range(0, len(rows), MATERIALIZE_CONFIG["db_chunk_size"]):
+                db.bulk_insert_mappings(Prediction, rows[i:i + MATERIALIZE_CONFIG["db_chunk_size"]])
+        logger.info(f"Inserted {len(rows):,} rows into predictions")
+    except Exception as e:
+        logger.warning(f"Could not write predictions table rows: {e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Rank, prune and retrain on reduced feature sets.
+
+Many of the 89 serving features duplicate each other (``IsHoliday_x``,
+``IsHoliday_y`` and ``IsHoliday_int``, ``Week`` and ``WeekOfYear``) or add
+little on top of the lags. This job:
+
+1. fits a reference model on the notebook's training split with every
+   feature and ranks the features by split gain and by permutation
+   importance (WMAE increase on the holdout when a column is shuffled)
+2. walks the ranking and drops constant features and any feature whose
+   correlation with a better-ranked kept feature exceeds the threshold
+3. retrains on the top ``--sizes`` features of what is left and reports,
+   for each set and for the full list, holdout WMAE next to inference
+   latency, the size of the model's input matrix and model size
+
+Only inference gets cheaper. The API still builds the full serving matrix
+for every request and a reduced model selects its columns from it
+(``serving.artifacts.SubsetModel``), so feature building costs the same
+whichever set is served.
+
+The ranking and the per-size results go to
+``results/reports/feature_selection.json`` and each feature set to
+``results/models/feature_sets/top_<k>.txt``. ``--export k`` refits the
+``k``-feature model on all rows and registers it in the native artifacts
+as ``<lgb|xgb>_top<k>``, where the API serves it with its own feature
+list.
+
+Usage:
+    python src/training/select_features.py [--model lightgbm] [--sizes 15 25 40 60]
+        [--correlation-threshold 0.98] [--export 25]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from data.data_loader import DataLoader
+from serving.artifacts import MANIFEST as ARTIFACT_MANIFEST, add_model
+from training.backtest import resolve_factory
+from training.common import holdout_split, load_feature_list, prepare_features, weighted_mean_absolute_error
+from utils.config import (
+    ARTIFACTS_DIR, FEATURE_SELECTION_CONFIG, FEATURE_SETS_DIR, INTERVAL_CONFIG, MODEL_CONFIG, REPORTS_DIR
+)
+from utils.logger import get_project_logger
+
+logger = get_project_logger("select_features")
+
+# --model -> (native library, artifact name prefix) for --export
+EXPORTABLE = {
+    'lightgbm': ('lightgbm', 'lgb'),
+    'xgboost': ('xgboost', 'xgb')
+}
+
+def gain_importance(model, n_features: int) -> Optional[np.ndarray]:
+    """Total split gain per feature, None for models without trees."""
+    if hasattr(model, 'booster_'):
+        return np.asarray(model.booster_.feature_importance('gain'), dtype=np.float64)
+    if hasattr(model, 'get_booster'):
+        scores = model.get_booster().get_score(importance_type='total_gain')
+        return np.array([scores.get(f"f{i}", 0.0) for i in range(n_features)])
+    if hasattr(model, 'feature_importances_'):
+        return np.asarray(model.feature_importances_, dtype=np.float64)
+    return None
+
+def permutation_importance(model, X: np.ndarray, y: np.ndarray, is_holiday: np.ndarray,
+                           seed: int) -> np.ndarray:
+    """WMAE increase when each column is shuffled in turn (one shared copy of ``X``)."""
+    rng = np.random.default_rng(seed)
+    X = np.array(X, dtype=np.float64)
+    base = weighted_mean_absolute_error(y, model.predict(X), is_holiday)
+    increases = np.empty(X.shape[1])
+    for j in range(X.shape[1]):
+        original = X[:, j].copy()
+        X[:, j] = rng.permutation(original)
+        increases[j] = weighted_mean_absolute_error(y, model.predict(X), is_holiday) - base
+        X[:, j] = original
+    return increases
+
+def rank_scores(*scores: Optional[np.ndarray]) -> np.ndarray:
+    """Mean fractional rank (1 = most important) over the available importance measures."""
+    ranks = [np.argsort(np.argsort(-values)) / max(len(values) - 1, 1)
+             for values in scores if values is not None]
+    return 1.0 - np.mean(ranks, axis=0)
+
+def prune_correlated(X: np.ndarray, order: np.ndarray, threshold: float) -> Dict[int, Optional[int]]:
+    """
+    Walk features in ``order`` and keep those not explained by a kept one.
+
+    Returns:
+        Mapping of every feature index to None when kept, to itself when
+        constant, or to the kept feature it is correlated with
+    """
+    std = X.std(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        correlation = np.abs(np.corrcoef(X, rowvar=False))
+    decisions, kept = {}, []
+    for j in order:
+        if std[j] == 0:
+            decisions[j] = j
+            continue
+        partners = [k for k in kept if correlation[j, k] > threshold]
+        decisions[j] = partners[0] if partners else None
+        if not partners:
+            kept.append(j)
+    return decisions
+
+def best_of(func, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def model_bytes(model) -> Optional[int]:
+    if hasattr(model, 'booster_'):
+        return len(model.booster_.model_to_string())
+    if hasattr(model, 'get_booster'):
+        return len(model.get_booster().save_raw())
+    return None
+
+def evaluate(factory, features: List[str], columns: np.ndarray, X: np.ndarray, y: np.ndarray,
+             is_holiday: np.ndarray, train: np.ndarray, val: np.ndarray, latency_rows: int,
+             model=None) -> Dict:
+    """
+    Fit on the selected columns (unless ``model`` is given) and measure accuracy and cost.
+
+    Args:
+        train: Training row indices
+        val: Holdout row indices
+    """
+    start = time.perf_counter()
+    if model is None:
+        model = factory().fit(X[np.ix_(train, columns)], y[train])
+    fit_seconds = time.perf_counter() - start
+    X_val = X[np.ix_(val, columns)]
+    sample = np.ascontiguousarray(X_val[:latency_rows], dtype=np.float64)
+    return {
+        'features': len(features),
+        'holdout_wmae': weighted_mean_absolute_error(y[val], model.predict(X_val), is_holiday[val]),
+        'fit_seconds': fit_seconds,
+        'predict_ms': best_of(lambda: model.predict(sample)) * 1000,
+        'matrix_mb': len(sample) * len(features) * 8 / 1e6,
+        'model_bytes': model_bytes(model)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Select reduced feature sets and report their cost and accuracy")
+    parser.add_argument("--model", default='lightgbm', help="Estimator factory, as in backtest.py")
+    parser.add_argument("--sizes", type=int, nargs='+', default=FEATURE_SELECTION_CONFIG["sizes"])
+    parser.add_argument("--correlation-threshold", type=float,
+                        default=FEATURE_SELECTION_CONFIG["correlation_threshold"])
+    parser.add_argument("--permutation-rows", type=int, default=FEATURE_SELECTION_CONFIG["permutation_rows"])
+    parser.add_argument("--latency-rows", type=int, default=FEATURE_SELECTION_CONFIG["latency_rows"])
+    parser.add_argument("--export", type=int, default=None, metavar="K",
+                        help="Refit the K-feature model on all rows and add it to the native artifacts")
+    args = parser.parse_args()
+    make_model = resolve_factory(args.model)
+    if args.export is not None:
+        if args.model not in EXPORTABLE:
+            raise SystemExit(f"--export needs --model {' or '.join(EXPORTABLE)}")
+        if not (ARTIFACTS_DIR / ARTIFACT_MANIFEST).exists():
+            raise SystemExit("No native artifacts to add to. Run python src/serving/artifacts.py first.")
+
+    def factory():
+        return make_model(-1)
+
+    df = DataLoader().load_processed_data()
+    if df is None:
+        raise SystemExit("Processed data not found. Run the feature engineering notebook first.")
+    feature_list = load_feature_list()
+    X = prepare_features(df, feature_list).to_numpy(dtype=np.float32)
+    y = df['Weekly_Sales'].to_numpy(dtype=np.float64)
+    is_holiday = df['IsHoliday_x'].to_numpy(dtype=bool)
+    val_mask, split_date = holdout_split(df['Date'], INTERVAL_CONFIG["validation_quantile"])
+    train, val = np.flatnonzero(~val_mask), np.flatnonzero(val_mask)
+    logger.info(f"{len(feature_list)} features, {len(train):,} training and {len(val):,} holdout rows "
+                f"(after {split_date.date()})")
+
+    all_columns = np.arange(len(feature_list))
+    reference = factory().fit(X[train], y[train])
+    report = {'model': args.model, 'reference': evaluate(
+        factory, feature_list, all_columns, X, y, is_holiday, train, val, args.latency_rows, reference
+    )}
+    logger.info(f"Reference model: holdout WMAE {report['reference']['holdout_wmae']:,.2f}")
+
+    # Rank by gain and permutation importance, then drop constant and redundant features
+    rng = np.random.default_rng(MODEL_CONFIG["random_state"])
+    sample = rng.choice(val, min(args.permutation_rows, len(val)), replace=False)
+    gain = gain_importance(reference, len(feature_list))
+    permutation = permutation_importance(reference, X[sample], y[sample], is_holiday[sample],
+                                         MODEL_CONFIG["random_state"])
+    score = rank_scores(gain, permutation)
+    order = np.argsort(-score, kind='stable')
+    correlation_rows = rng.choice(train, min(100000, len(train)), replace=False)
+    decisions = prune_correlated(X[correlation_rows], order, args.correlation_threshold)
+    selected = [j for j in order if decisions[j] is None]
+    report['ranking'] = [
+        {
+            'feature': feature_list[j],
+            'score': float(score[j]),
+            'gain': None if gain is None else float(gain[j]),
+            'permutation_wmae_increase': float(permutation[j]),
+            'dropped': (None if decisions[j] is None else
+                        'constant' if decisions[j] == j else f"correlated with {feature_list[decisions[j]]}")
+        }
+        for j in order
+    ]
+    logger.info(f"{len(selected)} features left after dropping {len(feature_list) - len(selected)} constant "
+                f"or correlated (>{args.correlation_threshold}) features")
+
+    FEATURE_SETS_DIR.mkdir(parents=True, exist_ok=True)
+    report['sets'] = {}
+    for size in sorted(set(min(size, len(selected)) for size in args.sizes)):
+        columns = np.array(selected[:size])
+        features = [feature_list[j] for j in columns]
+        result = evaluate(factory, features, columns, X, y, is_holiday, train, val, args.latency_rows)
+        result['wmae_vs_reference'] = result['holdout_wmae'] - report['reference']['holdout_wmae']
+        result['predict_speedup'] = report['reference']['predict_ms'] / result['predict_ms']
+        path = FEATURE_SETS_DIR / f"top_{size}.txt"
+        path.write_text('\n'.join(features) + '\n')
+        result['feature_list_file'] = str(path)
+        report['sets'][str(size)] = result
+        logger.info(f"top {size:3d}: WMAE {result['holdout_wmae']:,.2f} ({result['wmae_vs_reference']:+,.2f}), "
+                    f"predict {result['predict_ms']:.1f} ms ({result['predict_speedup']:.2f}x) "
+                    f"per {args.latency_rows:,} rows")
+
+    if args.export is not None:
+        size = min(args.export, len(selected))
+        columns = np.array(selected[:size])
+        features = [feature_list[j] for j in columns]
+        model = factory().fit(X[:, columns], y)
+        library, prefix = EXPORTABLE[args.model]
+        name = f"{prefix}_top{size}"
+        add_model(ARTIFACTS_DIR, name, library, model, features, {
+            'source': 'select_features',
+            'holdout_wmae': report['sets'].get(str(size), {}).get('holdout_wmae')
+        })
+        report['exported'] = name
+        logger.info(f"Registered {name} with {size} features in {ARTIFACTS_DIR}")
+
+    report_path = REPORTS_DIR / "feature_selection.json"
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Report saved to {report_path}")
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,19 @@ STORES_FILE = RAW_DATA_DIR / "stores.csv"
 PROCESSED_TRAIN_FILE = PROCESSED_DATA_DIR / "train_processed.csv"
 FEATURE_LIST_FILE = PROCESSED_DATA_DIR / "feature_list.txt"
 LABEL_ENCODERS_FILE = PROCESSED_DATA_DIR / "label_encoders.pkl"
+CATEGORY_MAPS_FILE = PROCESSED_DATA_DIR / "categorical_maps.npz"
+
+# Model artifacts
+ADVANCED_MODELS_FILE = MODELS_DIR / "advanced_models.pkl"
+ARTIFACTS_DIR = MODELS_DIR / "artifacts"  # native-format export of the models and encoders
+CANDIDATE_MODELS_FILE = Path(os.getenv("CANDIDATE_MODELS_FILE", MODELS_DIR / "candidate_models.pkl"))
+PREDICTION_INTERVALS_FILE = MODELS_DIR / "prediction_intervals.npz"
+HIERARCHY_FILE = MODELS_DIR / "hierarchy.npz"
+DRIFT_REFERENCE_FILE = MODELS_DIR / "drift_reference.npz"
+BASELINE_FILE = MODELS_DIR / "baseline.npz"
+FORECASTS_DIR = Path(os.getenv("FORECASTS_DIR", RESULTS_DIR / "forecasts"))  # materialized weekly forecasts
+FEATURE_SETS_DIR = MODELS_DIR / "feature_sets"  # reduced feature lists from select_features.py
+HYPERPARAMETERS_FILE = REPORTS_DIR / "hyperparameter_optimization.json"  # tuned booster parameters
 
 # Model configuration
 MODEL_CONFIG = {
@@ -44,7 +57,9 @@ FEATURE_CONFIG = {
     "handle_negative_sales": True,
     "outlier_threshold": 3,  # standard deviations
     "min_periods_rolling": 1,
-    "ewm_spans": [4, 8, 12, 26]
+    "ewm_spans": [4, 8, 12, 26],
+    "series_start": "2010-02-05",  # first week in train.csv, origin of Days_Since_Start
+    "calendar_years": (2010, 2035)  # span of the precomputed serving calendar
 }
 
 # Evaluation metrics
@@ -55,6 +70,167 @@ METRICS_CONFIG = {
     "regular_weight": 1   # Weight for regular weeks in WMAE
 }
 
+# Prediction interval calibration
+INTERVAL_CONFIG = {
+    "coverage": 0.9,  # nominal coverage of the served interval
+    "validation_quantile": 0.8,  # dates above this quantile form the holdout
+    "min_group_size": 8,  # fewer residuals than this falls back to a coarser group
+    "max_store": 45,
+    "max_dept": 99
+}
+
+# Incremental retraining on recent weeks (src/training/incremental_retrain.py)
+RETRAIN_CONFIG = {
+    "window_weeks": 26,  # recent weeks the boosters are continued on
+    "weight_weeks": 4,  # last window weeks held back from boosting to estimate the ensemble weights
+    "holdout_weeks": 4,  # latest weeks used to validate before promotion
+    "rounds": 100,  # boosting rounds added per model
+    "tolerance": 0.0  # allowed relative WMAE increase for promotion
+}
+
+# Rolling-origin backtests (src/training/backtest.py)
+BACKTEST_CONFIG = {
+    "origins": 8,  # forecast origins, ending at the last week with a full horizon
+    "step_weeks": 4,  # weeks between origins
+    "horizon_weeks": 4,  # weeks forecast from each origin
+    "window_weeks": None,  # training weeks before each origin (None = expanding window)
+    "workers": 4,
+    "group_by": ["Store"]
+}
+
+# Feature selection (src/training/select_features.py)
+FEATURE_SELECTION_CONFIG = {
+    "sizes": [15, 25, 40, 60],  # candidate feature set sizes retrained and compared
+    "correlation_threshold": 0.98,  # of two features correlated above this, the less important is dropped
+    "permutation_rows": 50000,  # holdout rows used for permutation importance
+    "latency_rows": 10000  # batch size of the inference timings
+}
+
+# Distilled fast model (src/training/distill_model.py)
+DISTILL_CONFIG = {
+    "student": "lightgbm",  # lightgbm (shallow boosting) or linear
+    "trees": 50,
+    "leaves": 15,
+    "learning_rate": 0.2,
+    "alpha": 1.0,  # ridge penalty of the linear student
+    "latency_rows": 10000  # batch size of the speedup timings
+}
+
+# Model served when a request does not name one (?model=); missing names fall back to the ensemble
+SERVING_MODEL = os.getenv("SERVING_MODEL", "weighted_ensemble")
+
+# Runtime monitoring
+MONITORING_CONFIG = {
+    "enabled": os.getenv("METRICS_ENABLED", "true").lower() == "true",
+    "flush_interval_s": float(os.getenv("METRICS_FLUSH_INTERVAL", "60"))  # 0 disables DB snapshots
+}
+
+# Input drift monitoring against the training distribution (/monitoring/drift)
+DRIFT_CONFIG = {
+    "enabled": os.getenv("DRIFT_ENABLED", "true").lower() == "true",
+    "bins": 20,  # quantile bins per feature
+    "decay": float(os.getenv("DRIFT_DECAY", "0.5")),  # share of the live counts kept per decay interval
+    "decay_interval_s": float(os.getenv("DRIFT_DECAY_INTERVAL", "60")),  # 0 keeps all counts since startup
+    "min_observations": 100
+}
+
+# Per-client token-bucket rate limits; the redis backend shares buckets across workers
+RATE_LIMIT_CONFIG = {
+    "enabled": os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true",
+    "backend": os.getenv("RATE_LIMIT_BACKEND", "memory"),  # memory or redis
+    "redis_url": os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+    "client_header": "X-API-Key",  # clients without it are limited per address
+    "limits": {  # path -> (requests per second, burst) per client
+        "/predict": (50.0, 100.0),
+        "/batch_predict": (5.0, 10.0),
+        "/batch_predict/columnar": (5.0, 10.0),
+        "/batch_predict/stream": (1.0, 2.0),
+        "/predict/hierarchy": (1.0, 5.0),
+        "/predict/scenarios": (1.0, 5.0)
+    }
+}
+
+# Admission control: cost is rows x models evaluated per row
+ADMISSION_CONFIG = {
+    "enabled": os.getenv("ADMISSION_ENABLED", "true").lower() == "true",
+    "max_batch_rows": int(os.getenv("MAX_BATCH_ROWS", "100000")),  # larger /batch_predict payloads get 413
+    "capacity": float(os.getenv("ADMISSION_CAPACITY", "1000000")),  # cost units in flight per worker
+    "interactive_cost": 1000,  # requests up to this cost are interactive and scored inline
+    "batch_share": 4,  # every n-th queued grant goes to a waiting batch
+    "max_queue": 100,
+    "max_wait_s": 10.0
+}
+
+# Materialized forecasts (src/training/materialize_forecasts.py)
+MATERIALIZE_CONFIG = {
+    "enabled": os.getenv("MATERIALIZED_ENABLED", "true").lower() == "true",  # serve /predict from the store
+    "weeks": 4,  # upcoming weeks scored per run
+    "reload_interval_s": 30.0,  # how often the API checks for a newer run
+    "db_chunk_size": 10000  # predictions rows per insert
+}
+
+# predictions table partitions (see src/training/maintain_predictions.py)
+RETENTION_CONFIG = {
+    "keep_months": int(os.getenv("PREDICTIONS_KEEP_MONTHS", "3")),  # full months kept besides the current one
+    "months_ahead": 2  # partitions prepared ahead of the current month
+}
+
+# Latency budgets with model degradation (X-Deadline-Ms header overrides the default)
+LATENCY_CONFIG = {
+    "budget_ms": float(os.getenv("LATENCY_BUDGET_MS", "0")),  # default budget, 0 disables
+    "max_budget_ms": 60000.0,
+    "safety_margin": float(os.getenv("LATENCY_SAFETY_MARGIN", "1.2")),  # multiplier on latency estimates
+    "decay": 0.1  # weight of each new latency observation
+}
+
+# Response compression
+COMPRESSION_CONFIG = {
+    "enabled": os.getenv("COMPRESSION_ENABLED", "true").lower() == "true",
+    "minimum_size": int(os.getenv("COMPRESSION_MIN_BYTES", "1024")),  # smaller responses are sent as is
+    "level": int(os.getenv("COMPRESSION_LEVEL", "1"))  # gzip level, see benchmarks/bench_serialization.py
+}
+
+# Streaming batch scoring
+STREAMING_CONFIG = {
+    "chunk_size": 5000,  # rows scored per model call
+    "max_chunk_size": 50000,
+    "spool_memory_bytes": 1 << 20  # uploads beyond this are buffered on disk
+}
+
+# What-if scenario evaluation (/predict/scenarios)
+SCENARIO_CONFIG = {
+    "max_scenarios": int(os.getenv("SCENARIO_MAX_SCENARIOS", "32")),
+    "max_rows": int(os.getenv("SCENARIO_MAX_ROWS", "500000"))  # stacked rows per request
+}
+
+# Shadow/canary evaluation of a candidate model (toggle at runtime via /admin/shadow)
+SHADOW_CONFIG = {
+    "model": os.getenv("SHADOW_MODEL", "weighted_ensemble"),  # candidate model name
+    "sample_rate": float(os.getenv("SHADOW_SAMPLE_RATE", "0.1")),  # batches also scored by the candidate
+    "canary_percent": float(os.getenv("CANARY_PERCENT", "0")),  # requests served by the candidate
+    "max_pending": 4,  # queued shadow batches before new samples are dropped
+    "workers": 1
+}
+
+# Request profiling (toggle at runtime via /admin/profiling)
+PROFILING_CONFIG = {
+    "enabled": os.getenv("PROFILING_ENABLED", "false").lower() == "true",
+    "sample_rate": float(os.getenv("PROFILING_SAMPLE_RATE", "0.01"))
+}
+
+# Admin endpoints require this token in X-Admin-Token when set
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Logging configuration
+LOGGING_CONFIG = {
+    "level": os.getenv("LOG_LEVEL", "INFO").upper(),
+    "async": os.getenv("LOG_ASYNC", "true").lower() == "true",  # write from a background thread
+    "json": os.getenv("LOG_JSON", "false").lower() == "true",
+    "queue_size": int(os.getenv("LOG_QUEUE_SIZE", "10000")),  # records beyond this are dropped
+    "prediction_sample_rate": float(os.getenv("LOG_PREDICTION_SAMPLE_RATE", "0.1")),
+    "prediction_max_per_second": float(os.getenv("LOG_PREDICTION_MAX_PER_SECOND", "50"))
+}
+
 def ensure_directories():
     """Create necessary directories if they don't exist."""
     directories = [
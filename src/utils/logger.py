@@ -1,87 +1,255 @@
 """
 Logging utilities for the sales forecasting project.
+
+In async mode (the default, see ``LOGGING_CONFIG``) loggers only push
+records onto an in-memory queue; a ``QueueListener`` thread formats them
+and does the console and file I/O, so request handlers never wait on disk.
+Records are formatted lazily on the listener thread, so callers should
+pass arguments ``%``-style (``logger.info("Store %d", store)``) rather
+than pre-formatting f-strings.
 """
 
+import atexit
+import json
 import logging
+import queue
+import random
 import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils.config import LOGGING_CONFIG
+
+# Attributes every LogRecord has; anything else was passed via ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+# One queue and listener thread per distinct set of output destinations
+_listeners: Dict[Tuple, Tuple[queue.SimpleQueue, QueueListener]] = {}
+_listeners_lock = threading.Lock()
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Non-blocking queue handler that leaves formatting to the listener.
+
+    The stock ``QueueHandler`` merges ``msg % args`` in the calling thread;
+    since the queue never leaves the process the record can be passed
+    through untouched. When the queue is full the record is dropped and
+    counted instead of blocking the caller.
+    """
+
+    def __init__(self, log_queue: queue.SimpleQueue, max_size: int = 10000):
+        super().__init__(log_queue)
+        self.max_size = max_size
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        # SimpleQueue has no bound of its own but puts without a lock round trip
+        if self.queue.qsize() >= self.max_size:
+            self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+class SamplingFilter(logging.Filter):
+    """
+    Pass a random fraction of records, capped at a maximum rate.
+
+    Warnings and errors always pass; sampling only applies to lower levels.
+
+    Args:
+        sample_rate: Fraction of records kept, between 0 and 1
+        max_per_second: Upper bound on kept records per second (0 for no cap)
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: float = 0.0):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self._window = 0
+        self._in_window = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if self.max_per_second > 0:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window, self._in_window = window, 0
+            if self._in_window >= self.max_per_second:
+                return False
+            self._in_window += 1
+        return True
+
+def _build_handlers(level: int, log_file: Optional[str], console_output: bool,
+                    json_format: bool) -> List[logging.Handler]:
+    if json_format:
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+            datefmt='%Y-%m-%d %H:%M:%S'
+        )
+
+    handlers = []
+    # Console handler
+    if console_output:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setLevel(level)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    # File handler
+    if log_file:
+        # Ensure log directory exists
+        log_path = Path(log_file)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+
+        file_handler = logging.FileHandler(log_file)
+        file_handler.setLevel(level)
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    return handlers
+
+def _queue_handler(level: int, log_file: Optional[str], console_output: bool,
+                   json_format: bool, queue_size: int) -> DeferredQueueHandler:
+    """Return a handler feeding the shared listener for these destinations."""
+    key = (level, str(log_file) if log_file else None, console_output, json_format)
+    with _listeners_lock:
+        if key not in _listeners:
+            log_queue = queue.SimpleQueue()
+            handlers = _build_handlers(level, log_file, console_output, json_format)
+            listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+            listener.start()
+            _listeners[key] = (log_queue, listener)
+        log_queue = _listeners[key][0]
+    return DeferredQueueHandler(log_queue, queue_size)
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop all listener threads."""
+    with _listeners_lock:
+        for log_queue, listener in _listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _listeners.clear()
+
+atexit.register(shutdown_logging)
 
 def setup_logger(
     name: str = "sales_forecasting",
     level: int = logging.INFO,
     log_file: Optional[str] = None,
-    console_output: bool = True
+    console_output: bool = True,
+    async_mode: bool = False,
+    json_format: bool = False,
+    queue_size: int = 10000
 ) -> logging.Logger:
     """
     Set up a logger with both file and console handlers.
-    
+
     Args:
         name: Logger name
         level: Logging level
         log_file: Path to log file (optional)
         console_output: Whether to output to console
-    
+        async_mode: Hand records to a background listener thread instead of
+            writing them in the calling thread
+        json_format: Emit one JSON object per line
+        queue_size: Maximum queued records in async mode before dropping
+
     Returns:
         Configured logger instance
     """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    
+
     # Clear existing handlers
     logger.handlers.clear()
-    
-    # Create formatter
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    
-    # Console handler
-    if console_output:
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(level)
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
-    
-    # File handler
-    if log_file:
-        # Ensure log directory exists
-        log_path = Path(log_file)
-        log_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setLevel(level)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    
+
+    if async_mode:
+        logger.addHandler(_queue_handler(level, log_file, console_output, json_format, queue_size))
+    else:
+        for handler in _build_handlers(level, log_file, console_output, json_format):
+            logger.addHandler(handler)
+
     return logger
 
 def get_project_logger(module_name: str) -> logging.Logger:
     """
     Get a project-specific logger for a module.
-    
+
     Args:
         module_name: Name of the module requesting the logger
-    
+
     Returns:
         Configured logger instance
     """
     # Create logs directory
     logs_dir = Path(__file__).parent.parent.parent / "logs"
     logs_dir.mkdir(exist_ok=True)
-    
+
     # Create log file with timestamp
     timestamp = datetime.now().strftime("%Y%m%d")
     log_file = logs_dir / f"sales_forecasting_{timestamp}.log"
-    
+
     return setup_logger(
         name=f"sales_forecasting.{module_name}",
+        level=logging.getLevelName(LOGGING_CONFIG["level"]),
         log_file=str(log_file),
-        console_output=True
+        console_output=True,
+        async_mode=LOGGING_CONFIG["async"],
+        json_format=LOGGING_CONFIG["json"],
+        queue_size=LOGGING_CONFIG["queue_size"]
     )
 
+def get_sampled_logger(module_name: str, sample_rate: Optional[float] = None,
+                       max_per_second: Optional[float] = None) -> logging.Logger:
+    """
+    Get a project logger for high-volume records such as per-prediction logs.
+
+    Args:
+        module_name: Name of the module requesting the logger
+        sample_rate: Fraction of INFO/DEBUG records kept (defaults to config)
+        max_per_second: Cap on kept records per second (defaults to config)
+
+    Returns:
+        Configured logger instance with a ``SamplingFilter``
+    """
+    logger = get_project_logger(module_name)
+    logger.filters.clear()
+    logger.addFilter(SamplingFilter(
+        LOGGING_CONFIG["prediction_sample_rate"] if sample_rate is None else sample_rate,
+        LOGGING_CONFIG["prediction_max_per_second"] if max_per_second is None else max_per_second
+    ))
+    return logger
+
 # Example usage
 if __name__ == "__main__":
     logger = get_project_logger("test")
@@ -0,0 +1,12 @@
+"""
+Shared pytest setup: make ``src`` importable the way the scripts do.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# The database package creates its engine on import; tests never reach the real server
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,150 @@
+"""
+Tests for rate limiting and admission control.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from serving.admission import AdmissionController, AdmissionRejected, RateLimitMiddleware, TokenBucketLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_token_bucket_refills_at_the_rate():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(clock=clock)
+
+    async def take():
+        return await limiter.take("client", rate=2.0, burst=3.0)
+
+    assert [asyncio.run(take()) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert asyncio.run(take()) == pytest.approx(0.5)
+    clock.now = 0.25
+    assert asyncio.run(take()) == pytest.approx(0.25)
+    clock.now = 0.5
+    assert asyncio.run(take()) == 0.0
+    # Other keys have their own bucket
+    assert asyncio.run(limiter.take("other", rate=2.0, burst=3.0)) == 0.0
+
+async def ok(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+
+def call_middleware(middleware, path: str, api_key: bytes):
+    sent = []
+    scope = {"type": "http", "path": path, "headers": [(b"x-api-key", api_key)], "client": ("10.0.0.1", 1)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope, None, send))
+    return sent[0]["status"], dict(sent[0]["headers"]), sent[1]["body"] if len(sent) > 1 else None
+
+def test_rate_limit_middleware_answers_429_per_client_and_path():
+    clock = FakeClock()
+    middleware = RateLimitMiddleware(ok, TokenBucketLimiter(clock=clock), {"/predict": (0.5, 1)})
+    assert call_middleware(middleware, "/predict", b"a")[0] == 200
+    status, headers, body = call_middleware(middleware, "/predict", b"a")
+    assert status == 429
+    assert headers[b"retry-after"] == b"2"
+    assert json.loads(body) == {"detail": "Rate limit exceeded"}
+    assert call_middleware(middleware, "/predict", b"b")[0] == 200
+    assert call_middleware(middleware, "/health", b"a")[0] == 200
+    clock.now = 2.0
+    assert call_middleware(middleware, "/predict", b"a")[0] == 200
+    assert middleware.rejected == 1
+
+async def hold(controller: AdmissionController, cost: float):
+    """Enter ``admit`` outside an ``async with``; the caller exits it to release the capacity."""
+    admission = controller.admit(cost)
+    await admission.__aenter__()
+    return admission
+
+def test_interactive_requests_are_granted_before_batches_with_a_batch_share():
+    async def scenario():
+        controller = AdmissionController(capacity=10, interactive_cost=1, batch_share=2)
+        holder = await hold(controller, 10)
+        order, release = [], asyncio.Event()
+
+        async def request(name, cost):
+            async with controller.admit(cost):
+                order.append(name)
+                await release.wait()
+
+        tasks = []
+        for name, cost in (("batch", 5), ("interactive1", 1), ("interactive2", 1), ("interactive3", 1)):
+            tasks.append(asyncio.create_task(request(name, cost)))
+            await asyncio.sleep(0)
+        assert controller.status()['queued'] == {'interactive': 3, 'batch': 1}
+
+        await holder.__aexit__(None, None, None)
+        await asyncio.sleep(0.01)
+        release.set()
+        await asyncio.gather(*tasks)
+        return order, controller
+
+    order, controller = asyncio.run(scenario())
+    # The batch waited first but only every second grant goes to a batch
+    assert order == ["interactive1", "batch", "interactive2", "interactive3"]
+    assert controller.in_flight == 0
+
+def test_full_queue_rejects_immediately():
+    async def scenario():
+        controller = AdmissionController(capacity=10, interactive_cost=1, max_queue=1)
+        holder = await hold(controller, 10)
+        waiting = asyncio.create_task(hold(controller, 5))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected):
+            await hold(controller, 5)
+        await holder.__aexit__(None, None, None)
+        admission = await waiting
+        await admission.__aexit__(None, None, None)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.rejected == {'interactive': 0, 'batch': 1}
+    assert controller.admitted == {'interactive': 0, 'batch': 2}
+    assert controller.in_flight == 0
+
+def test_timed_out_waiter_leaves_capacity_untouched():
+    async def scenario():
+        controller = AdmissionController(capacity=10, interactive_cost=1, max_wait_s=0.01)
+        holder = await hold(controller, 10)
+        with pytest.raises(AdmissionRejected):
+            await hold(controller, 1)
+        assert controller.in_flight == 10
+        await holder.__aexit__(None, None, None)
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.in_flight == 0
+    assert controller.status()['queued'] == {'interactive': 0, 'batch': 0}
+    assert controller.rejected['interactive'] == 1
+
+def test_capacity_granted_as_the_wait_times_out_is_handed_back(monkeypatch):
+    async def scenario():
+        controller = AdmissionController(capacity=10, interactive_cost=1)
+        holder = await hold(controller, 10)
+
+        async def granted_then_timed_out(awaitable, timeout):
+            # The holder releases and grants the waiter just as its wait times out
+            await holder.__aexit__(None, None, None)
+            assert controller.in_flight == 1
+            awaitable.cancel()
+            raise asyncio.TimeoutError()
+
+        monkeypatch.setattr(asyncio, "wait_for", granted_then_timed_out)
+        with pytest.raises(AdmissionRejected):
+            await hold(controller, 1)
+        monkeypatch.undo()
+        return controller
+
+    controller = asyncio.run(scenario())
+    assert controller.in_flight == 0
+    assert controller.rejected['interactive'] == 1
+    assert controller.admitted['interactive'] == 0
@@ -0,0 +1,44 @@
+"""
+Tests for the serving registry built from model artifacts.
+"""
+
+import numpy as np
+import pytest
+
+from features.encoders import CategoricalEncoders
+from serving.artifacts import LinearModel, add_model, export_artifacts, load_artifacts, pickled_models
+
+class Constant:
+    def __init__(self, value: float):
+        self.value = value
+
+    def predict(self, X) -> np.ndarray:
+        return np.full(len(X), self.value)
+
+def test_pickled_dictionary_serves_the_weighted_ensemble():
+    models = pickled_models({
+        'xgb_model': Constant(100.0), 'lgb_model': Constant(200.0), 'xgb_params': {'max_depth': 6},
+        'feature_columns': ['Store', 'Dept'], 'ensemble_weights': {'xgb': 0.25, 'lgb': 0.75}
+    })
+    assert list(models) == ['weighted_ensemble', 'xgb_model', 'lgb_model']
+    assert models['weighted_ensemble'].predict(np.zeros((2, 2))).tolist() == [175.0, 175.0]
+
+def test_pickled_dictionary_without_members_is_rejected():
+    with pytest.raises(ValueError, match="No ensemble member models"):
+        pickled_models({'ensemble_weights': {'xgb': 1.0}})
+
+def linear_ensemble(intercept: float) -> dict:
+    model = LinearModel(np.zeros(2), np.ones(2), np.ones(2), intercept)
+    return {'lin_model': model, 'ensemble_weights': {'lin': 1.0}}
+
+def test_reexport_keeps_the_registered_serving_models(tmp_path):
+    encoders = CategoricalEncoders({})
+    export_artifacts(linear_ensemble(1.0), ['Store', 'Dept'], encoders, tmp_path)
+    add_model(tmp_path, 'fast_store', 'linear', LinearModel(np.zeros(1), np.ones(1), np.ones(1), 0.0), ['Store'])
+    add_model(tmp_path, 'fast_dept', 'linear', LinearModel(np.zeros(1), np.ones(1), np.ones(1), 0.0), ['Dept'])
+
+    manifest = export_artifacts(linear_ensemble(5.0), ['Store', 'Size'], encoders, tmp_path)
+    assert list(manifest['serving_models']) == ['fast_store']
+    models = load_artifacts(tmp_path).models
+    assert models['weighted_ensemble'].predict(np.ones((1, 2))).tolist() == [7.0]
+    assert models['fast_store'].predict(np.full((1, 2), 3.0)).tolist() == [3.0]
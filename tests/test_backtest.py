@@ -0,0 +1,34 @@
+"""
+Tests for the grouped WMAE used by the backtest report.
+"""
+
+import numpy as np
+import pandas as pd
+
+from training.common import weighted_mean_absolute_error, wmae_by_group
+
+def test_object_keys_are_grouped():
+    store_types = np.array(['B', 'A', 'B', 'C', 'A'], dtype=object)
+    groups, values = wmae_by_group([1, 2, 3, 4, 5], np.zeros(5), [0, 0, 1, 0, 0], store_types)
+    assert groups[:, 0].tolist() == ['A', 'B', 'C']
+    # Holiday rows weigh five times as much
+    assert values.tolist() == [3.5, (1 + 5 * 3) / 6, 4.0]
+
+def test_mixed_keys_match_the_per_group_wmae():
+    rng = np.random.default_rng(0)
+    horizons = rng.integers(1, 4, 200)
+    holidays = np.array(['Super_Bowl', 'Thanksgiving', np.nan], dtype=object)[rng.integers(0, 3, 200)]
+    actual, predicted = rng.normal(100, 10, 200), rng.normal(100, 10, 200)
+    is_holiday = rng.random(200) < 0.2
+    groups, values = wmae_by_group(actual, predicted, is_holiday, horizons, holidays)
+    assert len(groups) == 9
+    for (horizon, holiday), value in zip(groups, values):
+        # Missing holiday names form one group
+        same = pd.isna(holidays) if pd.isna(holiday) else holidays == holiday
+        rows = (horizons == horizon) & same
+        assert np.isclose(value, weighted_mean_absolute_error(actual[rows], predicted[rows], is_holiday[rows]))
+
+def test_numeric_keys_stay_numeric():
+    groups, _ = wmae_by_group([1, 2, 3], [0, 0, 0], [0, 0, 0], np.array([2, 1, 2]), np.array([7, 7, 8]))
+    assert groups.dtype.kind == 'i'
+    assert groups.tolist() == [[1, 7], [2, 7], [2, 8]]
@@ -0,0 +1,47 @@
+"""
+Tests for the calendar-keyed seasonal baseline.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from features.calendar import season_weeks
+from serving.baseline import BaselineTable
+
+def thanksgiving(year: int) -> np.datetime64:
+    days = pd.date_range(f"{year}-11-22", f"{year}-11-28")
+    return np.datetime64(days[days.weekday == 3][0].date(), 'D')
+
+def test_season_weeks_follow_the_iso_week_with_53_folded():
+    days = pd.date_range("2009-01-01", "2040-12-31").to_numpy(dtype='datetime64[D]')
+    fridays = days + (4 - pd.DatetimeIndex(days).weekday.to_numpy()) % 7
+    iso = pd.DatetimeIndex(fridays).isocalendar().week.to_numpy()
+    assert np.array_equal(season_weeks(days), np.minimum(iso, 52) - 1)
+
+def test_holiday_weeks_keep_their_slot_across_decades():
+    christmas = season_weeks([np.datetime64(f"{year}-12-25") for year in range(2010, 2041)])
+    assert set(christmas) == {51}
+    # Thanksgiving floats with the weekday, by at most one slot
+    assert set(season_weeks([thanksgiving(year) for year in range(2010, 2041)])) == {46, 47}
+
+def test_baseline_keeps_christmas_week_decades_after_the_history():
+    weeks = pd.date_range("2010-02-05", "2012-10-26", freq="7D").to_numpy(dtype='datetime64[D]')
+    christmas = season_weeks(weeks) == 51
+    table = BaselineTable.from_history(np.ones(len(weeks)), np.ones(len(weeks)), weeks,
+                                       np.where(christmas, 5000.0, 1000.0))
+
+    future = [np.datetime64(f"{year}-12-25") for year in (2013, 2021, 2030, 2040)]
+    assert np.allclose(table.predict(np.ones(4), np.ones(4), future), 5000.0)
+    assert np.allclose(table.predict(np.ones(1), np.ones(1), [np.datetime64("2030-12-15")]), 1000.0)
+
+def test_outdated_table_is_rejected(tmp_path):
+    path = tmp_path / "baseline.npz"
+    np.savez_compressed(path, table=np.zeros((2, 2, 52)))
+    with pytest.raises(ValueError, match="build_baseline.py"):
+        BaselineTable.load(path)
+
+def test_save_and_load_round_trip(tmp_path):
+    table = BaselineTable(np.arange(2 * 3 * 52, dtype=np.float32).reshape(2, 3, 52))
+    table.save(tmp_path / "baseline.npz")
+    assert np.array_equal(BaselineTable.load(tmp_path / "baseline.npz").table, table.table)
@@ -0,0 +1,25 @@
+"""
+Tests for the batch feature builder.
+"""
+
+import numpy as np
+import pytest
+
+from features.builder import FeatureBuilder
+from features.encoders import CategoricalEncoders, FrequencyTargetLookup
+
+def test_interaction_encodings_need_the_category_maps():
+    with pytest.raises(ValueError, match="Store_Dept_ID"):
+        FeatureBuilder(['Store', 'Dept', 'Store_Dept_ID_freq'])
+    # Feature lists without interaction encodings do not need them
+    FeatureBuilder(['Store', 'Dept', 'Temperature'])
+
+def test_interaction_encodings_are_looked_up():
+    index = np.full((3, 3), -1, dtype=np.int32)
+    index[1, 2] = 0
+    lookup = FrequencyTargetLookup(index, [143.0, 0.0], [2500.0, 1000.0])
+    builder = FeatureBuilder(['Store_Dept_ID_freq', 'Store_Dept_ID_target_enc'],
+                             CategoricalEncoders({}, {'Store_Dept_ID': lookup}))
+    X = builder.build({'Store': np.array([1, 2]), 'Dept': np.array([2, 2]),
+                       'Date': np.array(['2012-11-23', '2012-11-23'], dtype='datetime64[D]')})
+    assert X.tolist() == [[143.0, 2500.0], [0.0, 1000.0]]
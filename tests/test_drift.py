@@ -0,0 +1,45 @@
+"""
+Tests for drift monitoring of client-supplied inputs.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from monitoring.drift import DriftMonitor, DriftReference
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def reference():
+    rng = np.random.default_rng(0)
+    return DriftReference.from_frame(pd.DataFrame({'Temperature': rng.normal(60, 15, 5000)}), ['Temperature'])
+
+def test_only_supplied_values_are_counted(reference):
+    monitor = DriftMonitor(reference, interval_s=0)
+    monitor.observe({'Temperature': np.array([50.0, np.nan, np.nan, 70.0]), 'CPI': np.array([1.0] * 4)})
+    assert monitor.scores()['Temperature']['observed'] == 2
+
+def test_counts_decay_with_time_without_snapshots(reference):
+    clock = FakeClock()
+    monitor = DriftMonitor(reference, decay=0.5, interval_s=60, min_observations=1, clock=clock)
+    monitor.observe({'Temperature': np.full(400, 60.0)})
+    clock.now = 60
+    assert monitor.scores()['Temperature']['observed'] == pytest.approx(200)
+    clock.now = 180
+    monitor.observe({'Temperature': np.full(100, 60.0)})
+    assert monitor.scores()['Temperature']['observed'] == pytest.approx(150)
+
+def test_shifted_inputs_are_flagged(reference):
+    monitor = DriftMonitor(reference, interval_s=0)
+    rng = np.random.default_rng(1)
+    monitor.observe({'Temperature': rng.normal(60, 15, 2000)})
+    assert monitor.scores()['Temperature']['status'] == 'stable'
+    monitor.reset()
+    monitor.observe({'Temperature': rng.normal(95, 5, 2000)})
+    assert monitor.scores()['Temperature']['status'] == 'significant'
@@ -0,0 +1,34 @@
+"""
+Tests for the seasonal naive base forecasts of the hierarchy.
+"""
+
+import numpy as np
+
+from features.calendar import season_weeks, week_numbers
+from serving.hierarchy import Hierarchy, HierarchyModel
+
+def model_with_history(start: str, weeks: int) -> HierarchyModel:
+    hierarchy = Hierarchy(np.array([1, 1, 2]), np.array([1, 2, 1]))
+    history_start = int(week_numbers([np.datetime64(start)])[0])
+    history = np.tile(np.arange(weeks, dtype=np.float64), (hierarchy.n_aggregate, 1))
+    return HierarchyModel(hierarchy, history=history, history_start=history_start)
+
+def test_seasonal_naive_uses_the_latest_same_slot_week():
+    model = model_with_history("2010-02-05", 156)
+    week = int(week_numbers([np.datetime64("2019-12-25")])[0])
+    naive = model.seasonal_naive(week)
+    # History values are the column offsets: the Christmas week of 2012 is the latest one in slot 51
+    chosen_week = model.history_start + int(naive[0])
+    assert season_weeks([np.datetime64("2019-12-25")])[0] == 51
+    assert season_weeks(np.array([chosen_week * 7 + 1], dtype='datetime64[D]'))[0] == 51
+    assert np.datetime64("2012-12-01") < np.datetime64(chosen_week * 7 + 1, 'D') < np.datetime64("2013-01-01")
+
+def test_seasonal_naive_skips_the_current_season():
+    model = model_with_history("2010-02-05", 60)
+    week = model.history_start + 55
+    naive = model.seasonal_naive(week)
+    assert np.all(naive <= 55 - 26)
+
+def test_seasonal_naive_without_a_past_season_is_nan():
+    model = model_with_history("2010-02-05", 10)
+    assert np.isnan(model.seasonal_naive(model.history_start + 5)).all()
@@ -0,0 +1,32 @@
+"""
+Tests for the interval table and its widening for models it was not calibrated on.
+"""
+
+import numpy as np
+
+from serving.intervals import IntervalTable, holdout_scales
+
+def make_table() -> IntervalTable:
+    return IntervalTable(np.full((3, 4, 2), -10.0), np.full((3, 4, 2), 20.0), 0.9)
+
+def test_holdout_scales_use_the_students_error_relative_to_the_teacher():
+    entries = {
+        'fast_lightgbm': {'teacher': 'weighted_ensemble', 'holdout_wmae': 1500.0, 'wmae_gap': 500.0},
+        'fast_linear': {'teacher': 'weighted_ensemble', 'holdout_wmae': 900.0, 'wmae_gap': -100.0},
+        'other_student': {'teacher': 'lightgbm', 'holdout_wmae': 1500.0, 'wmae_gap': 500.0},
+        'lightgbm': {'weight': 0.5}
+    }
+    assert holdout_scales(entries, 'weighted_ensemble') == {'fast_lightgbm': 1.5, 'fast_linear': 1.0}
+
+def test_scaled_bounds_widen_the_offsets():
+    table = make_table()
+    lower, upper = table.bounds([100.0, 200.0], [1, 2], [1, 3], [0, 1], scale=1.5)
+    assert lower.tolist() == [85.0, 185.0]
+    assert upper.tolist() == [130.0, 230.0]
+    assert table.interval(100.0, 1, 1, False, 1.5) == [85.0, 130.0]
+
+def test_calibrated_model_round_trips(tmp_path):
+    table = make_table()
+    table.model = 'fast_lightgbm'
+    table.save(tmp_path / "intervals.npz")
+    assert IntervalTable.load(tmp_path / "intervals.npz").model == 'fast_lightgbm'
@@ -0,0 +1,96 @@
+"""
+Tests for the predictions retention helpers on their SQLite fallback.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database.models import Base, Prediction, PredictionRollup
+from database.partitions import (
+    expired_months, recent_predictions, rollup_month, series_predictions, series_rollups
+)
+
+TODAY = date(2026, 8, 15)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+def add(db, created_at, sales, store_id=1, dept_id=1, prediction_date=datetime(2012, 11, 23),
+        model_used='weighted_ensemble'):
+    db.add(Prediction(
+        store_id=store_id, dept_id=dept_id, prediction_date=prediction_date, predicted_sales=sales,
+        confidence_lower=sales * 0.9, confidence_upper=sales * 1.1, model_used=model_used, created_at=created_at
+    ))
+    db.commit()
+
+def test_expired_months_covers_every_month_before_the_window(db):
+    add(db, datetime(2026, 2, 10), 100)
+    add(db, datetime(2026, 4, 30, 23), 100)
+    add(db, datetime(2026, 5, 1), 100)  # inside the window (May to August)
+
+    assert expired_months(db, 3, TODAY) == [date(2026, 2, 1), date(2026, 3, 1), date(2026, 4, 1)]
+    assert expired_months(db, 6, TODAY) == []
+
+def test_rollup_month_aggregates_and_removes_rows(db):
+    add(db, datetime(2026, 5, 3), 100)
+    add(db, datetime(2026, 5, 20), 300)
+    add(db, datetime(2026, 5, 20), 50, model_used=None)
+    add(db, datetime(2026, 6, 1), 500)
+
+    assert rollup_month(db, date(2026, 5, 1)) == 2
+    db.commit()
+
+    rollups = {r.model_used: r for r in series_rollups(db, 1, 1)}
+    assert rollups['weighted_ensemble'].predictions == 2
+    assert float(rollups['weighted_ensemble'].mean_predicted_sales) == pytest.approx(200)
+    assert rollups['unknown'].predictions == 1
+    assert [float(p.predicted_sales) for p in db.query(Prediction).all()] == [500]
+
+def test_rolling_up_a_month_twice_merges_the_aggregates(db):
+    add(db, datetime(2026, 5, 3), 100)
+    add(db, datetime(2026, 5, 4), 200)
+    rollup_month(db, date(2026, 5, 1))
+    db.commit()
+
+    # A late row with an old created_at, e.g. landing in the default partition
+    add(db, datetime(2026, 5, 28), 600)
+    assert rollup_month(db, date(2026, 5, 1)) == 1
+    db.commit()
+
+    rollup = db.query(PredictionRollup).one()
+    assert rollup.predictions == 3
+    assert float(rollup.mean_predicted_sales) == pytest.approx(300)
+    assert float(rollup.min_predicted_sales) == pytest.approx(100)
+    assert float(rollup.max_predicted_sales) == pytest.approx(600)
+    assert float(rollup.mean_confidence_upper) == pytest.approx(330)
+    assert db.query(Prediction).count() == 0
+
+def test_recent_predictions_is_newest_first_and_bounded(db):
+    now = datetime.now()
+    add(db, now - timedelta(days=10), 1)
+    add(db, now - timedelta(days=2), 2)
+    add(db, now - timedelta(hours=1), 3)
+
+    assert [float(p.predicted_sales) for p in recent_predictions(db, days=7)] == [3, 2]
+    assert [float(p.predicted_sales) for p in recent_predictions(db, days=30, limit=1)] == [3]
+
+def test_series_predictions_filters_series_creation_and_dates(db):
+    add(db, datetime(2026, 7, 1), 1, prediction_date=datetime(2012, 11, 30))
+    add(db, datetime(2026, 7, 2), 2, prediction_date=datetime(2012, 11, 23))
+    add(db, datetime(2026, 7, 3), 3, prediction_date=datetime(2012, 12, 7))
+    add(db, datetime(2026, 5, 1), 4, prediction_date=datetime(2012, 11, 23))  # created too early
+    add(db, datetime(2026, 7, 1), 5, store_id=2, prediction_date=datetime(2012, 11, 23))
+
+    rows = series_predictions(db, 1, 1, datetime(2026, 6, 1))
+    assert [float(p.predicted_sales) for p in rows] == [2, 1, 3]
+    rows = series_predictions(db, 1, 1, datetime(2026, 6, 1), start=date(2012, 11, 24), end=date(2012, 11, 30))
+    assert [float(p.predicted_sales) for p in rows] == [1]
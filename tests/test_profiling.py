@@ -0,0 +1,24 @@
+"""
+Tests for sampled request profiling.
+"""
+
+import asyncio
+
+from monitoring.profiling import RequestProfiler, profiled_in_thread
+
+def offloaded_scoring(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+def test_work_offloaded_to_a_worker_thread_is_in_the_request_profile():
+    profiler = RequestProfiler(enabled=True, sample_rate=1.0)
+
+    @profiler.profile("batch_predict")
+    async def handler():
+        return await asyncio.to_thread(profiled_in_thread(offloaded_scoring), 1000)
+
+    assert asyncio.run(handler()) == offloaded_scoring(1000)
+    assert profiler.status()['profiled_requests'] == {'batch_predict': 1}
+    assert 'offloaded_scoring' in profiler.report_text('batch_predict')
+
+def test_unprofiled_requests_get_the_function_unchanged():
+    assert profiled_in_thread(offloaded_scoring) is offloaded_scoring